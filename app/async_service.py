@@ -0,0 +1,1318 @@
+import os
+import json
+import time
+import asyncio
+from collections import Counter
+from contextlib import asynccontextmanager
+from bson import ObjectId
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, ConnectionFailure
+from redis.exceptions import LockError
+from .database import get_async_db, get_async_redis, get_async_redis_raw, get_async_redis_blocking
+from .breaker import BackendUnavailable, redis_breaker, mongo_breaker
+from .singleflight import SingleFlight
+from .dataloader import DataLoader
+from .l1cache import L1Cache, deep_sizeof
+from .bloom import BloomFilter
+from .metrics import CACHE_REQUESTS, REDIS_LATENCY, MONGO_LATENCY, SERIALIZATION_LATENCY, MONGO_LOAD_SHED
+from .tracing import span, traced
+from .log import get_logger
+from .leaderboards import (
+    TOP_MOVIES_KEY,
+    TOP_MOVIES_COMPLETE_KEY,
+    OPTIMIZED_LEADERBOARD_KEY,
+    OPTIMIZED_COMPLETE_KEY,
+    FACET_TTL,
+    FACETS_READY_KEY,
+    FACET_KEYS_KEY,
+    genre_key,
+    movie_facets_key,
+    movie_facet_keys,
+    movie_preview,
+    movie_score,
+    year_filter_keys,
+    queue_leaderboard_update
+)
+from .trending import TRENDING_WINDOW_KEYS
+from .geo import THEATER_INFO_KEY, region_key
+from .codec import CodecError, get_codec, writer_codec
+from .service import (
+    CACHE_TTL,
+    limit_top_movies,
+    mongo_json_encoder,
+    clean_mongo_obj,
+    pack_cache_entry,
+    unpack_cache_entry,
+    encode_cache_entry,
+    movie_version,
+    versioned_set,
+    queue_versioned_set,
+    versioned_update,
+    should_refresh_early,
+    is_movie_id,
+    NEGATIVE_CACHE_TTL,
+    NEGATIVE_CACHE_MARKER,
+    INVALIDATION_CHANNEL,
+    BUCHAREST_THEATERS
+)
+
+# Varianta ASYNC a service.py, folosită de endpoint-urile FastAPI.
+# Un MISS lent pe Atlas nu mai blochează event loop-ul, deci HIT-urile din Redis
+# sunt servite în paralel. Funcțiile sincrone din service.py rămân pentru scripturi.
+
+# Coalescing pentru MISS-uri:
+#   local -> single-flight doar în procesul curent
+#   redis -> în plus un lock scurt în Redis, ca un singur worker uvicorn să reîncarce cheia
+CACHE_MISS_LOCK = os.getenv("CACHE_MISS_LOCK", "local")
+MISS_LOCK_TTL = float(os.getenv("MISS_LOCK_TTL", 5))           # secunde (cât poate ține fetch-ul)
+MISS_LOCK_WAIT = float(os.getenv("MISS_LOCK_WAIT", 2))         # cât așteaptă ceilalți workeri
+MISS_LOCK_POLL = float(os.getenv("MISS_LOCK_POLL", 0.02))      # interval de polling
+
+log = get_logger("cache")
+
+movie_misses = SingleFlight()
+
+# LOAD SHEDDING: cu Redis căzut (breaker-ul nu e closed) tot traficul ar lovi Atlas.
+# Limităm query-urile Mongo concurente per proces; ce nu intră în MONGO_SHED_WAIT_MS primește 503.
+MONGO_SHED_CONCURRENCY = int(os.getenv("MONGO_SHED_CONCURRENCY", 20))
+MONGO_SHED_WAIT_MS = float(os.getenv("MONGO_SHED_WAIT_MS", 50))
+
+_mongo_slots = asyncio.Semaphore(MONGO_SHED_CONCURRENCY)
+
+
+@asynccontextmanager
+async def mongo_call(operation: str):
+    """
+    Orice query Mongo de pe calea de request: breaker (fail-fast), load shedding cât
+    timp cache-ul e jos, span pentru Server-Timing + histograma mongo_query_seconds.
+    """
+    mongo_breaker.check()
+    shedding = not redis_breaker.closed
+    if shedding:
+        try:
+            await asyncio.wait_for(_mongo_slots.acquire(), MONGO_SHED_WAIT_MS / 1000)
+        except asyncio.TimeoutError:
+            MONGO_LOAD_SHED.inc()
+            raise BackendUnavailable("mongo", "prea multe query-uri cu cache-ul căzut", 1) from None
+    try:
+        with span("mongo", MONGO_LATENCY.labels(operation)):
+            yield
+        mongo_breaker.record_success()
+    except ConnectionFailure as e:
+        mongo_breaker.record_failure()
+        raise BackendUnavailable("mongo", str(e)) from e
+    finally:
+        if shedding:
+            _mongo_slots.release()
+
+
+async def mongo_traced(operation: str, awaitable):
+    """mongo_call() pentru un awaitable pornit prin asyncio.gather."""
+    try:
+        async with mongo_call(operation):
+            return await awaitable
+    finally:
+        # Refuzat înainte să pornească (breaker / shedding): închidem corutina neîncepută
+        if hasattr(awaitable, "close"):
+            awaitable.close()
+
+# Referințe la task-urile de refresh în fundal (altfel pot fi colectate de GC)
+_background_tasks = set()
+
+# L1 în proces pentru movie:{id} și movie:hash:{id}, coerent între workeri prin Pub/Sub
+L1_MAX_BYTES = int(os.getenv("L1_MAX_BYTES", 32 * 1024 * 1024))  # 0 = dezactivat
+L1_TTL = float(os.getenv("L1_TTL", 5))
+
+l1 = L1Cache(max_bytes=L1_MAX_BYTES, ttl=L1_TTL)
+
+# Bloom filter cu toate movies._id (per proces): ID-urile sigur inexistente -> 404 fără round trip.
+# E reîncărcat periodic; create-urile din ceilalți workeri vin pe canalul de invalidare.
+# Un insert direct în Mongo ajunge pe canal doar prin change stream, deci implicit filtrul
+# e pornit numai cu CHANGE_STREAM_WORKER=1 (altfel filmul ar da 404 până la reseed).
+MOVIE_BLOOM = os.getenv("MOVIE_BLOOM", os.getenv("CHANGE_STREAM_WORKER", "0")) == "1"
+BLOOM_ERROR_RATE = float(os.getenv("BLOOM_ERROR_RATE", 0.001))
+BLOOM_REFRESH_SECONDS = float(os.getenv("BLOOM_REFRESH_SECONDS", 600))
+
+movie_bloom = None      # None = încă neîncărcat -> nu filtrăm nimic
+_bloom_seeding = None   # ID-uri create în timpul unui seed (intră și în filtrul nou)
+_bloom_reseed = asyncio.Event()
+
+
+def movie_may_exist(movie_id: str):
+    """False = sigur nu există (ID invalid sau absent din Bloom filter)."""
+    if not is_movie_id(movie_id):
+        return False
+    return movie_bloom is None or movie_id.lower() in movie_bloom
+
+
+def bloom_add(movie_id: str):
+    if movie_bloom is not None:
+        movie_bloom.add(movie_id)
+    if _bloom_seeding is not None:
+        _bloom_seeding.add(movie_id)
+
+
+async def seed_movie_bloom():
+    """Construiește un filtru nou dintr-un scan pe _id (doar proiecția) și îl înlocuiește pe cel vechi."""
+    global movie_bloom, _bloom_seeding
+    db = get_async_db()
+    _bloom_seeding = set()
+    try:
+        total = await db.movies.estimated_document_count()
+        # Loc de creștere până la următorul seed
+        bloom = BloomFilter(capacity=max(1000, int(total * 1.5)), error_rate=BLOOM_ERROR_RATE)
+        async for doc in db.movies.find({}, {"_id": 1}).batch_size(10_000):
+            bloom.add(str(doc["_id"]))
+        for movie_id in _bloom_seeding:
+            bloom.add(movie_id)
+        movie_bloom = bloom
+    finally:
+        _bloom_seeding = None
+    return len(bloom)
+
+
+async def run_bloom_refresher():
+    """Task de fundal (pornit în lifespan): seed la pornire, apoi la BLOOM_REFRESH_SECONDS."""
+    if not MOVIE_BLOOM:
+        return
+    while True:
+        delay = BLOOM_REFRESH_SECONDS
+        try:
+            count = await seed_movie_bloom()
+            log.info("bloom_loaded", movies=count, size_kb=movie_bloom.size_bytes // 1024)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            log.warning("bloom_load_failed", error=str(e))
+            delay = 5
+        _bloom_reseed.clear()
+        try:
+            await asyncio.wait_for(_bloom_reseed.wait(), timeout=delay)
+        except asyncio.TimeoutError:
+            pass
+
+
+def _bloom_lost_updates():
+    """Am pierdut mesaje de pe canal: filtrul ar putea rata create-uri -> îl oprim până la reseed."""
+    global movie_bloom
+    movie_bloom = None
+    _bloom_reseed.set()
+
+
+async def publish_invalidation(*keys):
+    """Scoate cheile din L1-ul local și anunță toate celelalte procese (Redis Pub/Sub)."""
+    l1.delete(*keys)
+    try:
+        await get_async_redis().publish(INVALIDATION_CHANNEL, json.dumps(keys))
+    except Exception as e:
+        log.warning("invalidation_publish_failed", error=str(e))
+
+
+async def run_invalidation_listener():
+    """
+    Task de fundal (pornit în lifespan): ascultă pe canalul de invalidare și
+    scoate cheile din L1. Dacă pierdem conexiunea, nu știm ce mesaje am ratat,
+    deci golim tot L1-ul.
+    """
+    while True:
+        pubsub = None
+        try:
+            # Client fără socket timeout: listen() așteaptă oricât un mesaj
+            pubsub = get_async_redis_blocking().pubsub(ignore_subscribe_messages=True)
+            await pubsub.subscribe(INVALIDATION_CHANNEL)
+            l1.clear()
+            async for message in pubsub.listen():
+                keys = json.loads(message["data"])
+                l1.delete(*keys)
+                # Un ID în plus în Bloom filter costă doar un fals pozitiv
+                for key in keys:
+                    if key.startswith("movie:") and is_movie_id(key[6:]):
+                        bloom_add(key[6:])
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            log.warning("invalidation_listener_down", error=str(e))
+            l1.clear()
+            _bloom_lost_updates()
+            await asyncio.sleep(1)
+        finally:
+            if pubsub is not None:
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+
+#1
+
+async def get_movie_no_cache(movie_id: str):
+    db = get_async_db()
+    try:
+        oid = ObjectId(movie_id)
+        async with mongo_call("find_one"):
+            movie = await db.movies.find_one({"_id": oid})
+    except BackendUnavailable:
+        raise
+    except Exception:
+        return None
+
+    return clean_mongo_obj(movie), "MongoDB (Atlas)"
+
+
+class CachedMovie:
+    """
+    Un film din cache: payload-ul exact cum e în Redis + codec-ul lui.
+    JSON-ul (raw) și dict-ul decodat (data) se calculează doar dacă cineva chiar are nevoie.
+    Pus în L1 (cache_in_l1), raportează L1 memoria câmpurilor calculate mai târziu.
+    """
+    __slots__ = ("payload", "codec", "_raw", "_data", "_l1_key")
+
+    def __init__(self, payload: bytes, codec, data=None):
+        self.payload = payload
+        self.codec = codec
+        self._raw = None
+        self._data = data
+        self._l1_key = None
+
+    @property
+    def raw(self):
+        """Bytes JSON pentru passthrough (identic cu payload-ul pentru json/orjson)."""
+        if self._raw is None:
+            with span("serialize", SERIALIZATION_LATENCY.labels(self.codec.tag, "to_json")):
+                self._raw = self.codec.to_json(self.payload)
+            if self._raw is not self.payload:
+                self._grow(len(self._raw))
+        return self._raw
+
+    @property
+    def data(self):
+        if self._data is None:
+            with span("serialize", SERIALIZATION_LATENCY.labels(self.codec.tag, "decode")):
+                self._data = self.codec.decode(self.payload)
+            self._grow(deep_sizeof(self._data))
+        return self._data
+
+    @property
+    def size(self):
+        """Memoria ocupată acum: payload + JSON-ul (dacă e altul) + dict-ul decodat (dacă există)."""
+        size = len(self.payload)
+        if self._raw is not None and self._raw is not self.payload:
+            size += len(self._raw)
+        if self._data is not None:
+            size += deep_sizeof(self._data)
+        return size
+
+    def cache_in_l1(self, cache_key: str, ttl: float, epoch: int):
+        if l1.set(cache_key, self, size=self.size, ttl=ttl, epoch=epoch):
+            self._l1_key = cache_key
+
+    def _grow(self, extra: int):
+        if self._l1_key is not None:
+            l1.grow(self._l1_key, self, extra)
+
+
+def encode_movie(codec, movie: dict):
+    with span("serialize", SERIALIZATION_LATENCY.labels(codec.tag, "encode")):
+        return codec.encode(movie, default=mongo_json_encoder)
+
+
+async def get_movie_with_cache(movie_id: str):
+    entry, source = await _get_movie_entry(movie_id)
+    return (entry.data if entry else None), source
+
+
+async def get_movie_raw_with_cache(movie_id: str):
+    """
+    Fast path ZERO-COPY: returnează bytes-ii JSON din cache, fără json.loads.
+    Endpoint-ul îi lipește direct în corpul răspunsului HTTP.
+    """
+    entry, source = await _get_movie_entry(movie_id)
+    return (entry.raw if entry else None), source
+
+
+async def _get_movie_entry(movie_id: str):
+    # Client fără decode_responses: primim bytes, exact ce e stocat
+    redis_client = get_async_redis_raw()
+    cache_key = f"movie:{movie_id}"
+
+    # ID invalid sau absent din Bloom filter: sigur nu există, fără niciun round trip
+    if not movie_may_exist(movie_id):
+        return None, "Bloom filter (absent)"
+
+    # 0. L1 (memoria procesului): fără round trip, fără json.loads
+    entry = l1.get(cache_key)
+    if entry is not None:
+        CACHE_REQUESTS.labels("movie", "l1", "hit").inc()
+        return entry, "L1 (in-process)"
+    epoch = l1.epoch
+
+    # 1. Micro-batching: GET-urile concurente pleacă împreună (MGET + un $in pentru MISS-uri)
+    if DATALOADER_ENABLED and CACHE_MISS_LOCK != "redis":
+        # Batch-ul rulează în afara request-ului: aici se vede doar cât a așteptat acesta
+        with span("dataloader"):
+            return await movie_loader.load(movie_id)
+
+    # verificam redis
+    try:
+        with span("redis", REDIS_LATENCY.labels("get")):
+            cached_data = await redis_client.get(cache_key)
+        if cached_data == NEGATIVE_CACHE_MARKER:
+            CACHE_REQUESTS.labels("movie", "redis", "hit").inc()
+            return None, "Redis (negative)"
+        if cached_data:
+            cached = unpack_cache_entry(cached_data)
+            payload, soft_expires_at, delta = cached.payload, cached.soft_expires_at, cached.delta
+            entry = CachedMovie(payload, get_codec(cached.codec))
+
+            # Între soft și hard TTL: răspundem imediat cu valoarea veche + refresh în fundal
+            if time.time() >= soft_expires_at:
+                log.sampled("cache_stale", family="movie", movie_id=movie_id)
+                CACHE_REQUESTS.labels("movie", "redis", "stale").inc()
+                _refresh_in_background(movie_id, cache_key)
+                return entry, "Redis (stale)"
+
+            # XFetch: refresh probabilist înainte de expirare (pentru cheile fierbinți)
+            if should_refresh_early(soft_expires_at, delta):
+                _refresh_in_background(movie_id, cache_key)
+
+            log.sampled("cache_hit", family="movie", movie_id=movie_id)
+            CACHE_REQUESTS.labels("movie", "redis", "hit").inc()
+            entry.cache_in_l1(cache_key, ttl=soft_expires_at - time.time(), epoch=epoch)
+            return entry, "Redis"
+    except CodecError as e:
+        log.warning("cache_decode_failed", error=str(e))
+        CACHE_REQUESTS.labels("movie", "redis", "error").inc()
+    except Exception as e:
+        log.warning("redis_error", error=str(e))
+        CACHE_REQUESTS.labels("movie", "redis", "error").inc()
+    else:
+        CACHE_REQUESTS.labels("movie", "redis", "miss").inc()
+
+    # 2. CACHE MISS -> Mongo (un singur fetch pentru toate request-urile concurente)
+    log.sampled("cache_miss", family="movie", movie_id=movie_id)
+
+    return await _load_movie(movie_id, cache_key)
+
+
+def _load_movie(movie_id: str, cache_key: str):
+    if CACHE_MISS_LOCK == "redis":
+        return movie_misses.do(cache_key, lambda: _fill_movie_with_lock(movie_id, cache_key))
+    return movie_misses.do(cache_key, lambda: _fill_movie_cache(movie_id, cache_key))
+
+
+def _refresh_in_background(movie_id: str, cache_key: str):
+    # Dacă un refresh pentru aceeași cheie e deja în zbor, single-flight îl refolosește
+    task = asyncio.ensure_future(_load_movie(movie_id, cache_key))
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+async def _fill_movie_cache(movie_id: str, cache_key: str):
+    """Citește filmul din Mongo și îl scrie în Redis (SETEX cu hard TTL)."""
+    start = time.perf_counter()
+    result = await get_movie_no_cache(movie_id)
+    delta = time.perf_counter() - start
+    if result is None:
+        return None, "MongoDB (Atlas)"
+    movie, source = result
+    if not movie:
+        # Negative cache: următoarele request-uri pentru acest ID nu mai ajung în Atlas
+        try:
+            await get_async_redis_raw().setex(cache_key, NEGATIVE_CACHE_TTL, NEGATIVE_CACHE_MARKER)
+        except Exception as e:
+            log.warning("redis_error", error=str(e))
+        return None, source
+
+    codec = writer_codec()
+    payload = encode_movie(codec, movie)
+    try:
+        # Compare-and-set: un MISS lent nu suprascrie o versiune mai nouă scrisă între timp
+        version = movie_version(movie)
+        with span("redis", REDIS_LATENCY.labels("versioned_set")):
+            await versioned_set(
+                get_async_redis_raw(), cache_key,
+                pack_cache_entry(payload, delta, codec=codec.tag, version=version), version
+            )
+    except Exception as e:
+        log.warning("redis_error", error=str(e))
+
+    return CachedMovie(payload, codec, movie), source
+
+
+async def _fill_movie_with_lock(movie_id: str, cache_key: str):
+    """
+    Varianta cross-worker: cine ia lock-ul lock:movie:{id} face fetch-ul,
+    ceilalți fac polling pe cheie până apare (sau până expiră lock-ul).
+    """
+    redis_client = get_async_redis_raw()
+    lock = redis_client.lock(f"lock:{cache_key}", timeout=MISS_LOCK_TTL, blocking=False)
+
+    try:
+        acquired = await lock.acquire()
+    except Exception as e:
+        log.warning("redis_error", error=str(e))
+        return await _fill_movie_cache(movie_id, cache_key)
+
+    if acquired:
+        try:
+            return await _fill_movie_cache(movie_id, cache_key)
+        finally:
+            try:
+                await lock.release()
+            except LockError:
+                pass  # lock-ul a expirat între timp
+
+    # Alt worker reîncarcă cheia -> așteptăm rezultatul lui
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + MISS_LOCK_WAIT
+    try:
+        while loop.time() < deadline:
+            await asyncio.sleep(MISS_LOCK_POLL)
+            cached_data = await redis_client.get(cache_key)
+            if cached_data == NEGATIVE_CACHE_MARKER:
+                return None, "Redis (negative)"
+            if cached_data:
+                cached = unpack_cache_entry(cached_data)
+                return CachedMovie(cached.payload, get_codec(cached.codec)), "Redis"
+            if not await lock.locked():
+                break  # lock eliberat fără valoare (film inexistent sau eroare)
+    except Exception as e:
+        log.warning("redis_error", error=str(e))
+
+    return await _fill_movie_cache(movie_id, cache_key)
+
+# --- BATCH: MGET + un singur $in în Mongo + un pipeline SETEX ---
+
+MAX_BATCH_IDS = int(os.getenv("MAX_BATCH_IDS", 500))
+
+
+async def get_movies_batch(movie_ids: list):
+    """Returnează [(movie, source)] în aceeași ordine ca movie_ids."""
+    entries = await _get_movie_entries(movie_ids)
+    return [((entry.data if entry else None), source) for entry, source in entries]
+
+
+async def get_movies_batch_raw(movie_ids: list):
+    """Ca get_movies_batch, dar cu bytes JSON (pentru passthrough)."""
+    entries = await _get_movie_entries(movie_ids)
+    return [((entry.raw if entry else None), source) for entry, source in entries]
+
+
+async def _get_movie_entries(movie_ids: list):
+    """
+    Rezolvă N filme cu un număr CONSTANT de round trip-uri:
+      1. L1 (fără rețea)
+      2. un singur MGET pentru restul
+      3. un singur find({"_id": {"$in": [...]}}) pentru MISS-uri
+      4. un singur pipeline SETEX pentru backfill
+    """
+    found = {}
+    pending = []
+    outcomes = Counter()  # (tier, result) -> câte chei, pentru cache_requests_total
+    for movie_id in dict.fromkeys(movie_ids):
+        if not movie_may_exist(movie_id):
+            found[movie_id] = (None, "Bloom filter (absent)")
+            continue
+        entry = l1.get(f"movie:{movie_id}")
+        if entry is not None:
+            found[movie_id] = (entry, "L1 (in-process)")
+            outcomes["l1", "hit"] += 1
+        else:
+            pending.append(movie_id)
+
+    misses = []
+    if pending:
+        epoch = l1.epoch
+        try:
+            with span("redis", REDIS_LATENCY.labels("mget")):
+                values = await get_async_redis_raw().mget([f"movie:{mid}" for mid in pending])
+        except Exception as e:
+            log.warning("redis_error", error=str(e))
+            # Redis căzut: toate cheile merg direct în Mongo
+            outcomes["redis", "error"] += len(pending)
+            misses, pending, values = list(pending), [], []
+
+        now = time.time()
+        for movie_id, cached_data in zip(pending, values):
+            if cached_data == NEGATIVE_CACHE_MARKER:
+                found[movie_id] = (None, "Redis (negative)")
+                outcomes["redis", "hit"] += 1
+                continue
+            if not cached_data:
+                misses.append(movie_id)
+                outcomes["redis", "miss"] += 1
+                continue
+            try:
+                cached = unpack_cache_entry(cached_data)
+                entry = CachedMovie(cached.payload, get_codec(cached.codec))
+            except CodecError as e:
+                log.warning("cache_decode_failed", error=str(e))
+                misses.append(movie_id)
+                outcomes["redis", "error"] += 1
+                continue
+
+            cache_key = f"movie:{movie_id}"
+            if now >= cached.soft_expires_at:
+                _refresh_in_background(movie_id, cache_key)
+                found[movie_id] = (entry, "Redis (stale)")
+                outcomes["redis", "stale"] += 1
+                continue
+            if should_refresh_early(cached.soft_expires_at, cached.delta):
+                _refresh_in_background(movie_id, cache_key)
+            entry.cache_in_l1(cache_key, ttl=cached.soft_expires_at - now, epoch=epoch)
+            found[movie_id] = (entry, "Redis")
+            outcomes["redis", "hit"] += 1
+
+    for (tier, result), count in outcomes.items():
+        CACHE_REQUESTS.labels("movie", tier, result).inc(count)
+
+    if misses:
+        log.sampled("cache_miss", family="movie", count=len(misses))
+        loaded = await movie_misses.do_many([f"movie:{mid}" for mid in misses], _fill_movies_cache)
+        for movie_id in misses:
+            found[movie_id] = loaded[f"movie:{movie_id}"]
+
+    return [found[movie_id] for movie_id in movie_ids]
+
+
+async def _fill_movies_cache(cache_keys: list):
+    """Un singur $in pentru toate cheile lipsă + un singur pipeline SETEX."""
+    results = {key: (None, "MongoDB (Atlas)") for key in cache_keys}
+
+    # ObjectId-ul normalizat (hex lowercase) -> cheile cerute (ID-ul poate veni și cu majuscule)
+    wanted = {}
+    for key in cache_keys:
+        movie_id = key.split(":", 1)[1]
+        if is_movie_id(movie_id):
+            wanted.setdefault(movie_id.lower(), []).append(key)
+    if not wanted:
+        return results
+
+    start = time.perf_counter()
+    try:
+        async with mongo_call("find_in"):
+            movies = await get_async_db().movies.find(
+                {"_id": {"$in": [ObjectId(movie_id) for movie_id in wanted]}}
+            ).to_list(length=None)
+    except BackendUnavailable:
+        raise
+    except Exception as e:
+        log.warning("mongo_error", error=str(e))
+        return results
+    # XFetch are nevoie de costul recalculării; îl împărțim egal între documente
+    delta = (time.perf_counter() - start) / max(1, len(movies))
+
+    codec = writer_codec()
+    pipe = get_async_redis_raw().pipeline(transaction=False)
+    for movie in movies:
+        movie = clean_mongo_obj(movie)
+        payload = encode_movie(codec, movie)
+        entry = CachedMovie(payload, codec, movie)
+        for cache_key in wanted.pop(movie["_id"], []):
+            version = movie_version(movie)
+            queue_versioned_set(pipe, cache_key, pack_cache_entry(payload, delta, codec=codec.tag, version=version), version)
+            results[cache_key] = (entry, "MongoDB (Atlas)")
+    # Negative cache pentru ID-urile care nu există în Mongo
+    for keys in wanted.values():
+        for cache_key in keys:
+            pipe.setex(cache_key, NEGATIVE_CACHE_TTL, NEGATIVE_CACHE_MARKER)
+
+    try:
+        with span("redis", REDIS_LATENCY.labels("pipeline")):
+            await pipe.execute()
+    except Exception as e:
+        log.warning("redis_error", error=str(e))
+
+    return results
+
+
+async def _load_movie_batch(movie_ids: list):
+    entries = await _get_movie_entries(movie_ids)
+    return dict(zip(movie_ids, entries))
+
+
+# DataLoader pentru /movie/{id}: cererile din aceeași fereastră devin un singur batch.
+# Fereastra 0 = un tick de event loop; cu CACHE_MISS_LOCK=redis rămâne calea cu GET + lock.
+DATALOADER_ENABLED = os.getenv("DATALOADER", "1") == "1"
+DATALOADER_WINDOW_US = float(os.getenv("DATALOADER_WINDOW_US", 0))
+
+movie_loader = DataLoader(
+    _load_movie_batch,
+    name="movie",
+    window=DATALOADER_WINDOW_US / 1_000_000,
+    max_batch=MAX_BATCH_IDS,
+)
+
+#2
+
+
+async def get_top_movies(limit=10, offset=0):
+    entries, source = await _get_top_movie_entries(limit, offset)
+    return [entry.data for entry in entries], source
+
+
+async def get_top_movies_raw(limit=10, offset=0):
+    """Ca get_top_movies, dar cu bytes JSON (pentru passthrough)."""
+    entries, source = await _get_top_movie_entries(limit, offset)
+    return [entry.raw for entry in entries], source
+
+
+async def _get_top_movie_entries(limit: int, offset: int):
+    """
+    Număr CONSTANT de round trip-uri, indiferent de limit:
+      HIT : ZREVRANGE + MGET (+ un $in pentru filmele expirate)
+      MISS: un singur find cu documente complete + un singur pipeline (ZADD + SETEX)
+    """
+    redis_client = get_async_redis()
+
+    try:
+        with span("redis", REDIS_LATENCY.labels("zrevrange")):
+            top_ids = await redis_client.zrevrange(TOP_MOVIES_KEY, offset, offset + limit - 1)
+            # O pagină incompletă e HIT doar dacă știm că leaderboard-ul are toate filmele
+            complete = top_ids and (len(top_ids) == limit or await redis_client.exists(TOP_MOVIES_COMPLETE_KEY))
+        if complete:
+            log.sampled("cache_hit", family="leaderboard")
+            CACHE_REQUESTS.labels("leaderboard", "redis", "hit").inc()
+            entries = [entry for entry, source in await _get_movie_entries(top_ids) if entry]
+            return entries, "Redis ZSET"
+        CACHE_REQUESTS.labels("leaderboard", "redis", "miss").inc()
+    except Exception as e:
+        log.warning("redis_error", error=str(e))
+        CACHE_REQUESTS.labels("leaderboard", "redis", "error").inc()
+
+    log.sampled("cache_miss", family="leaderboard")
+
+    # Un singur query: documentele complete pentru toate pozițiile până la offset + limit
+    depth = offset + limit
+    async with mongo_call("top_movies"):
+        movies = await get_async_db().movies.find(
+            {"imdb.rating": {"$ne": ""}}
+        ).sort("imdb.rating", -1).limit(depth).to_list(length=None)
+
+    codec = writer_codec()
+    pipe = get_async_redis_raw().pipeline(transaction=False)
+    entries = []
+    scores = {}
+
+    for movie in movies:
+        movie = clean_mongo_obj(movie)
+        movie_id = movie["_id"]
+        payload = encode_movie(codec, movie)
+        version = movie_version(movie)
+        queue_versioned_set(pipe, f"movie:{movie_id}", pack_cache_entry(payload, codec=codec.tag, version=version), version)
+        entries.append(CachedMovie(payload, codec, movie))
+
+        try:
+            scores[movie_id] = float(movie.get("imdb", {}).get("rating", 0))
+        except (TypeError, ValueError):
+            pass
+
+    # Un singur ZADD cu tot leaderboard-ul (nu câte unul per film)
+    if scores:
+        pipe.zadd(TOP_MOVIES_KEY, scores)
+        pipe.expire(TOP_MOVIES_KEY, CACHE_TTL)
+    if len(movies) < depth:
+        pipe.setex(TOP_MOVIES_COMPLETE_KEY, CACHE_TTL, 1)
+    else:
+        pipe.delete(TOP_MOVIES_COMPLETE_KEY)
+
+    try:
+        with span("redis", REDIS_LATENCY.labels("pipeline")):
+            await pipe.execute()
+    except Exception as e:
+        log.warning("redis_error", error=str(e))
+
+    return entries[offset:], "MongoDB (Atlas)"
+
+#3 WRITE-THROUGH STRATEGY
+
+def _queue_movie_write(pipe, movie_id: str, movie: dict, created: bool = False):
+    """
+    SETEX movie:{id} + leaderboard-urile + preview-ul (movie=None -> marcaj negativ + ZREM).
+    created=True: insert, poate înlocui un marcaj negativ (update-urile nu pot).
+    """
+    cache_key = f"movie:{movie_id}"
+    if movie is None:
+        pipe.setex(cache_key, NEGATIVE_CACHE_TTL, NEGATIVE_CACHE_MARKER)
+    else:
+        queue_versioned_set(pipe, cache_key, encode_cache_entry(movie), movie_version(movie), replace_negative=created)
+    queue_leaderboard_update(pipe, movie_id, movie, CACHE_TTL)
+
+
+async def update_movie_write_through(movie_id: str, update_data: dict):
+    """
+    WRITE-THROUGH UPDATE (async): MongoDB întâi, apoi Redis.
+    find_one_and_update(AFTER) întoarce direct documentul nou: un singur round trip la Atlas.
+    """
+    redis_client = get_async_redis_raw()
+    db = get_async_db()
+
+    try:
+        oid = ObjectId(movie_id)
+    except Exception:
+        return None, "Invalid movie ID"
+
+    # 1. Update în MongoDB ÎNTÂI (pentru siguranță) + documentul complet, în același apel
+    try:
+        async with mongo_call("find_one_and_update"):
+            movie = clean_mongo_obj(await db.movies.find_one_and_update(
+                {"_id": oid},
+                versioned_update(update_data),
+                return_document=ReturnDocument.AFTER
+            ))
+
+        if movie is None:
+            return None, "Movie not found in MongoDB"
+
+        log.debug("mongo_updated", movie_id=movie_id)
+    except BackendUnavailable:
+        raise
+    except Exception as e:
+        return None, f"MongoDB error: {e}"
+
+    # 2. Scrie în Cache: documentul + leaderboard-urile + preview-ul, într-o singură tranzacție
+    try:
+        cache_key = f"movie:{movie_id}"
+        pipe = redis_client.pipeline(transaction=True)
+        _queue_movie_write(pipe, movie_id, movie)
+        with span("redis", REDIS_LATENCY.labels("transaction")):
+            await pipe.execute()
+        log.debug("cache_updated", movie_id=movie_id)
+        await publish_invalidation(cache_key, f"movie:hash:{movie_id}")
+
+        return movie, "Write-Through: Updated in MongoDB & Redis"
+    except Exception as e:
+        return None, f"Redis cache error: {e}"
+
+
+async def update_movies_write_through(updates: dict):
+    """
+    WRITE-THROUGH BULK UPDATE: {movie_id: {câmp: valoare}} ->
+    un bulk_write + un find cu $in (documentele noi) + un pipeline Redis, indiferent câte filme.
+    Returnează {movie_id: (movie, mesaj)}.
+    """
+    redis_client = get_async_redis_raw()
+    db = get_async_db()
+
+    results = {movie_id: (None, "Invalid movie ID") for movie_id in updates}
+    valid = {movie_id: data for movie_id, data in updates.items() if is_movie_id(movie_id)}
+    if not valid:
+        return results
+
+    movie_ids = list(valid)
+    try:
+        async with mongo_call("bulk_write"):
+            await db.movies.bulk_write(
+                [UpdateOne({"_id": ObjectId(movie_id)}, versioned_update(valid[movie_id])) for movie_id in movie_ids],
+                ordered=False
+            )
+    except BulkWriteError as e:
+        # ordered=False: Mongo a aplicat toate update-urile fără eroare, deci cache-ul
+        # trebuie actualizat pentru ele; doar indecșii din writeErrors au eșuat
+        for error in e.details.get("writeErrors", []):
+            movie_id = movie_ids[error["index"]]
+            results[movie_id] = (None, f"MongoDB error: {error.get('errmsg')}")
+            del valid[movie_id]
+        log.warning("bulk_write_partial", failed=len(movie_ids) - len(valid))
+    except BackendUnavailable:
+        raise
+    except Exception as e:
+        for movie_id in valid:
+            results[movie_id] = (None, f"MongoDB error: {e}")
+        return results
+    if not valid:
+        return results
+
+    try:
+        async with mongo_call("find_in"):
+            movies = await db.movies.find({"_id": {"$in": [ObjectId(movie_id) for movie_id in valid]}}).to_list(length=None)
+    except BackendUnavailable:
+        raise
+    except Exception as e:
+        for movie_id in valid:
+            results[movie_id] = (None, f"MongoDB error: {e}")
+        return results
+
+    for movie_id in valid:
+        results[movie_id] = (None, "Movie not found in MongoDB")
+
+    pipe = redis_client.pipeline(transaction=True)
+    invalidated = []
+    for movie in movies:
+        movie = clean_mongo_obj(movie)
+        movie_id = movie["_id"]
+        _queue_movie_write(pipe, movie_id, movie)
+        invalidated += [f"movie:{movie_id}", f"movie:hash:{movie_id}"]
+        results[movie_id] = (movie, "Write-Through: Updated in MongoDB & Redis")
+
+    try:
+        if invalidated:
+            with span("redis", REDIS_LATENCY.labels("transaction")):
+                await pipe.execute()
+            await publish_invalidation(*invalidated)
+    except Exception as e:
+        log.warning("redis_error", error=str(e))
+
+    log.info("bulk_updated", count=len(movies))
+    return results
+
+
+async def delete_movie_write_through(movie_id: str):
+    """
+    WRITE-THROUGH DELETE (async): întâi MongoDB, apoi Redis.
+    Redis se atinge doar după ce Mongo confirmă: un delete eșuat / expirat nu scoate din
+    cache și din leaderboard-uri un film care încă există. Marcajul negativ e corect și
+    dacă filmul nu exista (Mongo a confirmat că lipsește).
+    """
+    redis_client = get_async_redis_raw()
+    db = get_async_db()
+
+    try:
+        oid = ObjectId(movie_id)
+    except Exception:
+        return False, "Invalid movie ID"
+
+    try:
+        async with mongo_call("delete_one"):
+            result = await db.movies.delete_one({"_id": oid})
+    except BackendUnavailable:
+        raise
+    except Exception as e:
+        return False, f"MongoDB error: {e}"
+    log.debug("mongo_deleted", movie_id=movie_id, deleted=result.deleted_count)
+
+    cache_key = f"movie:{movie_id}"
+    # Nu doar DEL: marcajul negativ oprește MISS-urile repetate pe ID-ul șters
+    pipe = redis_client.pipeline(transaction=True)
+    _queue_movie_write(pipe, movie_id, None)  # + ZREM + DEL preview
+    try:
+        with span("redis", REDIS_LATENCY.labels("transaction")):
+            await pipe.execute()
+    except Exception as e:
+        redis_error = e
+    else:
+        redis_error = None
+        log.debug("cache_deleted", movie_id=movie_id)
+    await publish_invalidation(cache_key, f"movie:hash:{movie_id}")
+
+    if result.deleted_count == 0:
+        return False, "Movie not found in MongoDB"
+    if redis_error is not None:
+        return False, f"Redis error: {redis_error}"
+    return True, "Write-Through: Deleted from MongoDB & Redis"
+
+
+async def create_movie_write_through(movie_data: dict):
+    """
+    WRITE-THROUGH CREATE (async): insert în MongoDB și cache în Redis, în paralel.
+    _id-ul e generat local, deci documentul din cache e exact cel inserat (fără find_one).
+    """
+    redis_client = get_async_redis_raw()
+    db = get_async_db()
+
+    document = dict(movie_data, _v=1)
+    document.setdefault("_id", ObjectId())
+    movie_id = str(document["_id"])
+    movie = clean_mongo_obj(dict(document))
+    cache_key = f"movie:{movie_id}"
+    bloom_add(movie_id)
+
+    # Cache (+ leaderboard-uri, dacă ratingul îl bagă în top)
+    pipe = redis_client.pipeline(transaction=True)
+    _queue_movie_write(pipe, movie_id, movie, created=True)
+
+    result, redis_result = await asyncio.gather(
+        mongo_traced("insert_one", db.movies.insert_one(document)),
+        traced("redis", pipe.execute(), REDIS_LATENCY.labels("transaction")),
+        return_exceptions=True
+    )
+
+    if isinstance(result, Exception):
+        # Insert eșuat (ex: _id duplicat): scoatem ce am pus deja în cache
+        try:
+            pipe = redis_client.pipeline(transaction=True)
+            pipe.delete(cache_key)
+            queue_leaderboard_update(pipe, movie_id, None, CACHE_TTL)
+            await pipe.execute()
+            await publish_invalidation(cache_key, f"movie:hash:{movie_id}")
+        except Exception as e:
+            log.warning("redis_error", error=str(e))
+        if isinstance(result, BackendUnavailable):
+            raise result
+        return None, f"Error: {result}"
+
+    log.debug("mongo_created", movie_id=movie_id)
+    if isinstance(redis_result, Exception):
+        log.warning("redis_error", error=str(redis_result))
+    else:
+        log.debug("cache_created", movie_id=movie_id)
+    await publish_invalidation(cache_key, f"movie:hash:{movie_id}")
+
+    return movie, "Write-Through: Created in MongoDB & Redis"
+
+#4 GEO Indexing for Theaters
+
+GEO_DEMO_REGION = "bucharest"
+GEO_DEFAULT_REGION = os.getenv("GEO_DEFAULT_REGION", GEO_DEMO_REGION)
+GEO_SEARCH_LIMIT = int(os.getenv("GEO_SEARCH_LIMIT", 100))
+
+async def seed_theaters():
+    redis_client = get_async_redis()
+    key = region_key(GEO_DEMO_REGION)
+
+    try:
+        await redis_client.delete(key)
+        count = await redis_client.geoadd(key, [coord for loc in BUCHAREST_THEATERS for coord in loc])
+        return f"Am adăugat {count} cinematografe în Redis GeoIndex."
+    except Exception as e:
+        return f"Eroare Redis Geo: {e}"
+
+
+async def find_nearby_theaters(lat: float, lon: float, radius_km: int,
+                               region: str = GEO_DEFAULT_REGION, limit: int = GEO_SEARCH_LIMIT):
+    """
+    Caută cinematografe pe o rază dată (GEOSEARCH, async) în GEO set-ul regiunii
+    (bucharest = demo-ul din /geo/init, all / un stat = ingest-ul din theaters).
+    COUNT limit ține costul constant și pe regiuni dense; adresele vin cu un HMGET.
+    """
+    redis_client = get_async_redis()
+    key = region_key(region)
+
+    try:
+        with span("redis", REDIS_LATENCY.labels("geosearch")):
+            results = await redis_client.geosearch(
+                name=key,
+                longitude=lon,
+                latitude=lat,
+                radius=radius_km,
+                unit='km',
+                withdist=True,
+                withcoord=True,
+                sort='ASC',
+                count=limit
+            )
+        # Geo index-ul e doar în Redis: fără rezultate = MISS (index gol sau nimic pe rază)
+        CACHE_REQUESTS.labels("geo", "redis", "hit" if results else "miss").inc()
+
+        # Membrii din ingest sunt _id-uri: detaliile stau în theaters:info (demo-ul are doar nume)
+        details = []
+        if results and key != region_key(GEO_DEMO_REGION):
+            with span("redis", REDIS_LATENCY.labels("geo_info")):
+                details = await redis_client.hmget(THEATER_INFO_KEY, [res[0] for res in results])
+
+        clean_results = []
+        for i, res in enumerate(results):
+            # res arată așa: ['Nume', distanta, (lon, lat)]
+            name = res[0]
+            dist = res[1]
+            coords = res[2]
+
+            item = {
+                "name": name,
+                "distance_km": round(dist, 2),
+                "latitude": coords[1],
+                "longitude": coords[0]
+            }
+            if i < len(details) and details[i]:
+                item.update(json.loads(details[i]), _id=name)
+            clean_results.append(item)
+
+        return clean_results
+    except Exception as e:
+        log.warning("geo_error", error=str(e))
+        CACHE_REQUESTS.labels("geo", "redis", "error").inc()
+        return []
+
+
+async def get_top_movies_optimized(limit=limit_top_movies):
+    redis_client = get_async_redis()
+    leaderboard_key = OPTIMIZED_LEADERBOARD_KEY
+
+    # 1. Verificăm dacă avem date în Redis
+    with span("redis", REDIS_LATENCY.labels("zrevrange")):
+        top_ids = await redis_client.zrevrange(leaderboard_key, 0, limit - 1)
+        # ZREM-urile din upsert micșorează ZSET-ul: o pagină incompletă e HIT doar dacă
+        # știm că leaderboard-ul are toate filmele cu rating
+        complete = top_ids and (len(top_ids) == limit or await redis_client.exists(OPTIMIZED_COMPLETE_KEY))
+    CACHE_REQUESTS.labels("leaderboard", "redis", "hit" if complete else "miss").inc()
+
+    source_msg = "Redis (ZSET + Hash Pipeline)"
+
+    # 2. Dacă e gol sau incomplet, facem Seed ACUM
+    if not complete:
+        # Fără fațete aici: rebuild-ul lor (scan complet) nu are ce căuta pe un MISS de top global
+        success = await seed_optimized_cache(limit + 10, facets=False)
+        if success:
+            top_ids = await redis_client.zrevrange(leaderboard_key, 0, limit - 1)
+            source_msg = "MongoDB -> Redis (Just Seeded)"
+        else:
+            return [], "MongoDB Empty"
+
+    # 3. Luăm detaliile: întâi din L1, restul printr-un singur Pipeline (Fast Fetch)
+    previews = await _get_movie_previews(top_ids)
+
+    # 4. Construim răspunsul
+    final_list = []
+    for mid in top_ids:
+        data = previews[mid]
+        if data:
+            clean_obj = dict(data)
+            clean_obj['_id'] = mid
+            final_list.append(clean_obj)
+
+    return final_list, source_msg
+
+
+PREVIEW_PROJECTION = {"title": 1, "year": 1, "imdb.rating": 1, "poster": 1}
+
+
+async def _get_movie_previews(movie_ids: list, backfill: bool = False):
+    """
+    movie:hash:{id} pentru o listă de filme: L1, apoi un singur pipeline HGETALL.
+    backfill=True: preview-urile lipsă vin dintr-un singur $in în Mongo (proiecție) și se scriu
+    înapoi (HSET + EXPIRE); altfel rămân None (leaderboard-ul le reîncarcă la următorul seed).
+    """
+    previews = {mid: l1.get(f"movie:hash:{mid}") for mid in movie_ids}
+    missing = [mid for mid, data in previews.items() if data is None]
+    if len(missing) < len(previews):
+        CACHE_REQUESTS.labels("movie:hash", "l1", "hit").inc(len(previews) - len(missing))
+    if not missing:
+        return previews
+
+    epoch = l1.epoch
+    pipe = get_async_redis().pipeline()
+    for mid in missing:
+        pipe.hgetall(f"movie:hash:{mid}")
+    with span("redis", REDIS_LATENCY.labels("pipeline")):
+        hash_results = await pipe.execute()
+
+    absent = []
+    for mid, data in zip(missing, hash_results):
+        if data:
+            previews[mid] = data
+            l1.set(f"movie:hash:{mid}", data, size=deep_sizeof(data), epoch=epoch)
+        else:
+            absent.append(mid)
+    if len(absent) < len(missing):
+        CACHE_REQUESTS.labels("movie:hash", "redis", "hit").inc(len(missing) - len(absent))
+    if absent:
+        CACHE_REQUESTS.labels("movie:hash", "redis", "miss").inc(len(absent))
+
+    oids = [ObjectId(mid) for mid in absent if is_movie_id(mid)]
+    if not backfill or not oids:
+        return previews
+
+    async with mongo_call("find_previews"):
+        movies = await get_async_db().movies.find({"_id": {"$in": oids}}, PREVIEW_PROJECTION).to_list(length=None)
+
+    pipe = get_async_redis().pipeline(transaction=False)
+    for movie in movies:
+        mid = str(movie["_id"])
+        data = movie_preview(movie)
+        previews[mid] = data
+        pipe.hset(f"movie:hash:{mid}", mapping=data)
+        pipe.expire(f"movie:hash:{mid}", CACHE_TTL)
+    try:
+        if movies:
+            with span("redis", REDIS_LATENCY.labels("pipeline")):
+                await pipe.execute()
+    except Exception as e:
+        log.warning("redis_error", error=str(e))
+    return previews
+
+
+async def get_trending_movies(limit=limit_top_movies, window="combined"):
+    """
+    Filmele cu cele mai multe vizualizări recente (scor cu decay, vezi app/trending.py):
+    ZREVRANGE pe clasamentul precalculat + preview-urile prin același pipeline ca top-ul optimizat.
+    """
+    key = TRENDING_WINDOW_KEYS[window]
+    try:
+        with span("redis", REDIS_LATENCY.labels("zrevrange")):
+            ranked = await get_async_redis().zrevrange(key, 0, limit - 1, withscores=True)
+    except Exception as e:
+        log.warning("redis_error", error=str(e))
+        CACHE_REQUESTS.labels("trending", "redis", "error").inc()
+        return [], "Redis unavailable"
+    CACHE_REQUESTS.labels("trending", "redis", "hit" if ranked else "miss").inc()
+
+    previews = await _get_movie_previews([mid for mid, _ in ranked], backfill=True)
+    final_list = []
+    for mid, score in ranked:
+        data = previews[mid]
+        if data:
+            final_list.append(dict(data, _id=mid, trending_score=round(score, 3)))
+    return final_list, f"Redis ZSET ({key})"
+
+
+async def seed_optimized_cache(limit=limit_top_movies, facets=True):
+    log.info("leaderboard_seed", key=OPTIMIZED_LEADERBOARD_KEY, limit=limit)
+    redis_client = get_async_redis()
+    db = get_async_db()
+
+    pipeline = [
+        {"$match": {"imdb.rating": {"$ne": ""}}},
+        {"$sort": {"imdb.rating": -1}},
+        {"$limit": limit}
+    ]
+    async with mongo_call("top_movies_aggregate"):
+        cursor = await db.movies.aggregate(pipeline)
+        movies = await cursor.to_list(length=None)
+
+    pipe = redis_client.pipeline()
+    leaderboard_key = OPTIMIZED_LEADERBOARD_KEY
+
+    for m in movies:
+        mid = str(m['_id'])
+        # 1. Creăm Hash-ul (Doar date esențiale)
+        hash_key = f"movie:hash:{mid}"
+        mapping = movie_preview(m)
+        pipe.hset(hash_key, mapping=mapping)
+        pipe.expire(hash_key, CACHE_TTL)
+
+        # 2. Adăugăm în Sorted Set (ID + Scor)
+        try:
+            score = float(mapping['rating'])
+            pipe.zadd(leaderboard_key, {mid: score})
+        except (TypeError, ValueError):
+            pass
+
+    pipe.expire(leaderboard_key, CACHE_TTL)
+    # Mongo a întors mai puține decât am cerut: ZSET-ul are tot, paginile scurte sunt HIT
+    if len(movies) < limit:
+        pipe.setex(OPTIMIZED_COMPLETE_KEY, CACHE_TTL, 1)
+    else:
+        pipe.delete(OPTIMIZED_COMPLETE_KEY)
+    await pipe.execute()
+    if facets:
+        await facet_builds.do(FACETS_READY_KEY, seed_facet_leaderboards)
+    return True
+
+
+FACET_QUERY_TTL = int(os.getenv("FACET_QUERY_TTL", 60))      # secunde (rezultatul ZINTERSTORE)
+FACET_SEED_BATCH = int(os.getenv("FACET_SEED_BATCH", 1000))  # filme per pipeline la rebuild
+FACET_PROJECTION = {"title": 1, "year": 1, "genres": 1, "imdb.rating": 1, "poster": 1}
+
+facet_builds = SingleFlight()
+
+
+async def seed_facet_leaderboards():
+    """
+    Rebuild complet al fațetelor: un singur scan cu proiecție (batch_size), ZADD-uri grupate
+    per ZSET în pipeline-uri de FACET_SEED_BATCH filme, scrise în chei :next și apoi mutate
+    peste cele vechi cu RENAME într-o tranzacție (citirile nu văd niciodată un set pe jumătate).
+    """
+    redis_client = get_async_redis()
+    started = time.perf_counter()
+    touched = set()
+    count = 0
+
+    async def write_chunk(movies):
+        pipe = redis_client.pipeline(transaction=False)
+        zsets = {}
+        for m in movies:
+            mid = str(m["_id"])
+            score = movie_score(m)
+            keys = movie_facet_keys(m)
+            for key in keys:
+                zsets.setdefault(key, {})[mid] = score
+            pipe.hset(f"movie:hash:{mid}", mapping=movie_preview(m))
+            pipe.expire(f"movie:hash:{mid}", FACET_TTL)
+            pipe.delete(movie_facets_key(mid))
+            if keys:
+                pipe.sadd(movie_facets_key(mid), *keys)
+                pipe.expire(movie_facets_key(mid), FACET_TTL)
+        for key, members in zsets.items():
+            if key not in touched:
+                pipe.delete(f"{key}:next")
+                touched.add(key)
+            pipe.zadd(f"{key}:next", members)
+        with span("redis", REDIS_LATENCY.labels("facet_seed")):
+            await pipe.execute()
+
+    chunk = []
+    async with mongo_call("facet_scan"):
+        cursor = get_async_db().movies.find({"imdb.rating": {"$type": "number"}}, FACET_PROJECTION)
+        async for movie in cursor.batch_size(FACET_SEED_BATCH):
+            chunk.append(movie)
+            if len(chunk) >= FACET_SEED_BATCH:
+                await write_chunk(chunk)
+                count += len(chunk)
+                chunk = []
+    if chunk:
+        await write_chunk(chunk)
+        count += len(chunk)
+
+    stale = set(await redis_client.smembers(FACET_KEYS_KEY)) - touched
+    pipe = redis_client.pipeline(transaction=True)
+    for key in touched:
+        pipe.rename(f"{key}:next", key)
+        pipe.expire(key, FACET_TTL)
+    if stale:
+        pipe.delete(*stale)
+    pipe.delete(FACET_KEYS_KEY)
+    if touched:
+        pipe.sadd(FACET_KEYS_KEY, *touched)
+        pipe.expire(FACET_KEYS_KEY, FACET_TTL)
+    pipe.setex(FACETS_READY_KEY, FACET_TTL, count)
+    await pipe.execute()
+
+    log.info("facets_seeded", movies=count, zsets=len(touched), seconds=round(time.perf_counter() - started, 2))
+    return count
+
+
+async def get_top_movies_faceted(limit=limit_top_movies, genres=(), year=None):
+    """
+    Top după rating filtrat pe gen(uri) și an / deceniu / interval, doar din Redis:
+    ZINTERSTORE pe ZSET-urile fațetelor (cache-uit FACET_QUERY_TTL) + pipeline-ul de preview-uri.
+    ValueError pentru un filtru de an invalid.
+    """
+    redis_client = get_async_redis()
+    inputs = [genre_key(genre) for genre in genres]
+    union = None
+    if year:
+        year_keys = year_filter_keys(year)
+        if len(year_keys) == 1:
+            inputs += year_keys
+        else:
+            union = (f"leaderboard:facet:u:{year.strip()}", year_keys)
+            inputs.append(union[0])
+    if not inputs:
+        raise ValueError("Niciun filtru")
+
+    source_msg = "Redis (faceted ZSET + Hash Pipeline)"
+    if not await redis_client.exists(FACETS_READY_KEY):
+        await facet_builds.do(FACETS_READY_KEY, seed_facet_leaderboards)
+        source_msg = "MongoDB -> Redis (facets seeded)"
+
+    if len(inputs) == 1 and union is None:
+        # Un singur filtru: ZSET-ul fațetei e deja răspunsul
+        with span("redis", REDIS_LATENCY.labels("zrevrange")):
+            top_ids = await redis_client.zrevrange(inputs[0], 0, limit - 1)
+        CACHE_REQUESTS.labels("leaderboard", "redis", "hit").inc()
+    else:
+        result_key = "leaderboard:facet:q:" + "&".join(sorted(inputs))
+        with span("redis", REDIS_LATENCY.labels("zrevrange")):
+            pipe = redis_client.pipeline(transaction=False)
+            pipe.exists(result_key)
+            pipe.zrevrange(result_key, 0, limit - 1)
+            cached, top_ids = await pipe.execute()
+        CACHE_REQUESTS.labels("leaderboard", "redis", "hit" if cached else "miss").inc()
+        if not cached:
+            # Intersecția (și reuniunea anilor) o calculează Redis, o singură dată per FACET_QUERY_TTL
+            pipe = redis_client.pipeline(transaction=True)
+            if union:
+                pipe.zunionstore(union[0], union[1], aggregate="MAX")
+                pipe.expire(union[0], FACET_QUERY_TTL)
+            pipe.zinterstore(result_key, inputs, aggregate="MAX")
+            pipe.expire(result_key, FACET_QUERY_TTL)
+            pipe.zrevrange(result_key, 0, limit - 1)
+            with span("redis", REDIS_LATENCY.labels("zinterstore")):
+                top_ids = (await pipe.execute())[-1]
+
+    previews = await _get_movie_previews(top_ids, backfill=True)
+    final_list = []
+    for mid in top_ids:
+        data = previews[mid]
+        if data:
+            final_list.append(dict(data, _id=mid))
+    return final_list, source_msg
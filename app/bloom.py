@@ -0,0 +1,45 @@
+import math
+import hashlib
+
+# --- BLOOM FILTER (în proces) pentru movies._id ---
+# Un ID care nu există în Mongo dă mereu MISS în Redis și ajunge în Atlas.
+# Filtrul răspunde fără niciun round trip:
+#   "sigur nu există"  -> 404 direct
+#   "poate există"     -> calea normală (L1 -> Redis -> Mongo)
+# Fals pozitivele costă doar un MISS; fals negativele nu pot apărea pentru ID-urile adăugate.
+
+
+class BloomFilter:
+    """Bitset + k hash-uri derivate prin double hashing (Kirsch-Mitzenmacher)."""
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        capacity = max(1, capacity)
+        self.capacity = capacity
+        self.error_rate = error_rate
+        # m = -n ln p / (ln 2)^2, k = m/n ln 2
+        self.num_bits = max(64, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, key: str):
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, key: str):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def size_bytes(self):
+        return len(self.bits)
@@ -0,0 +1,88 @@
+import os
+import time
+
+# --- CIRCUIT BREAKER per backend (Redis, Mongo) ---
+# Fără breaker, cu Redis căzut fiecare request așteaptă un connect/timeout
+# (REDIS_CONNECT_TIMEOUT) înainte să cadă pe Mongo. Breaker-ul numără eșecurile
+# de REȚEA consecutive (conexiune refuzată, timeout; nu erori de tip WRONGTYPE):
+#   closed    -> apelurile trec; după BREAKER_FAILURE_THRESHOLD eșecuri -> open
+#   open      -> apelurile eșuează imediat (microsecunde), timp de BREAKER_RESET_TIMEOUT
+#   half_open -> trece UN singur apel de probă: succes -> closed, eșec -> open din nou
+# Un breaker per proces (fiecare worker uvicorn își învață singur starea).
+
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", 5))
+BREAKER_RESET_TIMEOUT = float(os.getenv("BREAKER_RESET_TIMEOUT", 5))  # secunde
+
+CLOSED, HALF_OPEN, OPEN = 0, 1, 2  # valorile gauge-ului circuit_breaker_state
+
+
+class BackendUnavailable(Exception):
+    """Backend-ul e considerat căzut (breaker deschis) sau supraîncărcat (load shedding)."""
+
+    def __init__(self, backend: str, reason: str, retry_after: float = BREAKER_RESET_TIMEOUT):
+        super().__init__(f"{backend} indisponibil: {reason}")
+        self.backend = backend
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+                 reset_timeout: float = BREAKER_RESET_TIMEOUT):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probe_at = 0.0
+        # Apelat la fiecare schimbare de stare (metrics.py setează gauge-ul circuit_breaker_state)
+        self.on_state_change = None
+
+    def _set_state(self, state):
+        if state == self.state:
+            return
+        self.state = state
+        if self.on_state_change is not None:
+            self.on_state_change(self)
+
+    @property
+    def closed(self):
+        return self.state == CLOSED
+
+    def allow(self):
+        """True = apelul poate încerca backend-ul."""
+        if self.state == CLOSED:
+            return True
+        now = time.monotonic()
+        if self.state == OPEN:
+            if now - self.opened_at < self.reset_timeout:
+                return False
+            self._set_state(HALF_OPEN)
+        # half_open: o singură probă; dacă proba se pierde (request anulat), alta după reset_timeout
+        if now - self.probe_at >= self.reset_timeout:
+            self.probe_at = now
+            return True
+        return False
+
+    def check(self):
+        """Ca allow(), dar ridică BackendUnavailable."""
+        if not self.allow():
+            raise BackendUnavailable(self.name, "circuit breaker deschis", self.retry_after())
+
+    def retry_after(self):
+        return max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+
+    def record_success(self):
+        self._set_state(CLOSED)
+        self.failures = 0
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            self._set_state(OPEN)
+            self.opened_at = time.monotonic()
+            self.probe_at = 0.0
+
+
+redis_breaker = CircuitBreaker("redis")
+mongo_breaker = CircuitBreaker("mongo")
@@ -0,0 +1,155 @@
+import os
+import time
+import asyncio
+from bson import json_util
+from pymongo.errors import OperationFailure
+from redis.exceptions import LockError
+from .database import get_async_db, get_async_redis, get_async_redis_raw
+from .leaderboards import queue_leaderboard_update
+from .log import get_logger
+from .metrics import CHANGE_STREAM_LAG, CHANGE_STREAM_EVENTS
+from .async_service import publish_invalidation
+from .service import (
+    CACHE_TTL,
+    NEGATIVE_CACHE_TTL,
+    NEGATIVE_CACHE_MARKER,
+    clean_mongo_obj,
+    encode_cache_entry,
+    movie_version,
+    queue_versioned_set
+)
+
+# --- CHANGE STREAM: invalidare din Mongo, nu doar din API ---
+# Alte sisteme scriu direct în db.movies (vezi /simulate/backdoor-update), iar Redis
+# ar servi date vechi până la CACHE_TTL. Worker-ul urmărește change stream-ul pe
+# sample_mflix.movies și, în batch-uri pipelined:
+#   - reîmprospătează (sau șterge) movie:{id}, actualizează leaderboard-urile + movie:hash:{id}
+#   - anunță L1-ul tuturor workerilor (Pub/Sub)
+#   - salvează resume token-ul în Redis, în același pipeline -> un restart reia de unde a rămas
+# Un singur proces face tail (lock în Redis), restul stau în standby.
+# Change stream-urile cer replica set (Atlas are; local: mongod --replSet rs0).
+
+CHANGE_STREAM_WORKER = os.getenv("CHANGE_STREAM_WORKER", "0") == "1"
+CHANGE_STREAM_MODE = os.getenv("CHANGE_STREAM_MODE", "refresh")  # refresh | invalidate
+CHANGE_STREAM_BATCH = int(os.getenv("CHANGE_STREAM_BATCH", 100))
+CHANGE_STREAM_MAX_WAIT_MS = int(os.getenv("CHANGE_STREAM_MAX_WAIT_MS", 500))
+
+RESUME_TOKEN_KEY = "change_stream:movies:resume_token"
+LEADER_KEY = "change_stream:movies:leader"
+LEADER_TTL = 15  # secunde
+
+# Codul Mongo pentru "resume token prea vechi" (a ieșit din oplog)
+CHANGE_STREAM_HISTORY_LOST = 286
+
+log = get_logger("change_stream")
+
+
+async def apply_changes(events: list, resume_token):
+    """Aplică un batch de evenimente într-un singur pipeline Redis (+ resume token-ul)."""
+    pipe = get_async_redis_raw().pipeline(transaction=False)
+    invalidated = []
+
+    for change in events:
+        operation = change["operationType"]
+        if operation not in ("insert", "update", "replace", "delete"):
+            continue
+        movie_id = str(change["documentKey"]["_id"])
+        cache_key = f"movie:{movie_id}"
+        # updateLookup întoarce None dacă documentul a fost șters între timp
+        movie = clean_mongo_obj(change.get("fullDocument"))
+
+        if movie is None:
+            pipe.setex(cache_key, NEGATIVE_CACHE_TTL, NEGATIVE_CACHE_MARKER)
+        elif CHANGE_STREAM_MODE == "refresh":
+            queue_versioned_set(pipe, cache_key, encode_cache_entry(movie), movie_version(movie),
+                                replace_negative=operation == "insert")
+        else:
+            pipe.delete(cache_key)
+        queue_leaderboard_update(pipe, movie_id, movie, CACHE_TTL)
+
+        invalidated += [cache_key, f"movie:hash:{movie_id}"]
+        CHANGE_STREAM_EVENTS.labels(operation).inc()
+
+    if resume_token is not None:
+        pipe.set(RESUME_TOKEN_KEY, json_util.dumps(resume_token))
+    await pipe.execute()
+
+    if invalidated:
+        await publish_invalidation(*invalidated)
+    if events and "clusterTime" in events[-1]:
+        CHANGE_STREAM_LAG.set(max(0.0, time.time() - events[-1]["clusterTime"].time))
+
+
+async def _tail_movies(lock):
+    """Urmărește change stream-ul cât timp deținem lock-ul de leader."""
+    redis_client = get_async_redis()
+    options = {"full_document": "updateLookup", "max_await_time_ms": CHANGE_STREAM_MAX_WAIT_MS}
+
+    token = await redis_client.get(RESUME_TOKEN_KEY)
+    if token:
+        options["resume_after"] = json_util.loads(token)
+        log.info("change_stream_resume")
+
+    loop = asyncio.get_running_loop()
+    last_renew = loop.time()
+
+    async with await get_async_db().movies.watch(**options) as stream:
+        saved_token = token and options["resume_after"]
+        while stream.alive:
+            events = []
+            while len(events) < CHANGE_STREAM_BATCH:
+                change = await stream.try_next()
+                if change is None:
+                    break
+                events.append(change)
+
+            # Token-ul avansează și fără evenimente (postBatchResumeToken)
+            if events or stream.resume_token != saved_token:
+                await apply_changes(events, stream.resume_token)
+                saved_token = stream.resume_token
+            if not events:
+                CHANGE_STREAM_LAG.set(0)
+
+            if loop.time() - last_renew > LEADER_TTL / 3:
+                await lock.reacquire()
+                last_renew = loop.time()
+
+
+async def run_change_stream_worker():
+    """
+    Task de fundal (lifespan, CHANGE_STREAM_WORKER=1) sau proces separat
+    (python -m app.change_stream). Doar procesul care ia lock-ul face tail.
+    """
+    while True:
+        lock = get_async_redis().lock(LEADER_KEY, timeout=LEADER_TTL)
+        try:
+            if not await lock.acquire(blocking=False):
+                await asyncio.sleep(LEADER_TTL / 3)
+                continue
+            log.info("change_stream_leader", collection="sample_mflix.movies")
+            try:
+                await _tail_movies(lock)
+            finally:
+                try:
+                    await lock.release()
+                except LockError:
+                    pass
+        except asyncio.CancelledError:
+            raise
+        except OperationFailure as e:
+            if e.code == CHANGE_STREAM_HISTORY_LOST:
+                # Token-ul nu mai e în oplog: pornim de la "acum" (cache-ul se reface prin TTL)
+                log.warning("change_stream_token_expired")
+                await get_async_redis().delete(RESUME_TOKEN_KEY)
+            else:
+                log.warning("change_stream_error", error=str(e))
+                await asyncio.sleep(1)
+        except Exception as e:
+            log.warning("change_stream_error", error=str(e))
+            await asyncio.sleep(1)
+
+
+if __name__ == "__main__":
+    # Worker separat de API:
+    #   python -m app.change_stream
+    asyncio.run(run_change_stream_worker())
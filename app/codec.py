@@ -0,0 +1,183 @@
+import os
+import json
+
+# --- CODEC-uri pentru documentele din cache ---
+# Redis rulează cu --maxmemory 200mb + allkeys-lru: cu cât un film ocupă mai puțin,
+# cu atât încap mai multe filme și crește hit ratio-ul.
+#
+# Fiecare valoare are un TAG de format în header, deci cititorul știe mereu cum s-o
+# decodeze. Putem schimba CACHE_CODEC (rollout / rollback) fără să golim Redis:
+# valorile vechi se citesc în formatul lor până expiră.
+#
+#   j      -> json (stdlib), formatul inițial
+#   o      -> orjson (JSON mai rapid, aceeași ieșire)
+#   m      -> msgpack (binar, mai compact)
+#   z<id>  -> zstd peste JSON, cu dicționar antrenat pe filme sample_mflix (<id> = dict_id, 0 = fără)
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+CACHE_CODEC = os.getenv("CACHE_CODEC", "json")
+CACHE_ZSTD_DICT = os.getenv("CACHE_ZSTD_DICT", "")
+ZSTD_LEVEL = int(os.getenv("ZSTD_LEVEL", 3))
+
+
+class CodecError(Exception):
+    """Format necunoscut sau indisponibil (ex: lipsește pachetul sau dicționarul)."""
+
+
+class JsonCodec:
+    tag = "j"
+    name = "json"
+
+    def encode(self, obj, default=None):
+        return json.dumps(obj, default=default).encode()
+
+    def decode(self, payload: bytes):
+        return json.loads(payload)
+
+    def to_json(self, payload: bytes):
+        # Payload-ul e deja JSON -> zero-copy
+        return payload
+
+
+class OrjsonCodec(JsonCodec):
+    tag = "o"
+    name = "orjson"
+
+    def encode(self, obj, default=None):
+        return orjson.dumps(obj, default=default)
+
+    def decode(self, payload: bytes):
+        return orjson.loads(payload)
+
+
+class MsgpackCodec:
+    tag = "m"
+    name = "msgpack"
+
+    def encode(self, obj, default=None):
+        return msgpack.packb(obj, default=default, use_bin_type=True)
+
+    def decode(self, payload: bytes):
+        return msgpack.unpackb(payload, raw=False)
+
+    def to_json(self, payload: bytes):
+        # Singurul format care nu poate face passthrough: decodăm și re-encodăm
+        return _json_codec().encode(self.decode(payload))
+
+
+class ZstdCodec:
+    """zstd peste JSON: la decompresie obținem direct bytes JSON (passthrough-ul rămâne ieftin)."""
+    name = "zstd"
+
+    def __init__(self, dict_data: bytes = None):
+        self.dict = zstandard.ZstdCompressionDict(dict_data) if dict_data else None
+        self.dict_id = self.dict.dict_id() if self.dict else 0
+        self.tag = f"z{self.dict_id}"
+        if self.dict:
+            self.compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL, dict_data=self.dict)
+            self.decompressor = zstandard.ZstdDecompressor(dict_data=self.dict)
+        else:
+            self.compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL)
+            self.decompressor = zstandard.ZstdDecompressor()
+
+    def encode(self, obj, default=None):
+        return self.compressor.compress(_json_codec().encode(obj, default=default))
+
+    def decode(self, payload: bytes):
+        return _json_codec().decode(self.to_json(payload))
+
+    def to_json(self, payload: bytes):
+        return self.decompressor.decompress(payload)
+
+
+_codecs = {"j": JsonCodec()}
+
+
+def _json_codec():
+    """JSON-ul cel mai rapid disponibil (orjson dacă e instalat)."""
+    return _codecs.get("o") or _codecs["j"]
+
+
+def register_codec(codec):
+    _codecs[codec.tag] = codec
+    return codec
+
+
+def load_zstd_dictionary(path: str):
+    with open(path, "rb") as f:
+        return register_codec(ZstdCodec(f.read()))
+
+
+if orjson is not None:
+    register_codec(OrjsonCodec())
+if msgpack is not None:
+    register_codec(MsgpackCodec())
+if zstandard is not None:
+    register_codec(ZstdCodec())
+    if CACHE_ZSTD_DICT and os.path.exists(CACHE_ZSTD_DICT):
+        load_zstd_dictionary(CACHE_ZSTD_DICT)
+
+
+def get_codec(tag: str):
+    """Codec-ul pentru un tag citit din Redis."""
+    codec = _codecs.get(tag)
+    if codec is None:
+        raise CodecError(f"Format de cache necunoscut sau indisponibil: {tag!r}")
+    return codec
+
+
+def writer_codec(name: str = None):
+    """Codec-ul cu care SCRIEM valori noi (CACHE_CODEC)."""
+    name = name or CACHE_CODEC
+    if name == "zstd":
+        # Preferăm varianta cu dicționar, dacă a fost încărcat
+        with_dict = [c for c in _codecs.values() if c.name == "zstd" and c.dict_id]
+        if with_dict:
+            return with_dict[-1]
+    for codec in _codecs.values():
+        if codec.name == name:
+            return codec
+    raise CodecError(f"CACHE_CODEC={name!r} nu e disponibil (pachet lipsă?)")
+
+
+def train_zstd_dictionary(samples, dict_size: int = 112640):
+    """Antrenează un dicționar zstd pe documente (dict-uri) deja serializabile JSON."""
+    if zstandard is None:
+        raise CodecError("zstandard nu e instalat")
+    encoded = [_json_codec().encode(s, default=str) for s in samples]
+    return zstandard.train_dictionary(dict_size, encoded).as_bytes()
+
+
+if __name__ == "__main__":
+    # Antrenare dicționar pe filme reale din sample_mflix:
+    #   python -m app.codec --samples 5000 --out zstd_movies.dict
+    import argparse
+    from .database import db
+
+    parser = argparse.ArgumentParser(description="Antrenează dicționarul zstd pe sample_mflix.movies")
+    parser.add_argument("--samples", type=int, default=5000)
+    parser.add_argument("--size", type=int, default=112640, help="mărimea dicționarului (bytes)")
+    parser.add_argument("--out", default=CACHE_ZSTD_DICT or "zstd_movies.dict")
+    args = parser.parse_args()
+
+    movies = list(db.movies.aggregate([{"$sample": {"size": args.samples}}]))
+    for m in movies:
+        m["_id"] = str(m["_id"])
+    data = train_zstd_dictionary(movies, args.size)
+    with open(args.out, "wb") as f:
+        f.write(data)
+    print(f"✅ Dicționar zstd ({len(data)} bytes, dict_id={ZstdCodec(data).dict_id}) salvat în {args.out}")
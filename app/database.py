@@ -1,7 +1,13 @@
 import os
+import asyncio
 from dotenv import load_dotenv
-from pymongo import MongoClient
+from pymongo import MongoClient, AsyncMongoClient
 import redis
+import redis.asyncio as aioredis
+from redis.asyncio.connection import Connection as AsyncConnection
+from redis.exceptions import ConnectionError as RedisConnectionError, TimeoutError as RedisTimeoutError
+from .breaker import redis_breaker
+from .log import get_logger
 
 load_dotenv()
 
@@ -9,8 +15,41 @@ MONGO_URL = os.getenv("MONGO_URL")
 REDIS_HOST = os.getenv("REDIS_HOST", "redis") 
 REDIS_PORT = int(os.getenv("REDIS_PORT", 6379))
 
+# --- POOL-URI (per proces / per worker) ---
+# Total conexiuni = workeri x pool. Atlas M0 acceptă ~500 conexiuni, Redis implicit 10000.
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", 50))
+# >0: pool blocant -> la pool plin se așteaptă o conexiune liberă (secunde) în loc de "Too many connections"
+REDIS_POOL_TIMEOUT = float(os.getenv("REDIS_POOL_TIMEOUT", 0))
+REDIS_PREWARM = int(os.getenv("REDIS_PREWARM", 10))                          # conexiuni deschise la pornire
+REDIS_SOCKET_KEEPALIVE = os.getenv("REDIS_SOCKET_KEEPALIVE", "1") == "1"     # TCP keepalive
+REDIS_HEALTH_CHECK_INTERVAL = int(os.getenv("REDIS_HEALTH_CHECK_INTERVAL", 30))  # PING pe conexiuni inactive (secunde)
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", 50))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", 5))               # ținute deschise de driver
+MONGO_MAX_IDLE_TIME_MS = int(os.getenv("MONGO_MAX_IDLE_TIME_MS", 300_000))
+MONGO_MAX_CONNECTING = int(os.getenv("MONGO_MAX_CONNECTING", 2))             # handshake-uri TLS simultane
 
-mongo_client = MongoClient(MONGO_URL)
+# TIMEOUT-uri: cu Redis / Atlas de negăsit, un request trebuie să eșueze repede (și să
+# deschidă breaker-ul), nu să aștepte timeout-urile implicite ale sistemului / driverului.
+REDIS_SOCKET_TIMEOUT = float(os.getenv("REDIS_SOCKET_TIMEOUT", 0.5))      # secunde, per comandă
+REDIS_CONNECT_TIMEOUT = float(os.getenv("REDIS_CONNECT_TIMEOUT", 0.5))    # secunde
+MONGO_CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", 2000))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", 2000))  # implicit driver: 30 s
+MONGO_SOCKET_TIMEOUT_MS = int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", 0)) or None  # 0 = fără (change stream-ul așteaptă)
+
+REDIS_TIMEOUTS = {"socket_timeout": REDIS_SOCKET_TIMEOUT, "socket_connect_timeout": REDIS_CONNECT_TIMEOUT}
+MONGO_TIMEOUTS = {
+    "connectTimeoutMS": MONGO_CONNECT_TIMEOUT_MS,
+    "serverSelectionTimeoutMS": MONGO_SERVER_SELECTION_TIMEOUT_MS,
+    "socketTimeoutMS": MONGO_SOCKET_TIMEOUT_MS,
+}
+REDIS_POOL_OPTIONS = {"socket_keepalive": REDIS_SOCKET_KEEPALIVE, "health_check_interval": REDIS_HEALTH_CHECK_INTERVAL}
+
+log = get_logger("database")
+
+
+# connect=False: niciun thread / socket până la primul query, deci clientul sincron
+# creat la import rămâne sigur și dacă procesul face fork (gunicorn --preload)
+mongo_client = MongoClient(MONGO_URL, connect=False, **MONGO_TIMEOUTS)
 
 db = mongo_client["sample_mflix"] 
 
@@ -18,9 +57,199 @@ db = mongo_client["sample_mflix"]
 redis_client = redis.Redis(
     host=REDIS_HOST,
     port=REDIS_PORT,
-    decode_responses=True 
+    decode_responses=True,
+    **REDIS_TIMEOUTS
 )
 
+# Client FĂRĂ decode: valorile movie:{id} pot fi binare (msgpack / zstd)
+redis_raw_client = redis.Redis(
+    host=REDIS_HOST,
+    port=REDIS_PORT,
+    decode_responses=False,
+    **REDIS_TIMEOUTS
+)
+
+# --- Clienți ASYNC (folosiți de API) ---
+# Se creează la prima utilizare, deci în event loop-ul aplicației (nu la import).
+# Scripturile sincrone folosesc în continuare redis_client și db de mai sus.
+
+_async_redis_client = None
+_async_redis_raw_client = None
+_async_redis_blocking_client = None
+_async_mongo_client = None
+
+
+class BreakerPoolMixin:
+    """
+    Pool redis.asyncio prin redis_breaker: cu breaker-ul deschis orice comandă, pipeline
+    sau subscribe eșuează imediat cu ConnectionError, fără connect și fără timeout.
+    Codul existent cu try/except + fallback pe Mongo merge neschimbat, doar fără așteptare.
+    """
+
+    async def get_connection(self, *args, **kwargs):
+        if not redis_breaker.allow():
+            raise RedisConnectionError("Circuit breaker Redis deschis")
+        return await super().get_connection(*args, **kwargs)
+
+
+class BreakerConnectionPool(BreakerPoolMixin, aioredis.ConnectionPool):
+    pass
+
+
+class BreakerBlockingConnectionPool(BreakerPoolMixin, aioredis.BlockingConnectionPool):
+    pass
+
+
+class BreakerConnection(AsyncConnection):
+    """Raportează breaker-ului eșecurile de rețea și răspunsurile primite."""
+
+    async def connect(self):
+        try:
+            await super().connect()
+        except (RedisConnectionError, RedisTimeoutError, OSError):
+            redis_breaker.record_failure()
+            raise
+
+    async def send_packed_command(self, command, check_health=True):
+        try:
+            await super().send_packed_command(command, check_health)
+        except (RedisConnectionError, RedisTimeoutError, OSError):
+            redis_breaker.record_failure()
+            raise
+
+    async def read_response(self, *args, **kwargs):
+        try:
+            response = await super().read_response(*args, **kwargs)
+        except (RedisConnectionError, RedisTimeoutError, OSError):
+            redis_breaker.record_failure()
+            raise
+        # Orice răspuns (și ResponseError) = serverul e în viață
+        redis_breaker.record_success()
+        return response
+
+
+def _async_redis_pool(decode_responses: bool, **timeouts):
+    options = dict(
+        host=REDIS_HOST,
+        port=REDIS_PORT,
+        decode_responses=decode_responses,
+        max_connections=REDIS_MAX_CONNECTIONS,
+        connection_class=BreakerConnection,
+        **REDIS_POOL_OPTIONS,
+        **timeouts
+    )
+    if REDIS_POOL_TIMEOUT > 0:
+        return BreakerBlockingConnectionPool(timeout=REDIS_POOL_TIMEOUT, **options)
+    return BreakerConnectionPool(**options)
+
+
+def get_async_redis():
+    """Client redis.asyncio cu pool de conexiuni partajat."""
+    global _async_redis_client
+    if _async_redis_client is None:
+        _async_redis_client = aioredis.Redis(connection_pool=_async_redis_pool(True, **REDIS_TIMEOUTS))
+    return _async_redis_client
+
+
+def get_async_redis_raw():
+    """
+    Client redis.asyncio FĂRĂ decode_responses: întoarce bytes exact cum sunt stocați.
+    Folosit pe fast path-ul zero-copy (bytes-ii din cache merg direct în răspunsul HTTP).
+    """
+    global _async_redis_raw_client
+    if _async_redis_raw_client is None:
+        _async_redis_raw_client = aioredis.Redis(connection_pool=_async_redis_pool(False, **REDIS_TIMEOUTS))
+    return _async_redis_raw_client
+
+
+def get_async_redis_blocking():
+    """
+    Client raw pentru comenzi care blochează intenționat (Pub/Sub listen, XREADGROUP BLOCK):
+    doar timeout de connect, altfel REDIS_SOCKET_TIMEOUT le-ar întrerupe.
+    """
+    global _async_redis_blocking_client
+    if _async_redis_blocking_client is None:
+        pool = _async_redis_pool(False, socket_connect_timeout=REDIS_CONNECT_TIMEOUT)
+        _async_redis_blocking_client = aioredis.Redis(connection_pool=pool)
+    return _async_redis_blocking_client
+
+
+def get_async_db():
+    """Baza sample_mflix prin driverul async PyMongo (AsyncMongoClient)."""
+    global _async_mongo_client
+    if _async_mongo_client is None:
+        _async_mongo_client = AsyncMongoClient(
+            MONGO_URL,
+            maxPoolSize=MONGO_MAX_POOL_SIZE,
+            minPoolSize=MONGO_MIN_POOL_SIZE,
+            maxIdleTimeMS=MONGO_MAX_IDLE_TIME_MS,
+            maxConnecting=MONGO_MAX_CONNECTING,
+            **MONGO_TIMEOUTS
+        )
+    return _async_mongo_client["sample_mflix"]
+
+
+async def _prewarm_redis(client, count: int):
+    """Deschide count conexiuni în pool (connect + handshake) și le lasă libere."""
+    pool = client.connection_pool
+    connections = await asyncio.gather(*(pool.get_connection() for _ in range(count)), return_exceptions=True)
+    opened = [conn for conn in connections if not isinstance(conn, BaseException)]
+    for conn in opened:
+        await pool.release(conn)
+    return len(opened)
+
+
+async def warm_up_clients():
+    """
+    Apelat în lifespan, înainte de primul request: creează clienții async ai
+    acestui worker și deschide conexiunile, ca primele request-uri să nu plătească
+    connect + TLS. Un backend căzut nu oprește pornirea (breaker-ul preia de aici).
+    """
+    count = min(REDIS_PREWARM, REDIS_MAX_CONNECTIONS)
+    results = await asyncio.gather(
+        _prewarm_redis(get_async_redis(), count),
+        _prewarm_redis(get_async_redis_raw(), count),
+        # ping = server selection + prima conexiune; minPoolSize umple restul în fundal
+        get_async_db().command("ping"),
+        return_exceptions=True
+    )
+    for backend, result in zip(("redis", "redis_raw", "mongo"), results):
+        if isinstance(result, BaseException):
+            log.warning("prewarm_failed", backend=backend, error=str(result))
+        elif backend == "mongo":
+            log.info("prewarm_done", backend=backend, min_pool_size=MONGO_MIN_POOL_SIZE, pid=os.getpid())
+        else:
+            log.info("prewarm_done", backend=backend, connections=result, pid=os.getpid())
+
+
+def _forget_async_clients():
+    """
+    În copilul unui fork: clienții async moșteniți (socket-uri, event loop) aparțin
+    părintelui. Îi uităm fără să-i închidem; workerul își creează alții la primul apel.
+    """
+    global _async_redis_client, _async_redis_raw_client, _async_redis_blocking_client, _async_mongo_client
+    _async_redis_client = _async_redis_raw_client = _async_redis_blocking_client = _async_mongo_client = None
+
+
+os.register_at_fork(after_in_child=_forget_async_clients)
+
+
+async def close_async_clients():
+    """Închide pool-urile async (apelat la oprirea aplicației)."""
+    global _async_redis_client, _async_redis_raw_client, _async_redis_blocking_client, _async_mongo_client
+    if _async_redis_client is not None:
+        await _async_redis_client.aclose()
+        _async_redis_client = None
+    if _async_redis_raw_client is not None:
+        await _async_redis_raw_client.aclose()
+        _async_redis_raw_client = None
+    if _async_redis_blocking_client is not None:
+        await _async_redis_blocking_client.aclose()
+        _async_redis_blocking_client = None
+    if _async_mongo_client is not None:
+        await _async_mongo_client.close()
+        _async_mongo_client = None
+
 if not MONGO_URL:
     print("⚠️ ATENȚIE: MONGO_URL nu a fost găsit în .env!")
 
@@ -0,0 +1,76 @@
+import asyncio
+import time
+import contextvars
+
+from .metrics import DATALOADER_BATCH_SIZE, DATALOADER_QUEUE_DELAY
+
+# --- DATALOADER (micro-batching) ---
+# Sub load, sute de request-uri /movie/{id} concurente fac fiecare propriul GET.
+# Loader-ul adună cheile cerute în aceeași fereastră (un tick de event loop sau
+# câteva microsecunde) și le trimite printr-un SINGUR apel batch_fn(chei),
+# apoi împarte rezultatele către request-urile care așteaptă.
+
+
+class DataLoader:
+    """Micro-batching per proces: load(cheie) -> un singur batch_fn pentru toată fereastra."""
+
+    def __init__(self, batch_fn, name: str, window: float = 0.0, max_batch: int = 500):
+        # batch_fn(chei) e async și întoarce {cheie: rezultat}
+        self.batch_fn = batch_fn
+        self.name = name
+        self.window = window          # secunde; 0 = un singur tick de event loop
+        self.max_batch = max_batch
+        self._queue = {}              # cheie -> (future, enqueued_at)
+        self._handle = None
+        self._batches = set()
+
+    async def load(self, key):
+        loop = asyncio.get_running_loop()
+        item = self._queue.get(key)
+        if item is None:
+            item = (loop.create_future(), time.perf_counter())
+            self._queue[key] = item
+            if len(self._queue) >= self.max_batch:
+                self._dispatch()
+            elif self._handle is None:
+                if self.window > 0:
+                    self._handle = loop.call_later(self.window, self._dispatch)
+                else:
+                    self._handle = loop.call_soon(self._dispatch)
+        # shield: un client deconectat nu anulează rezultatul pentru ceilalți
+        return await asyncio.shield(item[0])
+
+    def _dispatch(self):
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        queue, self._queue = self._queue, {}
+        if not queue:
+            return
+
+        now = time.perf_counter()
+        DATALOADER_BATCH_SIZE.labels(self.name).observe(len(queue))
+        delay = DATALOADER_QUEUE_DELAY.labels(self.name)
+        for _, enqueued_at in queue.values():
+            delay.observe(now - enqueued_at)
+
+        # batch_fn rulează într-un Task separat (referință păstrată până termină), cu context
+        # gol: span-urile batch-ului nu se atribuie primului request care l-a declanșat
+        task = asyncio.get_running_loop().create_task(self._run(queue), context=contextvars.Context())
+        self._batches.add(task)
+        task.add_done_callback(self._batches.discard)
+
+    async def _run(self, queue):
+        try:
+            results = await self.batch_fn(list(queue))
+        except Exception as e:
+            for future, _ in queue.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for key, (future, _) in queue.items():
+            if not future.done():
+                future.set_result(results.get(key))
+
+    def pending(self):
+        return len(self._queue)
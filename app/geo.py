@@ -0,0 +1,295 @@
+import os
+import json
+import time
+import asyncio
+import uuid
+from bson import json_util
+from pymongo.errors import OperationFailure
+from redis.exceptions import LockError
+from .database import get_async_db, get_async_redis
+from .metrics import GEO_INGEST_DOCS, REDIS_LATENCY, MONGO_LATENCY
+from .tracing import span
+from .log import get_logger
+
+# --- GEO: colecția sample_mflix.theaters (~1.500 cinematografe GeoJSON) în Redis ---
+# Ingest complet: un singur scan cu proiecție și batch_size, GEOADD grupat per regiune în
+# pipeline-uri de GEO_INGEST_BATCH documente, scris în chei :next:{run} și mutat peste cele vechi
+# cu RENAME într-o tranzacție (căutările nu văd un index pe jumătate).
+#   theaters:{regiune}  GEO set per regiune (statul din location.address.state, lowercase)
+#   theaters:all        GEO set cu toate cinematografele (region=all)
+#   theaters:info       hash _id -> {name, theater_id, street, city, state, region}
+#   theaters:regions    registrul regiunilor (cele dispărute la un ingest nou se șterg)
+# Membrul din GEO set e _id-ul documentului: un delete din change stream are doar _id-ul.
+#
+# Re-sync incremental: worker-ul GEO_SYNC_WORKER urmărește change stream-ul pe theaters
+# (lock de leader + resume token în Redis, ca app.change_stream pentru movies). Fără token
+# deschide stream-ul, face ingest-ul complet și abia apoi aplică evenimentele strânse între
+# timp, deci nu pierde nicio modificare. Cheia demo theaters:bucharest (/geo/init) nu e atinsă.
+GEO_INGEST_BATCH = int(os.getenv("GEO_INGEST_BATCH", 1000))
+GEO_SYNC_WORKER = os.getenv("GEO_SYNC_WORKER", "0") == "1"
+GEO_SYNC_BATCH = int(os.getenv("GEO_SYNC_BATCH", 100))
+GEO_SYNC_MAX_WAIT_MS = int(os.getenv("GEO_SYNC_MAX_WAIT_MS", 500))
+
+ALL_REGION = "all"
+THEATER_INFO_KEY = "theaters:info"
+THEATER_REGIONS_KEY = "theaters:regions"
+RESUME_TOKEN_KEY = "change_stream:theaters:resume_token"
+LEADER_KEY = "change_stream:theaters:leader"
+LEADER_TTL = 15  # secunde
+
+THEATER_PROJECTION = {"theaterId": 1, "location": 1}
+# Limitele acceptate de GEOADD (proiecția Web Mercator)
+MAX_LATITUDE = 85.05112878
+# Codul Mongo pentru "resume token prea vechi" (a ieșit din oplog)
+CHANGE_STREAM_HISTORY_LOST = 286
+
+log = get_logger("geo")
+
+
+def region_key(region: str):
+    return f"theaters:{region.strip().lower()}"
+
+
+def theater_entry(doc: dict):
+    """(member, lon, lat, regiune, info) pentru un document din theaters, sau None dacă nu are coordonate valide."""
+    location = doc.get("location") or {}
+    try:
+        lon, lat = (float(c) for c in location["geo"]["coordinates"][:2])
+    except (KeyError, TypeError, ValueError):
+        return None
+    if not (-180 <= lon <= 180 and -MAX_LATITUDE <= lat <= MAX_LATITUDE):
+        return None
+    address = location.get("address") or {}
+    region = str(address.get("state") or "unknown").strip().lower()
+    info = {
+        # theaters nu are nume: afișăm adresa
+        "name": ", ".join(part for part in (address.get("street1"), address.get("city")) if part) or str(doc["_id"]),
+        "theater_id": doc.get("theaterId"),
+        "street": address.get("street1", ""),
+        "city": address.get("city", ""),
+        "state": address.get("state", ""),
+        "region": region,
+    }
+    return str(doc["_id"]), lon, lat, region, info
+
+
+def queue_theaters(pipe, docs, suffix: str = "", touched: set = None):
+    """
+    GEOADD grupat per regiune (o comandă per regiune, nu per document) + HSET în theaters:info.
+    La ingest-ul complet (suffix = cheile de staging ale rulării, touched = regiunile deja scrise)
+    cheia de staging a unei regiuni noi e golită înainte de primul GEOADD. Întoarce numărul de documente sărite.
+    """
+    regions = {}
+    info = {}
+    skipped = 0
+    for doc in docs:
+        entry = theater_entry(doc)
+        if entry is None:
+            skipped += 1
+            continue
+        member, lon, lat, region, data = entry
+        regions.setdefault(region, []).extend((lon, lat, member))
+        info[member] = json.dumps(data)
+    for region, values in regions.items():
+        if touched is not None and region not in touched:
+            pipe.delete(region_key(region) + suffix)
+            touched.add(region)
+        pipe.geoadd(region_key(region) + suffix, values)
+    if info:
+        pipe.geoadd(region_key(ALL_REGION) + suffix, [v for values in regions.values() for v in values])
+        pipe.hset(THEATER_INFO_KEY + suffix, mapping=info)
+    return skipped
+
+
+async def _next_chunk(docs, size: int):
+    """Următoarele size documente din cursor (mai puține la final)."""
+    chunk = []
+    async for doc in docs:
+        chunk.append(doc)
+        if len(chunk) >= size:
+            break
+    return chunk
+
+
+async def ingest_theaters(batch_size: int = GEO_INGEST_BATCH):
+    """Ingest complet din Mongo. Întoarce statisticile (inclusiv documente pe secundă)."""
+    redis_client = get_async_redis()
+    started = time.perf_counter()
+    # Chei de staging proprii rulării: două ingest-uri concurente nu își amestecă seturile
+    suffix = f":next:{uuid.uuid4().hex[:12]}"
+    touched = set()
+    loaded = skipped = 0
+
+    try:
+        docs = get_async_db().theaters.find({}, THEATER_PROJECTION).batch_size(batch_size).__aiter__()
+        while True:
+            # Span-ul Mongo acoperă doar citirea din cursor, nu și scrierile în Redis
+            with span("mongo", MONGO_LATENCY.labels("geo_ingest_scan")):
+                chunk = await _next_chunk(docs, batch_size)
+            if not chunk:
+                break
+            pipe = redis_client.pipeline(transaction=False)
+            chunk_skipped = queue_theaters(pipe, chunk, suffix, touched)
+            with span("redis", REDIS_LATENCY.labels("geo_ingest")):
+                await pipe.execute()
+            loaded += len(chunk) - chunk_skipped
+            skipped += chunk_skipped
+
+        stale = set(await redis_client.smembers(THEATER_REGIONS_KEY)) - touched
+        pipe = redis_client.pipeline(transaction=True)
+        for region in touched:
+            pipe.rename(region_key(region) + suffix, region_key(region))
+        if loaded:
+            pipe.rename(region_key(ALL_REGION) + suffix, region_key(ALL_REGION))
+            pipe.rename(THEATER_INFO_KEY + suffix, THEATER_INFO_KEY)
+        else:
+            pipe.delete(region_key(ALL_REGION), THEATER_INFO_KEY)
+        if stale:
+            pipe.delete(*(region_key(region) for region in stale))
+        pipe.delete(THEATER_REGIONS_KEY)
+        if touched:
+            pipe.sadd(THEATER_REGIONS_KEY, *touched)
+        with span("redis", REDIS_LATENCY.labels("geo_ingest")):
+            await pipe.execute()
+    except BaseException:
+        # Ingest întrerupt: ștergem staging-ul, indexul live rămâne cel vechi
+        staging = [region_key(region) + suffix for region in touched]
+        try:
+            await redis_client.delete(region_key(ALL_REGION) + suffix, THEATER_INFO_KEY + suffix, *staging)
+        except Exception as e:
+            log.warning("geo_ingest_cleanup_failed", error=str(e))
+        raise
+
+    seconds = time.perf_counter() - started
+    stats = {
+        "documents": loaded,
+        "skipped": skipped,
+        "regions": len(touched),
+        "seconds": round(seconds, 3),
+        "docs_per_s": round(loaded / seconds, 1) if seconds else None,
+    }
+    GEO_INGEST_DOCS.labels("loaded").inc(loaded)
+    GEO_INGEST_DOCS.labels("skipped").inc(skipped)
+    log.info("geo_ingest", **stats)
+    return stats
+
+
+async def apply_theater_changes(events: list, resume_token):
+    """Aplică un batch de evenimente din change stream: HMGET regiunile vechi, apoi un singur pipeline."""
+    redis_client = get_async_redis()
+    changes = []
+    for change in events:
+        if change["operationType"] in ("insert", "update", "replace", "delete"):
+            changes.append((str(change["documentKey"]["_id"]), change.get("fullDocument")))
+
+    regions = {}
+    if changes:
+        members = list(dict.fromkeys(member for member, _ in changes))
+        for member, data in zip(members, await redis_client.hmget(THEATER_INFO_KEY, members)):
+            regions[member] = json.loads(data)["region"] if data else None
+
+    pipe = redis_client.pipeline(transaction=False)
+    for member, doc in changes:
+        # updateLookup întoarce None dacă documentul a fost șters între timp
+        entry = theater_entry(doc) if doc else None
+        old_region = regions[member]
+        new_region = entry[3] if entry else None
+        if old_region and old_region != new_region:
+            pipe.zrem(region_key(old_region), member)
+        if entry:
+            _, lon, lat, region, info = entry
+            pipe.geoadd(region_key(region), (lon, lat, member))
+            pipe.geoadd(region_key(ALL_REGION), (lon, lat, member))
+            pipe.hset(THEATER_INFO_KEY, member, json.dumps(info))
+            pipe.sadd(THEATER_REGIONS_KEY, region)
+        else:
+            pipe.zrem(region_key(ALL_REGION), member)
+            pipe.hdel(THEATER_INFO_KEY, member)
+        regions[member] = new_region
+    if resume_token is not None:
+        pipe.set(RESUME_TOKEN_KEY, json_util.dumps(resume_token))
+    with span("redis", REDIS_LATENCY.labels("geo_sync")):
+        await pipe.execute()
+    GEO_INGEST_DOCS.labels("synced").inc(len(changes))
+
+
+async def _tail_theaters(lock):
+    """Urmărește change stream-ul pe theaters cât timp deținem lock-ul de leader."""
+    redis_client = get_async_redis()
+    options = {"full_document": "updateLookup", "max_await_time_ms": GEO_SYNC_MAX_WAIT_MS}
+
+    token = await redis_client.get(RESUME_TOKEN_KEY)
+    if token:
+        options["resume_after"] = json_util.loads(token)
+        log.info("geo_sync_resume")
+
+    loop = asyncio.get_running_loop()
+    last_renew = loop.time()
+
+    async with await get_async_db().theaters.watch(**options) as stream:
+        saved_token = token and options["resume_after"]
+        if not token:
+            # Stream-ul e deschis înaintea scanului: ce se schimbă în timpul ingest-ului se aplică după
+            await ingest_theaters()
+            await lock.reacquire()
+            last_renew = loop.time()
+        while stream.alive:
+            events = []
+            while len(events) < GEO_SYNC_BATCH:
+                change = await stream.try_next()
+                if change is None:
+                    break
+                events.append(change)
+
+            # Token-ul avansează și fără evenimente (postBatchResumeToken)
+            if events or stream.resume_token != saved_token:
+                await apply_theater_changes(events, stream.resume_token)
+                saved_token = stream.resume_token
+
+            if loop.time() - last_renew > LEADER_TTL / 3:
+                await lock.reacquire()
+                last_renew = loop.time()
+
+
+async def run_geo_sync_worker():
+    """
+    Task de fundal (lifespan, GEO_SYNC_WORKER=1) sau proces separat
+    (python -m app.geo). Doar procesul care ia lock-ul face tail.
+    """
+    while True:
+        lock = get_async_redis().lock(LEADER_KEY, timeout=LEADER_TTL)
+        try:
+            if not await lock.acquire(blocking=False):
+                await asyncio.sleep(LEADER_TTL / 3)
+                continue
+            log.info("geo_sync_leader", collection="sample_mflix.theaters")
+            try:
+                await _tail_theaters(lock)
+            finally:
+                try:
+                    await lock.release()
+                except LockError:
+                    pass
+        except asyncio.CancelledError:
+            raise
+        except OperationFailure as e:
+            if e.code == CHANGE_STREAM_HISTORY_LOST:
+                # Token-ul nu mai e în oplog: la următoarea încercare refacem ingest-ul complet
+                log.warning("geo_sync_token_expired")
+                await get_async_redis().delete(RESUME_TOKEN_KEY)
+            else:
+                log.warning("geo_sync_error", error=str(e))
+                await asyncio.sleep(1)
+        except Exception as e:
+            log.warning("geo_sync_error", error=str(e))
+            await asyncio.sleep(1)
+
+
+if __name__ == "__main__":
+    # python -m app.geo           -> worker de sync (ingest complet la primul start)
+    # python -m app.geo --ingest  -> doar ingest-ul complet, cu statisticile
+    import sys
+    if "--ingest" in sys.argv:
+        print(json.dumps(asyncio.run(ingest_theaters())))
+    else:
+        asyncio.run(run_geo_sync_worker())
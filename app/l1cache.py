@@ -0,0 +1,163 @@
+import sys
+import time
+from collections import OrderedDict
+
+# --- L1 CACHE (în proces, în fața Redis) ---
+# Un HIT în Redis costă totuși un round trip + json.loads pe tot documentul.
+# L1 ține obiectele deja decodate în memoria procesului:
+#   - mărginit în BYTES (nu în număr de chei), fiindcă filmele au dimensiuni foarte diferite
+#   - evicție LRU + admisie TinyLFU: o cheie nouă intră doar dacă e mai "populară" decât victima
+#   - TTL scurt pe fiecare intrare, ca plasă de siguranță dacă pierdem un mesaj de invalidare
+# Mărimea unei intrări e memoria obiectelor Python (deep_sizeof), nu doar bytes-ii din Redis:
+# un dict decodat ocupă de câteva ori cât JSON-ul din care provine.
+
+
+def deep_sizeof(obj):
+    """Memoria aproximativă a unui obiect decodat (dict / list / str / număr), recursiv."""
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            size += deep_sizeof(key) + deep_sizeof(value)
+    elif isinstance(obj, (list, tuple)):
+        for value in obj:
+            size += deep_sizeof(value)
+    return size
+
+
+class FrequencySketch:
+    """Count-Min Sketch cu contoare de 4 biți (max 15) și îmbătrânire periodică (TinyLFU)."""
+
+    def __init__(self, width: int = 4096, depth: int = 4):
+        # width putere a lui 2 -> putem folosi & în loc de %
+        self.width = 1 << max(4, (width - 1).bit_length())
+        self.depth = depth
+        self.rows = [bytearray(self.width) for _ in range(depth)]
+        self.sample_size = 10 * self.width
+        self.additions = 0
+
+    def _indexes(self, key):
+        h = hash(key)
+        mask = self.width - 1
+        for i in range(self.depth):
+            # hash-uri diferite per rând, derivate din același hash de bază
+            yield i, (h + i * ((h >> 16) | 1)) & mask
+
+    def increment(self, key):
+        added = False
+        for row, idx in self._indexes(key):
+            if self.rows[row][idx] < 15:
+                self.rows[row][idx] += 1
+                added = True
+        if added:
+            self.additions += 1
+            if self.additions >= self.sample_size:
+                self._reset()
+
+    def estimate(self, key):
+        return min(self.rows[row][idx] for row, idx in self._indexes(key))
+
+    def _reset(self):
+        # Înjumătățim toate contoarele: frecvențele vechi contează tot mai puțin
+        for row in self.rows:
+            for i in range(self.width):
+                row[i] >>= 1
+        self.additions //= 2
+
+
+class L1Cache:
+    """Cache LRU mărginit în bytes, cu admisie TinyLFU și TTL per intrare."""
+
+    def __init__(self, max_bytes: int, ttl: float):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.sketch = FrequencySketch(width=max(1024, max_bytes // 4096))
+        self._data = OrderedDict()  # key -> (value, size, expires_at)
+        self._bytes = 0
+        # Crește la fiecare invalidare: o citire din Redis începută ÎNAINTE de invalidare
+        # nu mai are voie să pună valoarea (veche) în L1
+        self.epoch = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    @property
+    def size_bytes(self):
+        return self._bytes
+
+    def get(self, key):
+        self.sketch.increment(key)
+        item = self._data.get(key)
+        if item is None:
+            self.misses += 1
+            return None
+        value, size, expires_at = item
+        if time.monotonic() >= expires_at:
+            self._remove(key)
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key, value, size: int, ttl: float = None, epoch: int = None):
+        if epoch is not None and epoch != self.epoch:
+            return False  # între timp a venit o invalidare
+        if size > self.max_bytes:
+            return False
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            return False
+
+        if key in self._data:
+            self._remove(key)
+        elif self._bytes + size > self.max_bytes and not self._admit(key, size):
+            return False
+
+        self._data[key] = (value, size, time.monotonic() + ttl)
+        self._bytes += size
+        return True
+
+    def grow(self, key, value, extra: int):
+        """
+        Intrarea `value` și-a materializat după set() un câmp lazy (ex: dict-ul decodat):
+        îi adăugăm mărimea și evacuăm LRU până încăpem din nou în max_bytes.
+        """
+        item = self._data.get(key)
+        if item is None or item[0] is not value:
+            return
+        self._data[key] = (value, item[1] + extra, item[2])
+        self._bytes += extra
+        while self._bytes > self.max_bytes:
+            self._remove(next(iter(self._data)))
+
+    def _admit(self, key, size):
+        """TinyLFU: evacuăm victimele LRU doar dacă noul candidat e mai frecvent decât ele."""
+        candidate_freq = self.sketch.estimate(key)
+        victims, freed = [], 0
+        for victim_key, (_, victim_size, _) in self._data.items():
+            if self._bytes - freed + size <= self.max_bytes:
+                break
+            if self.sketch.estimate(victim_key) >= candidate_freq:
+                return False
+            victims.append(victim_key)
+            freed += victim_size
+        for victim_key in victims:
+            self._remove(victim_key)
+        return True
+
+    def delete(self, *keys):
+        self.epoch += 1
+        for key in keys:
+            if key in self._data:
+                self._remove(key)
+
+    def clear(self):
+        self.epoch += 1
+        self._data.clear()
+        self._bytes = 0
+
+    def _remove(self, key):
+        _, size, _ = self._data.pop(key)
+        self._bytes -= size
@@ -0,0 +1,204 @@
+import os
+
+# --- LEADERBOARDS: întreținere incrementală ---
+# top_movies:imdb și leaderboard:top_movies_opt țin doar primele N filme (trunchiate).
+# Când un film se schimbă, îl actualizăm în O(log N) în loc să refacem tot top-ul:
+#   - scor >= ultimul din ZSET (sau top-ul e complet) -> ZADD (+ HSET preview-ul)
+#   - altfel nu știm ce filme ar fi între el și coada ZSET-ului -> ZREM (+ DEL preview)
+# O pagină rămasă incompletă după un ZREM dă MISS și reîncarcă top-ul din Mongo (pentru
+# ambele ZSET-uri), cu excepția cazului în care marcajul "complete" spune că ZSET-ul are tot.
+
+TOP_MOVIES_KEY = "top_movies:imdb"
+# Marcaje: leaderboard-ul conține TOATE filmele cu rating (Mongo a întors mai puține decât am cerut)
+TOP_MOVIES_COMPLETE_KEY = "top_movies:imdb:complete"
+OPTIMIZED_LEADERBOARD_KEY = "leaderboard:top_movies_opt"
+OPTIMIZED_COMPLETE_KEY = "leaderboard:top_movies_opt:complete"
+
+# KEYS[1] = zset, KEYS[2] = marcaj "complete", KEYS[3] = hash preview (opțional)
+# ARGV[1] = membru, ARGV[2] = scor ("" = film șters / fără rating), ARGV[3] = TTL hash, ARGV[4..] = câmp, valoare
+LEADERBOARD_UPSERT_LUA = """
+local member, score = ARGV[1], tonumber(ARGV[2])
+local keep = false
+if score and redis.call('EXISTS', KEYS[1]) == 1 then
+    if redis.call('EXISTS', KEYS[2]) == 1 then
+        keep = true
+    else
+        local tail = redis.call('ZRANGE', KEYS[1], 0, 0, 'WITHSCORES')
+        keep = tail[2] ~= nil and score >= tonumber(tail[2])
+    end
+end
+if keep then
+    redis.call('ZADD', KEYS[1], score, member)
+    if KEYS[3] and #ARGV > 3 then
+        redis.call('HSET', KEYS[3], unpack(ARGV, 4))
+        redis.call('EXPIRE', KEYS[3], ARGV[3])
+    end
+    return 1
+end
+redis.call('ZREM', KEYS[1], member)
+if KEYS[3] then
+    redis.call('DEL', KEYS[3])
+end
+return 0
+"""
+
+# --- FAȚETE: un ZSET complet (nu trunchiat) per gen, an și deceniu, scor = rating IMDB ---
+#   leaderboard:genre:drama, leaderboard:year:1994, leaderboard:decade:1990
+# "Top drame din anii '90" = ZINTERSTORE genre:drama decade:1990 (AGGREGATE MAX, scorurile
+# sunt identice), păstrat FACET_QUERY_TTL secunde. Intervalele de ani = ZUNIONSTORE pe ani.
+# movie:facets:{id} ține fațetele curente ale filmului, ca un update (gen / an schimbat)
+# sau un delete să-l scoată din ZSET-urile vechi fără să știm documentul anterior.
+FACET_TTL = int(os.getenv("FACET_TTL", 3600))   # secunde până la rebuild complet din Mongo
+FACETS_READY_KEY = "leaderboard:facets:ready"    # există = fațetele sunt construite complet
+FACET_KEYS_KEY = "leaderboard:facets:keys"       # registrul ZSET-urilor de fațete
+
+# KEYS[1] = movie:facets:{id}, KEYS[2] = marcaj ready, KEYS[3] = registrul fațetelor
+# ARGV[1] = membru, ARGV[2] = scor ("" = șters / fără rating), ARGV[3] = TTL, ARGV[4..] = ZSET-urile noi
+# (ZSET-urile vechi vin din movie:facets:{id}, deci nu sunt în KEYS: merge pe Redis standalone, nu pe Cluster)
+FACET_UPSERT_LUA = """
+if redis.call('EXISTS', KEYS[2]) == 0 then
+    return 0
+end
+local member, score = ARGV[1], tonumber(ARGV[2])
+local new = {}
+if score then
+    for i = 4, #ARGV do
+        new[ARGV[i]] = true
+    end
+end
+for _, key in ipairs(redis.call('SMEMBERS', KEYS[1])) do
+    if not new[key] then
+        redis.call('ZREM', key, member)
+    end
+end
+redis.call('DEL', KEYS[1])
+for key in pairs(new) do
+    redis.call('ZADD', key, score, member)
+    if redis.call('TTL', key) < 0 then
+        redis.call('EXPIRE', key, ARGV[3])
+        redis.call('SADD', KEYS[3], key)
+    end
+    redis.call('SADD', KEYS[1], key)
+end
+if next(new) then
+    redis.call('EXPIRE', KEYS[1], ARGV[3])
+end
+return 1
+"""
+
+_scripts = {}  # (tipul pipeline-ului sync / async, sursa Lua) -> Script
+
+
+def _script(pipe, source: str):
+    """Script înregistrat o dată per tip de pipeline; EVALSHA, cu SCRIPT LOAD la execute() dacă lipsește."""
+    script = _scripts.get((type(pipe), source))
+    if script is None:
+        script = _scripts[type(pipe), source] = pipe.register_script(source)
+    pipe.scripts.add(script)
+    return script
+
+
+def movie_score(movie: dict):
+    """Rating-ul IMDB ca float, sau None (fără rating / film șters)."""
+    if not movie:
+        return None
+    try:
+        return float(movie.get("imdb", {}).get("rating"))
+    except (TypeError, ValueError):
+        return None
+
+
+def movie_preview(movie: dict):
+    """Câmpurile din movie:hash:{id} folosite de /top-movies-optimized/."""
+    return {
+        "title": str(movie.get('title', 'N/A')),
+        "year": str(movie.get('year', 'N/A')),
+        "rating": str(movie.get('imdb', {}).get('rating', 0)),
+        "poster": str(movie.get('poster', ''))
+    }
+
+
+def queue_leaderboard_update(pipe, movie_id: str, movie: dict, hash_ttl: int):
+    """
+    Adaugă în pipeline actualizarea ambelor leaderboard-uri (și a fațetelor) pentru un film
+    (movie=None -> filmul a fost șters). Se execută odată cu restul pipeline-ului;
+    hash_ttl = TTL-ul preview-ului movie:hash:{id} (CACHE_TTL).
+    """
+    upsert = _script(pipe, LEADERBOARD_UPSERT_LUA)
+
+    score = movie_score(movie)
+    score_arg = "" if score is None else repr(score)
+
+    keys = [TOP_MOVIES_KEY, TOP_MOVIES_COMPLETE_KEY]
+    pipe.evalsha(upsert.sha, len(keys), *keys, movie_id, score_arg)
+
+    preview = []
+    if score is not None:
+        for field, value in movie_preview(movie).items():
+            preview += [field, value]
+    keys = [OPTIMIZED_LEADERBOARD_KEY, OPTIMIZED_COMPLETE_KEY, f"movie:hash:{movie_id}"]
+    pipe.evalsha(upsert.sha, len(keys), *keys, movie_id, score_arg, hash_ttl, *preview)
+
+    # Fațetele (gen / an / deceniu), dacă sunt construite
+    facets = _script(pipe, FACET_UPSERT_LUA)
+    keys = [movie_facets_key(movie_id), FACETS_READY_KEY, FACET_KEYS_KEY]
+    new_keys = movie_facet_keys(movie) if score is not None else []
+    pipe.evalsha(facets.sha, len(keys), *keys, movie_id, score_arg, FACET_TTL, *new_keys)
+
+
+def genre_key(genre: str):
+    return f"leaderboard:genre:{genre.strip().lower()}"
+
+
+def year_key(year: int):
+    return f"leaderboard:year:{year}"
+
+
+def decade_key(decade: int):
+    return f"leaderboard:decade:{decade}"
+
+
+def movie_facets_key(movie_id: str):
+    return f"movie:facets:{movie_id}"
+
+
+def movie_year(movie: dict):
+    """Anul ca int (în sample_mflix apar și valori ca "2012è"), sau None."""
+    year = movie.get("year")
+    if isinstance(year, str):
+        year = year[:4]
+    try:
+        return int(year)
+    except (TypeError, ValueError):
+        return None
+
+
+def movie_facet_keys(movie: dict):
+    """ZSET-urile de fațete în care intră filmul."""
+    keys = [genre_key(genre) for genre in movie.get("genres") or [] if isinstance(genre, str) and genre.strip()]
+    year = movie_year(movie)
+    if year is not None:
+        keys += [year_key(year), decade_key(year - year % 10)]
+    return list(dict.fromkeys(keys))
+
+
+def year_filter_keys(value: str):
+    """
+    Filtrul de an -> ZSET-urile de reunit: "1994" -> [year:1994], "1990s" -> [decade:1990],
+    "1990-1995" -> [year:1990 .. year:1995]. ValueError pentru orice altceva.
+    """
+    value = value.strip().lower()
+    try:
+        if value.endswith("s"):
+            decade = int(value[:-1])
+            if decade % 10:
+                raise ValueError
+            return [decade_key(decade)]
+        if "-" in value:
+            start, end = (int(part) for part in value.split("-", 1))
+            if not 0 <= end - start <= 200:
+                raise ValueError
+            return [year_key(year) for year in range(start, end + 1)]
+        return [year_key(int(value))]
+    except ValueError:
+        raise ValueError(f"year invalid: {value} (ex: 1994, 1990s, 1990-1995)") from None
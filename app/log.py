@@ -0,0 +1,140 @@
+import os
+import sys
+import json
+import time
+import queue
+import random
+import atexit
+import logging
+from logging.handlers import QueueHandler, QueueListener
+
+# --- LOGGING STRUCTURAT, prin coadă ---
+# print() pe fiecare HIT/MISS = un write sincron pe stdout per request, sub GIL.
+# Aici request-ul doar pune un LogRecord într-o coadă (QueueHandler, fără I/O);
+# un thread separat (QueueListener) formatează și scrie. Evenimentele de pe calea
+# fierbinte (cache_hit, cache_miss, ...) sunt în plus eșantionate: LOG_SAMPLE_RATE=0.01
+# păstrează ~1% din ele, deci nici LogRecord-ul nu se mai creează pentru restul.
+#
+#   LOG_LEVEL=INFO | DEBUG | WARNING ...
+#   LOG_FORMAT=json (o linie JSON per eveniment) | text
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", 0.01))
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", 10_000))
+
+_listener = None
+
+# Atributele standard ale unui LogRecord (restul vin din extra= și devin câmpuri)
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "event"}
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 6),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "event": getattr(record, "event", record.getMessage()),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    def format(self, record):
+        fields = " ".join(f"{k}={v}" for k, v in vars(record).items() if k not in _RECORD_ATTRS)
+        stamp = time.strftime("%H:%M:%S", time.localtime(record.created))
+        return f"{stamp} {record.levelname:<7} {record.name} {getattr(record, 'event', record.getMessage())} {fields}".rstrip()
+
+
+class DroppingQueueHandler(QueueHandler):
+    """Coada plină -> aruncăm evenimentul în loc să blocăm request-ul."""
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            pass
+
+    def prepare(self, record):
+        # Formatarea se face în thread-ul listener-ului, nu aici
+        return record
+
+
+def setup_logging(stream=None):
+    """Pornește thread-ul de scriere (o singură dată per proces); stream implicit = stdout."""
+    global _listener
+    if _listener is not None:
+        return
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(JsonFormatter() if LOG_FORMAT == "json" else TextFormatter())
+
+    log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    root = logging.getLogger("movie_api")
+    root.setLevel(LOG_LEVEL)
+    root.handlers = [DroppingQueueHandler(log_queue)]
+    root.propagate = False
+
+    _listener = QueueListener(log_queue, output, respect_handler_level=False)
+    _listener.start()
+
+
+def stop_logging():
+    """Golește coada și oprește thread-ul de scriere (la oprire)."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(stop_logging)
+
+
+def _restart_after_fork():
+    """Thread-ul listener-ului nu supraviețuiește fork-ului: copilul își pornește propriul thread."""
+    global _listener
+    if _listener is not None:
+        _listener = None
+        setup_logging()
+
+
+os.register_at_fork(after_in_child=_restart_after_fork)
+
+
+class EventLogger:
+    """logger.info("cache_hit", movie_id=...) -> un eveniment cu câmpuri, nu un string formatat."""
+    __slots__ = ("logger",)
+
+    def __init__(self, name: str):
+        self.logger = logging.getLogger(f"movie_api.{name}")
+
+    def _log(self, level, event, fields):
+        if self.logger.isEnabledFor(level):
+            self.logger.log(level, event, extra=dict(fields, event=event))
+
+    def debug(self, event, **fields):
+        self._log(logging.DEBUG, event, fields)
+
+    def info(self, event, **fields):
+        self._log(logging.INFO, event, fields)
+
+    def warning(self, event, **fields):
+        self._log(logging.WARNING, event, fields)
+
+    def error(self, event, **fields):
+        self._log(logging.ERROR, event, fields)
+
+    def sampled(self, event, rate=None, **fields):
+        """Evenimente de pe calea fierbinte: logate (INFO) doar cu probabilitatea rate."""
+        rate = LOG_SAMPLE_RATE if rate is None else rate
+        if rate >= 1 or (rate > 0 and random.random() < rate):
+            self._log(logging.INFO, event, dict(fields, sample_rate=rate))
+
+
+def get_logger(name: str):
+    setup_logging()
+    return EventLogger(name)
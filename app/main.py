@@ -1,46 +1,145 @@
 # API 
 
-from fastapi import FastAPI, HTTPException
-from .service import (
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.responses import JSONResponse
+from .async_service import (
     get_movie_with_cache, 
+    get_movie_raw_with_cache,
+    get_movies_batch,
+    get_movies_batch_raw,
+    MAX_BATCH_IDS,
     get_top_movies, 
+    get_top_movies_raw,
     get_top_movies_optimized,
+    get_top_movies_faceted,
+    get_trending_movies,
     update_movie_write_through, 
+    update_movies_write_through,
     delete_movie_write_through, 
     create_movie_write_through,
     seed_theaters,
-    find_nearby_theaters
+    find_nearby_theaters,
+    GEO_DEFAULT_REGION,
+    GEO_SEARCH_LIMIT,
+    publish_invalidation,
+    run_invalidation_listener,
+    run_bloom_refresher
 )
-from .database import db, redis_client
+from .change_stream import CHANGE_STREAM_WORKER, run_change_stream_worker
+from .write_behind import WRITE_BEHIND, update_movie_write_behind, run_write_behind_worker
+from .database import get_async_db, get_async_redis, close_async_clients, warm_up_clients
+from .metrics import run_redis_info_collector
+from .trending import TRENDING_WINDOW_KEYS, record_view, run_trending_worker
+from .geo import GEO_SYNC_WORKER, ingest_theaters, run_geo_sync_worker
+from .tracing import ServerTimingMiddleware
+from .breaker import BackendUnavailable
 from prometheus_fastapi_instrumentator import Instrumentator
+import os
+import math
+import json
+import asyncio
 import time
 
 limit_top_movies = 100
 
-app = FastAPI(title="Redis Cache Demo")
+# Fast path zero-copy pentru GET /movie/{id} (bytes din Redis direct în răspuns)
+MOVIE_PASSTHROUGH = os.getenv("MOVIE_PASSTHROUGH", "1") == "1"
+
+
+def json_envelope(latency_ms: float, source: str, raw_data: bytes):
+    """
+    Construiește {"latency_ms", "source", "data"} lipind bytes-ii JSON din cache
+    în câmpul "data", fără json.loads / jsonable_encoder / json.dumps pe document.
+    """
+    return b'{"latency_ms":%s,"source":%s,"data":%s}' % (
+        json.dumps(round(latency_ms, 2)).encode(),
+        json.dumps(source).encode(),
+        raw_data
+    )
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Conexiunile Redis / Mongo ale acestui worker se deschid acum, nu la primul request
+    await warm_up_clients()
+    # Ascultăm invalidările L1 trimise de ceilalți workeri
+    listener = asyncio.create_task(run_invalidation_listener())
+    # Bloom filter cu movies._id (seed la pornire + reîncărcare periodică)
+    bloom_refresher = asyncio.create_task(run_bloom_refresher())
+    # Memoria și evicțiile Redis (INFO) -> gauge-uri Prometheus
+    redis_info = asyncio.create_task(run_redis_info_collector())
+    # Vizualizările pentru /trending: flush periodic (ZINCRBY) + recalcularea clasamentelor
+    trending = asyncio.create_task(run_trending_worker())
+    tasks = [listener, bloom_refresher, redis_info, trending]
+    # Invalidare din change stream-ul Mongo (doar un worker face tail, ceilalți stau în standby)
+    if CHANGE_STREAM_WORKER:
+        tasks.append(asyncio.create_task(run_change_stream_worker()))
+    # Flush write-behind Redis Stream -> Mongo (un singur consumer activ)
+    if WRITE_BEHIND:
+        tasks.append(asyncio.create_task(run_write_behind_worker()))
+    # GEO set-urile din sample_mflix.theaters: ingest complet o dată, apoi change stream
+    if GEO_SYNC_WORKER:
+        tasks.append(asyncio.create_task(run_geo_sync_worker()))
+    yield
+    for task in tasks:
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+    # La oprire închidem pool-urile async (Redis + Mongo)
+    await close_async_clients()
+
+
+app = FastAPI(title="Redis Cache Demo", lifespan=lifespan)
 
 Instrumentator().instrument(app).expose(app)
+# Server-Timing (redis / mongo / serialize / app) + profiler opt-in (X-Profile: 1 sau ?profile=1)
+app.add_middleware(ServerTimingMiddleware)
+
+@app.exception_handler(BackendUnavailable)
+async def backend_unavailable(request: Request, exc: BackendUnavailable):
+    """Breaker deschis sau load shedding: 503 imediat, cu Retry-After, în loc de timeout."""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc), "backend": exc.backend},
+        headers={"Retry-After": str(max(1, math.ceil(exc.retry_after)))}
+    )
+
 
 @app.get("/")
 def read_root():
     return {"status": "API is running", "guide": "Go to /docs for Swagger UI"}
 
 @app.get("/movie/{movie_id}")
-async def read_movie(movie_id: str):
+async def read_movie(movie_id: str, passthrough: bool = MOVIE_PASSTHROUGH):
     """
     Acesta este endpoint-ul inteligent.
     Măsoară timpul de răspuns pentru a demonstra viteza Redis.
+    Cu passthrough=true documentul din cache nu mai e decodat și re-encodat.
     """
-    start_time = time.time()
+    start_time = time.perf_counter()
+
+    if passthrough:
+        raw_movie, source = await get_movie_raw_with_cache(movie_id)
+        duration_ms = (time.perf_counter() - start_time) * 1000
+
+        if not raw_movie:
+            raise HTTPException(status_code=404, detail="Movie not found")
+        record_view(movie_id)
+
+        return Response(content=json_envelope(duration_ms, source, raw_movie), media_type="application/json")
     
     # Apelăm funcția cu strategie de Cache
-    movie, source = get_movie_with_cache(movie_id)
+    movie, source = await get_movie_with_cache(movie_id)
     
-    end_time = time.time()
+    end_time = time.perf_counter()
     duration_ms = (end_time - start_time) * 1000
 
     if not movie:
         raise HTTPException(status_code=404, detail="Movie not found")
+    record_view(movie_id)
 
     return {
         "latency_ms": round(duration_ms, 2),
@@ -49,15 +148,80 @@ async def read_movie(movie_id: str):
     }
 
 
+# BATCH: o listă de filme cu MGET + un singur $in în Mongo
+
+async def _batch_response(movie_ids: list, passthrough: bool):
+    if len(movie_ids) > MAX_BATCH_IDS:
+        raise HTTPException(status_code=400, detail=f"Maxim {MAX_BATCH_IDS} ID-uri per request")
+
+    start_time = time.perf_counter()
+
+    if passthrough:
+        results = await get_movies_batch_raw(movie_ids)
+    else:
+        results = await get_movies_batch(movie_ids)
+
+    duration_ms = (time.perf_counter() - start_time) * 1000
+    found = sum(1 for movie, _ in results if movie)
+
+    if passthrough:
+        items = b",".join(
+            b'{"_id":%s,"source":%s,"data":%s}' % (
+                json.dumps(movie_id).encode(), json.dumps(source).encode(), raw or b"null"
+            )
+            for movie_id, (raw, source) in zip(movie_ids, results)
+        )
+        body = b'{"latency_ms":%s,"count":%d,"found":%d,"data":[%s]}' % (
+            json.dumps(round(duration_ms, 2)).encode(), len(movie_ids), found, items
+        )
+        return Response(content=body, media_type="application/json")
+
+    return {
+        "latency_ms": round(duration_ms, 2),
+        "count": len(movie_ids),
+        "found": found,
+        "data": [
+            {"_id": movie_id, "source": source, "data": movie}
+            for movie_id, (movie, source) in zip(movie_ids, results)
+        ]
+    }
+
+
+@app.get("/movies")
+async def read_movies(ids: str, passthrough: bool = MOVIE_PASSTHROUGH):
+    """
+    Mai multe filme într-un singur request: /movies?ids=id1,id2,id3
+    Fiecare film are propriul "source" (L1 / Redis / MongoDB).
+    """
+    movie_ids = [movie_id.strip() for movie_id in ids.split(",") if movie_id.strip()]
+    return await _batch_response(movie_ids, passthrough)
+
+
+@app.post("/movies/batch")
+async def read_movies_batch(payload: dict, passthrough: bool = MOVIE_PASSTHROUGH):
+    """Ca GET /movies, dar cu ID-urile în body: {"ids": ["id1", "id2"]}."""
+    movie_ids = [str(movie_id) for movie_id in payload.get("ids", [])]
+    return await _batch_response(movie_ids, passthrough)
+
+
 #2
 
 @app.get("/top-movies/")
-async def get_top_n_movies(limit: int = limit_top_movies):
-    start_time = time.time()
+async def get_top_n_movies(limit: int = limit_top_movies, offset: int = 0, passthrough: bool = MOVIE_PASSTHROUGH):
+    """Top filme după rating IMDB, cu paginare (offset / limit)."""
+    if limit < 1 or offset < 0:
+        raise HTTPException(status_code=400, detail="limit trebuie să fie >= 1 și offset >= 0")
 
-    movies, source = get_top_movies(limit=limit)
+    start_time = time.perf_counter()
 
-    end_time = time.time()
+    if passthrough:
+        raw_movies, source = await get_top_movies_raw(limit=limit, offset=offset)
+        duration_ms = (time.perf_counter() - start_time) * 1000
+        return Response(content=json_envelope(duration_ms, source, b"[" + b",".join(raw_movies) + b"]"), media_type="application/json")
+
+    movies, source = await get_top_movies(limit=limit, offset=offset)
+
+    end_time = time.perf_counter()
 
     duration_ms = (end_time - start_time) * 1000
 
@@ -76,12 +240,16 @@ async def update_movie(movie_id: str, update_data: dict):
     WRITE-THROUGH UPDATE:
     Actualizează filmul ATÂT în MongoDB ȘI în Redis cache în același timp.
     Garantează sincronizare perfectă.
+    Cu WRITE_BEHIND=1: doar Redis acum, Mongo prin Redis Stream + bulk_write.
     """
-    start_time = time.time()
+    start_time = time.perf_counter()
     
-    movie, source = update_movie_write_through(movie_id, update_data)
+    if WRITE_BEHIND:
+        movie, source = await update_movie_write_behind(movie_id, update_data)
+    else:
+        movie, source = await update_movie_write_through(movie_id, update_data)
     
-    end_time = time.time()
+    end_time = time.perf_counter()
     duration_ms = (end_time - start_time) * 1000
 
     if not movie:
@@ -94,17 +262,46 @@ async def update_movie(movie_id: str, update_data: dict):
     }
 
 
+@app.put("/movies/batch")
+async def update_movies_batch(payload: dict):
+    """
+    WRITE-THROUGH BULK UPDATE: {"updates": {"id1": {"title": "..."}, "id2": {...}}}
+    Un singur bulk_write în Mongo + un singur pipeline Redis pentru toate filmele.
+    """
+    updates = payload.get("updates") or {}
+    if not isinstance(updates, dict) or not all(isinstance(data, dict) for data in updates.values()):
+        raise HTTPException(status_code=400, detail='Format: {"updates": {"<movie_id>": {"câmp": "valoare"}}}')
+    if len(updates) > MAX_BATCH_IDS:
+        raise HTTPException(status_code=400, detail=f"Maxim {MAX_BATCH_IDS} ID-uri per request")
+
+    start_time = time.perf_counter()
+
+    results = await update_movies_write_through(updates)
+
+    duration_ms = (time.perf_counter() - start_time) * 1000
+
+    return {
+        "latency_ms": round(duration_ms, 2),
+        "count": len(updates),
+        "updated": sum(1 for movie, _ in results.values() if movie),
+        "data": [
+            {"_id": movie_id, "source": source, "data": movie}
+            for movie_id, (movie, source) in results.items()
+        ]
+    }
+
+
 @app.delete("/movie/{movie_id}")
 async def delete_movie(movie_id: str):
     """
     WRITE-THROUGH DELETE:
     Șterge filmul din ATÂT MongoDB ȘI Redis cache.
     """
-    start_time = time.time()
+    start_time = time.perf_counter()
     
-    success, message = delete_movie_write_through(movie_id)
+    success, message = await delete_movie_write_through(movie_id)
     
-    end_time = time.time()
+    end_time = time.perf_counter()
     duration_ms = (end_time - start_time) * 1000
 
     if not success:
@@ -122,11 +319,11 @@ async def create_movie(movie_data: dict):
     WRITE-THROUGH CREATE:
     Creează filmul în MongoDB și imediat îl cacheaza în Redis.
     """
-    start_time = time.time()
+    start_time = time.perf_counter()
     
-    movie, source = create_movie_write_through(movie_data)
+    movie, source = await create_movie_write_through(movie_data)
     
-    end_time = time.time()
+    end_time = time.perf_counter()
     duration_ms = (end_time - start_time) * 1000
 
     if not movie:
@@ -143,26 +340,51 @@ async def create_movie(movie_data: dict):
 @app.post("/geo/init")
 async def init_geo_data():
     """Buton pentru a încărca datele în Redis."""
-    msg = seed_theaters()
+    msg = await seed_theaters()
     return {"message": msg}
 
+@app.post("/geo/ingest")
+async def ingest_geo_data():
+    """Ingest complet din sample_mflix.theaters (GEO set per regiune); întoarce documente/secundă."""
+    return await ingest_theaters()
+
 @app.get("/geo/search")
-async def search_nearby(lat: float, lon: float, radius: int = 5):
-    """Caută cinematografe în apropiere."""
-    results = find_nearby_theaters(lat, lon, radius)
+async def search_nearby(lat: float, lon: float, radius: int = 5, region: str = GEO_DEFAULT_REGION,
+                        limit: int = GEO_SEARCH_LIMIT):
+    """Caută cinematografe în apropiere, în regiunea dată (bucharest, all sau un stat: ny, ca, ...)."""
+    if limit < 1:
+        raise HTTPException(status_code=400, detail="limit trebuie să fie >= 1")
+    results = await find_nearby_theaters(lat, lon, radius, region, limit)
     return {
         "center": {"lat": lat, "lon": lon},
+        "region": region.strip().lower(),
         "radius_km": radius,
         "found": len(results),
         "results": results
     }
 
 @app.get("/top-movies-optimized/")
-async def get_top_n_movies_opt(limit: int = limit_top_movies):
-    start_time = time.time()
-
-    movies, source = get_top_movies_optimized(limit=limit)
-    end_time = time.time()
+async def get_top_n_movies_opt(limit: int = limit_top_movies, genre: str = None, year: str = None):
+    """
+    Top după rating. Filtre opționale: genre ("Drama" sau "Drama,Crime" = intersecție) și
+    year ("1994", "1990s", "1990-1995"), servite din ZSET-urile de fațete (ZINTERSTORE în Redis).
+    limit e plafonat la MAX_BATCH_IDS (un preview per film, din același pipeline).
+    """
+    if limit < 1:
+        raise HTTPException(status_code=400, detail="limit trebuie să fie >= 1")
+    limit = min(limit, MAX_BATCH_IDS)
+
+    start_time = time.perf_counter()
+
+    if genre or year:
+        genres = [g for g in (genre or "").split(",") if g.strip()]
+        try:
+            movies, source = await get_top_movies_faceted(limit=limit, genres=genres, year=year)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    else:
+        movies, source = await get_top_movies_optimized(limit=limit)
+    end_time = time.perf_counter()
 
     duration_ms = (end_time - start_time) * 1000
 
@@ -174,6 +396,28 @@ async def get_top_n_movies_opt(limit: int = limit_top_movies):
     }
 
 
+@app.get("/trending")
+async def get_trending(limit: int = limit_top_movies, window: str = "combined"):
+    """Cele mai vizualizate filme acum (scor cu decay): window = hourly | daily | combined."""
+    if window not in TRENDING_WINDOW_KEYS:
+        raise HTTPException(status_code=400, detail=f"window: {' | '.join(TRENDING_WINDOW_KEYS)}")
+    if limit < 1:
+        raise HTTPException(status_code=400, detail="limit trebuie să fie >= 1")
+
+    start_time = time.perf_counter()
+
+    movies, source = await get_trending_movies(limit=limit, window=window)
+
+    duration_ms = (time.perf_counter() - start_time) * 1000
+
+    return {
+        "latency_ms": round(duration_ms, 2),
+        "source": source,
+        "window": window,
+        "count": len(movies),
+        "data": movies
+    }
+
 @app.post("/simulate/backdoor-update/{movie_id}")
 async def backdoor_update(movie_id: str, new_title: str):
     """
@@ -184,7 +428,7 @@ async def backdoor_update(movie_id: str, new_title: str):
     try:
         from bson import ObjectId
         # Modificăm direct în Mongo
-        result = db.movies.update_one(
+        result = await get_async_db().movies.update_one(
             {"_id": ObjectId(movie_id)},
             {"$set": {"title": new_title}}
         )
@@ -195,13 +439,15 @@ async def backdoor_update(movie_id: str, new_title: str):
 @app.delete("/simulate/invalidate/{movie_id}")
 async def force_invalidate(movie_id: str):
     """
-    Șterge forțat cheia din Redis.
+    Șterge forțat cheia din Redis și din L1-ul tuturor workerilor.
     Următorul Request va fi obligat să ia datele proaspete din Mongo.
     """
     key = f"movie:{movie_id}"
     hash_key = f"movie:hash:{movie_id}"
     
-    redis_client.delete(key)      # Șterge String Cache
-    redis_client.delete(hash_key) # Șterge Hash Cache
+    redis_client = get_async_redis()
+    await redis_client.delete(key)      # Șterge String Cache
+    await redis_client.delete(hash_key) # Șterge Hash Cache
+    await publish_invalidation(key, hash_key) # Șterge din L1 (toate procesele)
     
     return {"message": f"Cache invalidated for {movie_id}"}
\ No newline at end of file
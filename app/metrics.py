@@ -0,0 +1,172 @@
+import os
+import asyncio
+from prometheus_client import Counter, Gauge, Histogram
+from .database import get_async_redis
+from .breaker import redis_breaker, mongo_breaker
+from .log import get_logger
+
+# --- METRICI CUSTOM (Prometheus) ---
+# Instrumentator().expose(app) publică registry-ul implicit pe /metrics,
+# deci tot ce e definit aici apare automat lângă metricile HTTP.
+# Sub gunicorn cu mai mulți workeri (PROMETHEUS_MULTIPROC_DIR) /metrics agregă toate procesele:
+# contoarele și histogramele se adună, iar la gauge-uri multiprocess_mode spune cum se combină.
+
+# DataLoader: cât de mari sunt batch-urile și cât stă o cerere în coadă până la MGET.
+# Cu ele se reglează DATALOADER_WINDOW_US.
+DATALOADER_BATCH_SIZE = Histogram(
+    "dataloader_batch_size",
+    "Chei trimise într-un singur batch de DataLoader",
+    ["loader"],
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512),
+)
+
+DATALOADER_QUEUE_DELAY = Histogram(
+    "dataloader_queue_delay_seconds",
+    "Timpul petrecut de o cheie în coadă până pleacă batch-ul",
+    ["loader"],
+    buckets=(0.00001, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025),
+)
+
+# Change stream: cât de în urmă e worker-ul față de Mongo (clusterTime al ultimului eveniment)
+CHANGE_STREAM_LAG = Gauge(
+    "change_stream_lag_seconds",
+    "Întârzierea worker-ului de change stream față de ultimul eveniment aplicat",
+    multiprocess_mode="livemax",
+)
+
+CHANGE_STREAM_EVENTS = Counter(
+    "change_stream_events_total",
+    "Evenimente de change stream aplicate în cache",
+    ["operation"],
+)
+
+# Write-behind: cât durează un flush (bulk_write) și câte intrări așteaptă încă să ajungă în Mongo
+WRITE_BEHIND_FLUSH_SECONDS = Histogram(
+    "write_behind_flush_seconds",
+    "Durata unui flush write-behind (bulk_write + XACK)",
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+
+WRITE_BEHIND_BACKLOG = Gauge(
+    "write_behind_backlog",
+    "Intrări din stream-ul write-behind încă nescrise în Mongo (pending + lag)",
+    multiprocess_mode="livemax",
+)
+
+WRITE_BEHIND_DEAD_LETTERS = Counter(
+    "write_behind_dead_letters_total",
+    "Update-uri mutate în dead-letter stream după ce au epuizat retry-urile",
+)
+
+# --- CACHE: HIT / MISS / STALE / ERROR per familie de chei ---
+# family: movie | movie:hash | leaderboard | trending | geo
+# tier:   l1 (memoria procesului) | redis
+# result: hit | miss | stale | error  (marcajul negativ "!404" e tot un hit)
+# Hit ratio: sum(rate(cache_requests_total{result="hit"}[1m])) / sum(rate(cache_requests_total[1m]))
+CACHE_REQUESTS = Counter(
+    "cache_requests_total",
+    "Căutări în cache, pe familie de chei, nivel și rezultat",
+    ["family", "tier", "result"],
+)
+
+# Latența pe backend, separat de latența HTTP: unde se duce timpul unui request
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+
+REDIS_LATENCY = Histogram(
+    "redis_command_seconds",
+    "Round trip-ul unei comenzi (sau al unui pipeline) Redis",
+    ["operation"],
+    buckets=LATENCY_BUCKETS,
+)
+
+MONGO_LATENCY = Histogram(
+    "mongo_query_seconds",
+    "Durata unui query MongoDB (inclusiv round trip-ul până la Atlas)",
+    ["operation"],
+    buckets=LATENCY_BUCKETS,
+)
+
+SERIALIZATION_LATENCY = Histogram(
+    "cache_serialization_seconds",
+    "Timpul de encode / decode al unui document, pe codec",
+    ["codec", "operation"],
+    buckets=(0.000005, 0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.01),
+)
+
+# --- REDIS INFO: memorie și evicții ---
+# Cu maxmemory-policy allkeys-lru, evicted_keys care crește = cache-ul e prea mic (hit ratio scade)
+REDIS_INFO_INTERVAL = float(os.getenv("REDIS_INFO_INTERVAL", 15))  # secunde, 0 = dezactivat
+
+log = get_logger("metrics")
+
+# Toți workerii citesc același server Redis: contează ultima valoare citită
+REDIS_MEMORY_USED = Gauge("redis_memory_used_bytes", "used_memory din INFO memory", multiprocess_mode="mostrecent")
+REDIS_MEMORY_MAX = Gauge("redis_memory_max_bytes", "maxmemory din INFO memory (0 = nelimitat)", multiprocess_mode="mostrecent")
+REDIS_EVICTED_KEYS = Gauge("redis_evicted_keys", "evicted_keys din INFO stats (cumulativ de la pornirea Redis)",
+                           multiprocess_mode="mostrecent")
+REDIS_KEYSPACE = Gauge("redis_keyspace_lookups", "keyspace_hits / keyspace_misses din INFO stats", ["result"],
+                       multiprocess_mode="mostrecent")
+
+
+async def collect_redis_info():
+    redis_client = get_async_redis()
+    memory = await redis_client.info("memory")
+    stats = await redis_client.info("stats")
+    REDIS_MEMORY_USED.set(memory.get("used_memory", 0))
+    REDIS_MEMORY_MAX.set(memory.get("maxmemory", 0))
+    REDIS_EVICTED_KEYS.set(stats.get("evicted_keys", 0))
+    REDIS_KEYSPACE.labels("hit").set(stats.get("keyspace_hits", 0))
+    REDIS_KEYSPACE.labels("miss").set(stats.get("keyspace_misses", 0))
+
+
+async def run_redis_info_collector():
+    """Task de fundal (pornit în lifespan): citește INFO la REDIS_INFO_INTERVAL secunde."""
+    if REDIS_INFO_INTERVAL <= 0:
+        return
+    while True:
+        try:
+            await collect_redis_info()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            log.warning("redis_info_failed", error=str(e))
+        await asyncio.sleep(REDIS_INFO_INTERVAL)
+
+# --- CIRCUIT BREAKER + LOAD SHEDDING ---
+# Gauge-ul se scrie la fiecare schimbare de stare (0 = closed, 1 = half_open, 2 = open);
+# set_function nu merge în modul multiprocess (valoarea nu ajunge în fișierele mmap).
+CIRCUIT_BREAKER_STATE = Gauge(
+    "circuit_breaker_state",
+    "Starea circuit breaker-ului per backend (0 closed, 1 half_open, 2 open)",
+    ["backend"],
+    # Cel mai rău worker în viață (un breaker deschis oriunde se vede)
+    multiprocess_mode="livemax",
+)
+
+
+def _export_breaker_state(breaker):
+    CIRCUIT_BREAKER_STATE.labels(breaker.name).set(breaker.state)
+
+
+for _breaker in (redis_breaker, mongo_breaker):
+    _breaker.on_state_change = _export_breaker_state
+    _export_breaker_state(_breaker)
+
+MONGO_LOAD_SHED = Counter(
+    "mongo_load_shed_total",
+    "Query-uri Mongo refuzate (503) fiindcă Redis e jos și limita de concurență e atinsă",
+)
+
+# --- TRENDING: vizualizări trimise în Redis (flushed) sau pierdute (coadă plină / Redis jos) ---
+TRENDING_VIEWS = Counter(
+    "trending_views_total",
+    "Vizualizări /movie/{id} numărate pentru trending",
+    ["result"],
+)
+
+
+GEO_INGEST_DOCS = Counter(
+    "geo_ingest_docs_total",
+    "Cinematografe din theaters scrise în GEO set-uri (loaded / skipped la ingest, synced din change stream)",
+    ["result"],
+)
@@ -1,12 +1,37 @@
+import os
 import json
+import math
+import time
+import random
 import datetime
+from typing import NamedTuple
 from bson import ObjectId
-from .database import db, redis_client
+from pymongo import ReturnDocument
+from .database import db, redis_client, redis_raw_client
+from .codec import CodecError, get_codec, writer_codec
+from .leaderboards import movie_preview, queue_leaderboard_update
+from .log import get_logger
 
 CACHE_TTL = 200 # 5 minute
 
+# SOFT vs HARD TTL pentru movie:{id}
+# - până la CACHE_TTL (soft) valoarea e proaspătă
+# - între soft și CACHE_HARD_TTL (Redis EX) servim valoarea STALE și o reîmprospătăm în fundal
+CACHE_HARD_TTL = int(os.getenv("CACHE_HARD_TTL", CACHE_TTL * 3))
+XFETCH_BETA = float(os.getenv("XFETCH_BETA", 1.0)) # > 1 = refresh mai devreme
+
 limit_top_movies = 100
 
+# NEGATIVE CACHE: un ID inexistent ține câteva secunde un marcaj în movie:{id},
+# ca să nu ajungă la fiecare request în Atlas
+NEGATIVE_CACHE_TTL = int(os.getenv("NEGATIVE_CACHE_TTL", 30))
+NEGATIVE_CACHE_MARKER = b"!404"
+
+# Canalul Pub/Sub pe care workerii API golesc L1 și află de filmele noi (Bloom filter)
+INVALIDATION_CHANNEL = os.getenv("INVALIDATION_CHANNEL", "cache:invalidate")
+
+log = get_logger("cache")
+
 #1
 
 # --- HELPER: Serializator Custom ---
@@ -31,6 +56,148 @@ def clean_mongo_obj(obj):
     return obj
 
 
+# --- HELPER: Format valoare în cache ---
+# "{codec}:{soft_expires_at}:{delta}:{version}|{payload}"
+#   codec           = tag-ul formatului payload-ului (vezi app/codec.py)
+#   soft_expires_at = momentul (epoch) după care valoarea devine stale
+#   delta           = cât a durat recalcularea (secunde), folosit de XFetch
+#   version         = _v-ul documentului (crește la fiecare write-through)
+
+class CacheEntry(NamedTuple):
+    payload: bytes
+    soft_expires_at: float
+    delta: float
+    codec: str
+    version: int = 0
+
+
+def pack_cache_entry(payload: bytes, delta: float = 0.0, soft_ttl: int = CACHE_TTL, codec: str = "j", version: int = 0):
+    if isinstance(payload, str):
+        payload = payload.encode()
+    return f"{codec}:{time.time() + soft_ttl:.3f}:{delta:.4f}:{version}|".encode() + payload
+
+
+def movie_version(movie: dict):
+    """_v-ul documentului (0 pentru documentele scrise înainte de versionare)."""
+    try:
+        return int(movie.get("_v") or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def encode_cache_entry(movie: dict, delta: float = 0.0, soft_ttl: int = CACHE_TTL):
+    """Serializează filmul cu codec-ul curent (CACHE_CODEC) și adaugă header-ul."""
+    codec = writer_codec()
+    payload = codec.encode(movie, default=mongo_json_encoder)
+    return pack_cache_entry(payload, delta, soft_ttl, codec.tag, movie_version(movie))
+
+
+def unpack_cache_entry(raw):
+    """
+    Desface valoarea din Redis într-un CacheEntry. Acceptă și formatele vechi:
+    doar JSON (tratat ca proaspăt) și "{soft}:{delta}|json" (fără tag de codec).
+    """
+    if isinstance(raw, str):
+        raw = raw.encode()
+    header, found, payload = raw.partition(b"|")
+    if not found or raw.startswith(b"{"):
+        return CacheEntry(raw, math.inf, 0.0, "j")
+    fields = header.decode().split(":")
+    if len(fields) == 2:
+        fields.insert(0, "j")
+    codec, soft_expires_at, delta = fields[:3]
+    version = int(fields[3]) if len(fields) > 3 else 0
+    return CacheEntry(payload, float(soft_expires_at), float(delta or 0), codec, version)
+
+
+# --- VERSIONARE: compare-and-set pe movie:{id} ---
+# Două PUT-uri concurente pot ajunge în Redis în altă ordine decât în Mongo.
+# Fiecare scriere compară _v-ul nou cu cel din header-ul valorii existente (citim doar
+# primii 64 de bytes) și NU suprascrie o versiune mai nouă. Fără lock-uri.
+# Valorile vechi fără versiune contează ca versiunea 0.
+# Marcajul negativ (ID șters / inexistent) nu îl suprascrie decât un insert (replace_negative):
+# un MISS care a citit filmul din Mongo înainte de DELETE nu îl mai readuce în cache.
+
+VERSIONED_SET_LUA = """
+local head = redis.call('GETRANGE', KEYS[1], 0, 63)
+if head == '!404' then
+    if ARGV[4] ~= '1' then
+        return 0
+    end
+    head = ''
+end
+local header = string.match(head, '^([^|{]*)|')
+if header then
+    local fields = {}
+    for field in string.gmatch(header, '[^:]+') do
+        fields[#fields + 1] = field
+    end
+    if #fields >= 4 and (tonumber(fields[4]) or 0) > tonumber(ARGV[1]) then
+        return 0
+    end
+end
+redis.call('SET', KEYS[1], ARGV[3], 'EX', ARGV[2])
+return 1
+"""
+
+_versioned_set_scripts = {}  # tipul clientului / pipeline-ului -> Script
+
+
+def _versioned_set_script(client):
+    script = _versioned_set_scripts.get(type(client))
+    if script is None:
+        script = _versioned_set_scripts[type(client)] = client.register_script(VERSIONED_SET_LUA)
+    return script
+
+
+def versioned_set(client, cache_key: str, value: bytes, version: int, ttl: int = CACHE_HARD_TTL,
+                  replace_negative: bool = False):
+    """
+    SET EX doar dacă Redis nu are deja o versiune mai nouă (sync -> rezultat, async -> awaitable).
+    replace_negative=True doar pentru insert-uri: altfel marcajul negativ rămâne.
+    """
+    args = [version, ttl, value, int(replace_negative)]
+    return _versioned_set_script(client)(keys=[cache_key], args=args, client=client)
+
+
+def queue_versioned_set(pipe, cache_key: str, value: bytes, version: int, ttl: int = CACHE_HARD_TTL,
+                        replace_negative: bool = False):
+    """Ca versioned_set, dar adăugat într-un pipeline (EVALSHA; scriptul se încarcă la execute)."""
+    script = _versioned_set_script(pipe)
+    pipe.scripts.add(script)
+    pipe.evalsha(script.sha, 1, cache_key, version, ttl, value, int(replace_negative))
+
+
+def versioned_update(update_data: dict):
+    """Documentul de update Mongo: $set-ul cerut + $inc pe _v (clientul nu poate seta _v)."""
+    update_data = {field: value for field, value in update_data.items() if field != "_v"}
+    update = {"$inc": {"_v": 1}}
+    if update_data:
+        update["$set"] = update_data
+    return update
+
+
+def decode_cache_entry(entry: CacheEntry):
+    """Payload -> dict, cu codec-ul indicat de tag (CodecError dacă nu îl avem)."""
+    return get_codec(entry.codec).decode(entry.payload)
+
+
+def should_refresh_early(soft_expires_at: float, delta: float, beta: float = XFETCH_BETA):
+    """
+    XFetch (Vattani et al.): cu cât ne apropiem de expirare și cu cât recalcularea
+    e mai scumpă, cu atât e mai probabil să reîmprospătăm ACUM.
+    Refresh-urile cheilor fierbinți se împrăștie înainte de expirare.
+    """
+    if delta <= 0:
+        return False
+    return time.time() - delta * beta * math.log(1.0 - random.random()) >= soft_expires_at
+
+
+def is_movie_id(movie_id: str):
+    """Un ID care nu e ObjectId valid nu poate exista în Mongo: fără round trip."""
+    return ObjectId.is_valid(movie_id)
+
+
 def get_movie_no_cache(movie_id: str):
     try:
         oid = ObjectId(movie_id)
@@ -44,80 +211,150 @@ def get_movie_no_cache(movie_id: str):
 def get_movie_with_cache(movie_id: str):
     cache_key = f"movie:{movie_id}"
 
+    if not is_movie_id(movie_id):
+        return None, "Invalid ID"
+
     # verificam redis 
     try:
-        cached_data = redis_client.get(cache_key)
+        cached_data = redis_raw_client.get(cache_key)
+        if cached_data == NEGATIVE_CACHE_MARKER:
+            return None, "Redis (negative)"
         if cached_data:
-            print(f"⚡ CACHE HIT pentru {movie_id}")
-            return json.loads(cached_data), "Redis"
+            entry = unpack_cache_entry(cached_data)
+            # Varianta sincronă nu are refresh în fundal: valoarea stale = MISS
+            if time.time() < entry.soft_expires_at:
+                log.sampled("cache_hit", family="movie", movie_id=movie_id)
+                return decode_cache_entry(entry), "Redis"
+    except CodecError as e:
+        log.warning("cache_decode_failed", error=str(e))
     except Exception as e:
-        print(f"⚠️ Redis e jos! Eroare: {e}")
+        log.warning("redis_error", error=str(e))
     
     # 2. CACHE MISS -> Mongo
-    print(f"🐌 CACHE MISS pentru {movie_id}. Citesc din Mongo...")
+    log.sampled("cache_miss", family="movie", movie_id=movie_id)
 
-    movie, source = get_movie_no_cache(movie_id)
+    start = time.perf_counter()
+    result = get_movie_no_cache(movie_id)
+    delta = time.perf_counter() - start
+    if result is None:
+        return None, "MongoDB (Atlas)"
+    movie, source = result
 
-    if movie:
-        try:
-            redis_client.setex(
-                name=cache_key,
-                time=CACHE_TTL,
-                value=json.dumps(movie, default=mongo_json_encoder)
-            )
-        except Exception as e:
-            print(f"⚠️ Redis e jos! Eroare: {e}")
+    try:
+        if movie:
+            versioned_set(redis_raw_client, cache_key, encode_cache_entry(movie, delta), movie_version(movie))
+        else:
+            redis_raw_client.setex(cache_key, NEGATIVE_CACHE_TTL, NEGATIVE_CACHE_MARKER)
+    except Exception as e:
+        log.warning("redis_error", error=str(e))
 
     return movie, source
 
 #2
 
-def get_top_movies(limit=10):
+def get_movies_batch(movie_ids: list):
+    """
+    Varianta sincronă a batch-ului: un MGET, un $in pentru MISS-uri, un pipeline SETEX.
+    Returnează [(movie, source)] în ordinea lui movie_ids.
+    """
+    found = {}
+    misses = []
+    try:
+        values = redis_raw_client.mget([f"movie:{mid}" for mid in movie_ids])
+    except Exception as e:
+        log.warning("redis_error", error=str(e))
+        values = [None] * len(movie_ids)
+
+    for movie_id, cached_data in zip(movie_ids, values):
+        if cached_data == NEGATIVE_CACHE_MARKER:
+            found[movie_id] = (None, "Redis (negative)")
+            continue
+        try:
+            entry = unpack_cache_entry(cached_data) if cached_data else None
+            if entry and time.time() < entry.soft_expires_at:
+                found[movie_id] = (decode_cache_entry(entry), "Redis")
+                continue
+        except CodecError:
+            pass
+        misses.append(movie_id)
+
+    oids = []
+    for movie_id in misses:
+        found[movie_id] = (None, "MongoDB (Atlas)")
+        if is_movie_id(movie_id):
+            oids.append(ObjectId(movie_id))
+
+    if oids:
+        pipe = redis_raw_client.pipeline(transaction=False)
+        absent = {str(oid) for oid in oids}
+        for movie in db.movies.find({"_id": {"$in": oids}}):
+            movie = clean_mongo_obj(movie)
+            absent.discard(movie["_id"])
+            found[movie["_id"]] = (movie, "MongoDB (Atlas)")
+            queue_versioned_set(pipe, f"movie:{movie['_id']}", encode_cache_entry(movie), movie_version(movie))
+        for movie_id in absent:
+            pipe.setex(f"movie:{movie_id}", NEGATIVE_CACHE_TTL, NEGATIVE_CACHE_MARKER)
+        try:
+            pipe.execute()
+        except Exception as e:
+            log.warning("redis_error", error=str(e))
+
+    return [found[movie_id] for movie_id in movie_ids]
+
+
+def get_top_movies(limit=10, offset=0):
 
     leaderboard_key = "top_movies:imdb"
+    complete_key = "top_movies:imdb:complete"
 
     try:
-        top_ids = redis_client.zrevrange(leaderboard_key, 0, limit - 1) # returneaza ids de la 0 la 9/limita-1
-        if top_ids:
-            print("⚡ CACHE HIT pentru top movies")
-            movies = []
-            for movie_id in top_ids:
-                movie, source = get_movie_with_cache(str(movie_id))
-                if movie:
-                    movies.append(movie)
+        top_ids = redis_client.zrevrange(leaderboard_key, offset, offset + limit - 1) # returneaza ids de la offset la offset+limit-1
+        if top_ids and (len(top_ids) == limit or redis_client.exists(complete_key)):
+            log.sampled("cache_hit", family="leaderboard")
+            movies = [movie for movie, source in get_movies_batch(top_ids) if movie]
             return movies, "Redis ZSET"
     except Exception as e:
-        print(f"⚠️ Redis e jos! Eroare: {e}")
+        log.warning("redis_error", error=str(e))
     
-    print("🐌 CACHE MISS pentru top movies. Citesc din Mongo...")
+    log.sampled("cache_miss", family="leaderboard")
 
+    # Un singur query cu documentele complete + un singur pipeline (ZADD + SETEX)
+    depth = offset + limit
     top_movies_cursor = db.movies.find(
-        {"imdb.rating": {"$ne": ""}},
-        {"_id": 1, "imdb.rating": 1}
-    ).sort("imdb.rating", -1).limit(limit)
+        {"imdb.rating": {"$ne": ""}}
+    ).sort("imdb.rating", -1).limit(depth)
 
     results = []
 
     redis_data = {}
 
+    pipe = redis_raw_client.pipeline(transaction=False)
+
     for movie in top_movies_cursor:
-        movie_id = str(movie["_id"])
+        movie = clean_mongo_obj(movie)
+        movie_id = movie["_id"]
         rating = movie.get("imdb", {}).get("rating", 0)
 
         if rating:
             redis_data[movie_id] = rating
 
-        full_movie, source = get_movie_with_cache(movie_id)
-        results.append(full_movie)
+        queue_versioned_set(pipe, f"movie:{movie_id}", encode_cache_entry(movie), movie_version(movie))
+        results.append(movie)
 
-        if redis_data:
-            try:
-                redis_client.zadd(leaderboard_key, redis_data)
-                redis_client.expire(leaderboard_key, CACHE_TTL)
-            except Exception as e:
-                print(f"⚠️ Redis e jos! Eroare: {e}")
+    if redis_data:
+        pipe.zadd(leaderboard_key, redis_data)
+        pipe.expire(leaderboard_key, CACHE_TTL)
+    if len(results) < depth:
+        pipe.setex(complete_key, CACHE_TTL, 1)
+    else:
+        pipe.delete(complete_key)
 
-    return results, "MongoDB (Atlas)"
+    try:
+        pipe.execute()
+    except Exception as e:
+        log.warning("redis_error", error=str(e))
+
+    return results[offset:], "MongoDB (Atlas)"
 
 #3 WRITE-THROUGH STRATEGY
 
@@ -132,35 +369,34 @@ def update_movie_write_through(movie_id: str, update_data: dict):
     except:
         return None, "Invalid movie ID"
 
-    # 1. Update în MongoDB ÎNTÂI (pentru siguranță)
+    # 1. Update în MongoDB ÎNTÂI (pentru siguranță), cu documentul nou în același round trip
     try:
-        result = db.movies.update_one(
+        movie = clean_mongo_obj(db.movies.find_one_and_update(
             {"_id": oid},
-            {"$set": update_data}
-        )
+            versioned_update(update_data),
+            return_document=ReturnDocument.AFTER
+        ))
         
-        if result.matched_count == 0:
+        if movie is None:
             return None, "Movie not found in MongoDB"
         
-        print(f"✅ Datele au fost update în MongoDB pentru {movie_id}")
+        log.debug("mongo_updated", movie_id=movie_id)
     except Exception as e:
         return None, f"MongoDB error: {e}"
 
-    # 2. Aduna datele complete din MongoDB (pentru a le casha)
+    # 2. Scrie documentul întors de Mongo în cache
     try:
-        movie = db.movies.find_one({"_id": oid})
         if movie:
             cache_key = f"movie:{movie_id}"
             
-            # 3. Scrie în Cache
-            redis_client.setex(
-                name=cache_key,
-                time=CACHE_TTL,
-                value=json.dumps(clean_mongo_obj(movie), default=mongo_json_encoder)
-            )
-            print(f"✅ Datele au fost update în Redis cache pentru {movie_id}")
+            # 3. Scrie în Cache (documentul + leaderboard-urile + preview-ul, într-o tranzacție)
+            pipe = redis_raw_client.pipeline(transaction=True)
+            queue_versioned_set(pipe, cache_key, encode_cache_entry(movie), movie_version(movie))
+            queue_leaderboard_update(pipe, movie_id, movie, CACHE_TTL)
+            pipe.execute()
+            log.debug("cache_updated", movie_id=movie_id)
             
-            return clean_mongo_obj(movie), "Write-Through: Updated in MongoDB & Redis"
+            return movie, "Write-Through: Updated in MongoDB & Redis"
     except Exception as e:
         return None, f"Redis cache error: {e}"
 
@@ -184,15 +420,18 @@ def delete_movie_write_through(movie_id: str):
         if result.deleted_count == 0:
             return False, "Movie not found in MongoDB"
         
-        print(f"✅ Filmul a fost șters din MongoDB")
+        log.debug("mongo_deleted", movie_id=movie_id)
     except Exception as e:
         return False, f"MongoDB error: {e}"
 
     # 2. Șterge din Cache
     try:
         cache_key = f"movie:{movie_id}"
-        redis_client.delete(cache_key)
-        print(f"✅ Filmul a fost șters din Redis cache")
+        pipe = redis_raw_client.pipeline(transaction=True)
+        pipe.setex(cache_key, NEGATIVE_CACHE_TTL, NEGATIVE_CACHE_MARKER)
+        queue_leaderboard_update(pipe, movie_id, None, CACHE_TTL)
+        pipe.execute()
+        log.debug("cache_deleted", movie_id=movie_id)
         return True, "Write-Through: Deleted from MongoDB & Redis"
     except Exception as e:
         return False, f"Redis error: {e}"
@@ -205,51 +444,57 @@ def create_movie_write_through(movie_data: dict):
     """
     try:
         # 1. Insert în MongoDB
-        result = db.movies.insert_one(movie_data)
+        document = dict(movie_data, _v=1)
+        result = db.movies.insert_one(document)
         movie_id = str(result.inserted_id)
         
-        print(f"✅ Filmul a fost creat în MongoDB cu ID: {movie_id}")
+        log.debug("mongo_created", movie_id=movie_id)
         
-        # 2. Adună datele complete (cu _id)
-        movie = db.movies.find_one({"_id": result.inserted_id})
+        # 2. Documentul complet e cel inserat (insert_one a adăugat _id) -> fără find_one
+        movie = clean_mongo_obj(document)
         
         if movie:
             cache_key = f"movie:{movie_id}"
             
-            # 3. Scrie în Cache
-            redis_client.setex(
-                name=cache_key,
-                time=CACHE_TTL,
-                value=json.dumps(clean_mongo_obj(movie), default=mongo_json_encoder)
-            )
-            print(f"✅ Filmul a fost salvat în Redis cache")
+            # 3. Scrie în Cache (+ leaderboard-uri)
+            pipe = redis_raw_client.pipeline(transaction=True)
+            queue_versioned_set(pipe, cache_key, encode_cache_entry(movie), movie_version(movie), replace_negative=True)
+            queue_leaderboard_update(pipe, movie_id, movie, CACHE_TTL)
+            pipe.execute()
+            log.debug("cache_created", movie_id=movie_id)
+
+            # 4. Workerii API adaugă ID-ul în Bloom filter (altfel 404 până la reseed)
+            try:
+                redis_client.publish(INVALIDATION_CHANNEL, json.dumps([cache_key, f"movie:hash:{movie_id}"]))
+            except Exception as e:
+                log.warning("invalidation_publish_failed", error=str(e))
             
-            return clean_mongo_obj(movie), "Write-Through: Created in MongoDB & Redis"
+            return movie, "Write-Through: Created in MongoDB & Redis"
     except Exception as e:
         return None, f"Error: {e}"
     
 #4 GEO Indexing for Theaters
     
+# Format: (Longitudine, Latitudine, Nume)
+# Atenție: Redis cere Longitudine PRIMA, apoi Latitudine
+BUCHAREST_THEATERS = [
+    (26.0534, 44.4304, "Cinema City AFI Cotroceni"),
+    (26.0963, 44.4268, "Cinema City Sun Plaza"),
+    (26.0883, 44.4933, "Grand Cinema Baneasa"),
+    (26.1202, 44.4206, "Hollywood Multiplex"),
+    (26.0145, 44.4355, "Cinema Plaza Romania"),
+    (26.1025, 44.4410, "Cinema Elvire Popesco (Centru)")
+]
+
 def seed_theaters():
     key = "theaters:bucharest"
     
-    # Format: (Longitudine, Latitudine, Nume)
-    # Atenție: Redis cere Longitudine PRIMA, apoi Latitudine
-    locations = [
-        (26.0534, 44.4304, "Cinema City AFI Cotroceni"),
-        (26.0963, 44.4268, "Cinema City Sun Plaza"),
-        (26.0883, 44.4933, "Grand Cinema Baneasa"),
-        (26.1202, 44.4206, "Hollywood Multiplex"),
-        (26.0145, 44.4355, "Cinema Plaza Romania"),
-        (26.1025, 44.4410, "Cinema Elvire Popesco (Centru)")
-    ]
-    
     try:
         # Ștergem cheia veche ca să nu duplicăm
         redis_client.delete(key)
         
         # Adăugăm punctele
-        count = redis_client.geoadd(key, [coord for loc in locations for coord in loc])
+        count = redis_client.geoadd(key, [coord for loc in BUCHAREST_THEATERS for coord in loc])
         return f"Am adăugat {count} cinematografe în Redis GeoIndex."
     except Exception as e:
         return f"Eroare Redis Geo: {e}"
@@ -291,7 +536,7 @@ def find_nearby_theaters(lat: float, lon: float, radius_km: int):
             
         return clean_results
     except Exception as e:
-        print(f"Geo Error: {e}")
+        log.warning("geo_error", error=str(e))
         return []
     
 def cache_movie_as_hash(movie_id: str, movie_data: dict):
@@ -325,14 +570,17 @@ def get_movie_hash_preview(movie_id: str):
     
 def get_top_movies_optimized(limit=limit_top_movies):
     leaderboard_key = "leaderboard:top_movies_opt"
+    complete_key = "leaderboard:top_movies_opt:complete"
     
     # 1. Verificăm dacă avem date în Redis
     top_ids = redis_client.zrevrange(leaderboard_key, 0, limit - 1)
+    # ZREM-urile din upsert micșorează ZSET-ul: o pagină incompletă e HIT doar cu marcajul complete
+    complete = top_ids and (len(top_ids) == limit or redis_client.exists(complete_key))
     
     source_msg = "Redis (ZSET + Hash Pipeline)"
     
-    # 2. Dacă e gol, facem Seed ACUM
-    if not top_ids:
+    # 2. Dacă e gol sau incomplet, facem Seed ACUM
+    if not complete:
         success = seed_optimized_cache(limit + 10) 
         if success:
             # Încercăm să citim iar după seed
@@ -369,7 +617,7 @@ def get_top_movies_optimized(limit=limit_top_movies):
 
 
 def seed_optimized_cache(limit=limit_top_movies):
-    print("⚙️ Seeding Optimized Cache...")
+    log.info("leaderboard_seed", limit=limit)
     # Luăm filmele cu rating bun din Mongo
     pipeline = [
         {"$match": {"imdb.rating": {"$ne": ""}}}, 
@@ -385,12 +633,7 @@ def seed_optimized_cache(limit=limit_top_movies):
         mid = str(m['_id'])
         # 1. Creăm Hash-ul (Doar date esențiale)
         hash_key = f"movie:hash:{mid}"
-        mapping = {
-            "title": str(m.get('title', 'N/A')),
-            "year": str(m.get('year', 'N/A')),
-            "rating": str(m.get('imdb', {}).get('rating', 0)),
-            "poster": str(m.get('poster', '')) # Opțional, pt UI
-        }
+        mapping = movie_preview(m)
         pipe.hset(hash_key, mapping=mapping)
         pipe.expire(hash_key, CACHE_TTL)
         
@@ -401,6 +644,12 @@ def seed_optimized_cache(limit=limit_top_movies):
             pipe.zadd(leaderboard_key, {mid: score})
         except:
             pass
-            
+
+    pipe.expire(leaderboard_key, CACHE_TTL)
+    # Mongo a întors mai puține decât am cerut: ZSET-ul are tot, paginile scurte sunt HIT
+    if len(movies) < limit:
+        pipe.setex("leaderboard:top_movies_opt:complete", CACHE_TTL, 1)
+    else:
+        pipe.delete("leaderboard:top_movies_opt:complete")
     pipe.execute()
     return True
\ No newline at end of file
@@ -0,0 +1,59 @@
+import asyncio
+
+# --- SINGLE-FLIGHT (Request Coalescing) ---
+# Când o cheie populară expiră, toate request-urile concurente dau MISS.
+# În loc ca fiecare să facă propriul find_one în Mongo, primul pornește fetch-ul,
+# iar ceilalți așteaptă același rezultat.
+
+
+class SingleFlight:
+    """Un singur apel în zbor per cheie, în procesul curent."""
+
+    def __init__(self):
+        self._inflight = {}
+
+    def _forget(self, key, task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Marcăm excepția ca "citită" chiar dacă toți cei care așteptau au fost anulați
+        if not task.cancelled():
+            task.exception()
+
+    async def do(self, key, fn):
+        """
+        Rulează fn() o singură dată pentru toate apelurile concurente cu aceeași cheie.
+        fn rulează într-un Task separat: dacă primul client se deconectează,
+        ceilalți primesc totuși rezultatul.
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._forget(key, t))
+        return await asyncio.shield(task)
+
+    async def do_many(self, keys, fn):
+        """
+        Ca do(), dar pentru mai multe chei deodată: cheile deja în zbor sunt doar
+        așteptate, iar restul sunt încărcate printr-un SINGUR apel fn(chei_noi),
+        care întoarce un dict {cheie: rezultat}.
+        """
+        new_keys = [k for k in dict.fromkeys(keys) if k not in self._inflight]
+        if new_keys:
+            batch = asyncio.ensure_future(fn(new_keys))
+            for key in new_keys:
+                task = asyncio.ensure_future(self._pick(batch, key))
+                self._inflight[key] = task
+                task.add_done_callback(lambda t, k=key: self._forget(k, t))
+
+        tasks = {k: self._inflight[k] for k in dict.fromkeys(keys)}
+        results = await asyncio.gather(*(asyncio.shield(t) for t in tasks.values()))
+        return dict(zip(tasks, results))
+
+    @staticmethod
+    async def _pick(batch, key):
+        results = await batch
+        return results.get(key)
+
+    def inflight(self):
+        return len(self._inflight)
@@ -0,0 +1,174 @@
+import os
+import sys
+import time
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from urllib.parse import parse_qs
+from .log import get_logger
+
+# --- TRACING per request (Server-Timing) ---
+# latency_ms spune doar cât a durat tot request-ul. Fiecare apel la Redis / Mongo și
+# fiecare encode/decode deschide un span(); duratele (perf_counter, monoton) se adună
+# per nume în contextul request-ului și pleacă în header-ul Server-Timing:
+#   Server-Timing: redis;dur=0.41;desc="2 calls", mongo;dur=38.2, serialize;dur=0.05, app;dur=1.1, total;dur=39.8
+# "app" = total minus span-uri: framework, validare, event loop ocupat cu alte request-uri.
+# Span-urile din asyncio.gather se suprapun, deci suma lor poate depăși total.
+# Chrome DevTools (Network -> Timing) afișează header-ul direct.
+SERVER_TIMING = os.getenv("SERVER_TIMING", "1") == "1"
+
+# --- PROFILER (opt-in per request) ---
+# PROFILING=1 activează modul; un request cu header-ul "X-Profile: 1" sau cu ?profile=1
+# e eșantionat la PROFILE_INTERVAL_MS. Dacă durează peste PROFILE_SLOW_MS, stack-urile
+# se scriu în PROFILE_DIR în format "folded" (flamegraph.pl, speedscope, inferno).
+# Eșantioanele sunt ale thread-ului event loop-ului: includ și alte request-uri concurente,
+# iar timpul petrecut așteptând I/O apare ca select/epoll.
+PROFILING = os.getenv("PROFILING", "0") == "1"
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", 1))
+PROFILE_SLOW_MS = float(os.getenv("PROFILE_SLOW_MS", 100))
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+
+_timings = ContextVar("request_timings", default=None)
+
+log = get_logger("tracing")
+
+
+class RequestTimings:
+    """Span-urile unui request: nume -> (secunde, apeluri)."""
+    __slots__ = ("start", "spans")
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.spans = {}
+
+    def add(self, name: str, seconds: float):
+        total, calls = self.spans.get(name, (0.0, 0))
+        self.spans[name] = (total + seconds, calls + 1)
+
+    def elapsed(self):
+        return time.perf_counter() - self.start
+
+    def header(self):
+        total = self.elapsed()
+        parts = []
+        for name, (seconds, calls) in self.spans.items():
+            entry = f"{name};dur={seconds * 1000:.2f}"
+            if calls > 1:
+                entry += f';desc="{calls} calls"'
+            parts.append(entry)
+        spent = sum(seconds for seconds, _ in self.spans.values())
+        parts.append(f"app;dur={max(0.0, total - spent) * 1000:.2f}")
+        parts.append(f"total;dur={total * 1000:.2f}")
+        return ", ".join(parts)
+
+
+@contextmanager
+def span(name: str, histogram=None):
+    """
+    Măsoară blocul (perf_counter) și îl adaugă la Server-Timing-ul request-ului curent;
+    histogram (opțional) = child-ul Prometheus care primește și el observația.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        if histogram is not None:
+            histogram.observe(elapsed)
+        timings = _timings.get()
+        if timings is not None:
+            timings.add(name, elapsed)
+
+
+async def traced(name: str, awaitable, histogram=None):
+    """span() pentru un awaitable pornit prin asyncio.gather."""
+    with span(name, histogram):
+        return await awaitable
+
+
+class SamplingProfiler:
+    """Thread care eșantionează stack-ul unui alt thread și numără stack-urile (format folded)."""
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, name="request-profiler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        return self.stacks
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def write_folded(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+def _wants_profile(scope):
+    if not PROFILING:
+        return False
+    for name, value in scope.get("headers", []):
+        if name == b"x-profile":
+            return value not in (b"0", b"")
+    query = parse_qs(scope.get("query_string", b"").decode())
+    return query.get("profile", ["0"])[-1] not in ("0", "false", "")
+
+
+class ServerTimingMiddleware:
+    """
+    Middleware ASGI pur (fără BaseHTTPMiddleware, deci fără task în plus per request):
+    deschide contextul de span-uri, adaugă Server-Timing la răspuns și pornește profiler-ul la cerere.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not (SERVER_TIMING or PROFILING):
+            return await self.app(scope, receive, send)
+
+        timings = RequestTimings()
+        token = _timings.set(timings)
+        profiler = None
+        if _wants_profile(scope):
+            profiler = SamplingProfiler(threading.get_ident(), PROFILE_INTERVAL_MS / 1000)
+            profiler.start()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start" and SERVER_TIMING:
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", timings.header().encode()))
+                message = dict(message, headers=headers)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _timings.reset(token)
+            if profiler is not None:
+                profiler.stop()
+                elapsed_ms = timings.elapsed() * 1000
+                if elapsed_ms >= PROFILE_SLOW_MS and profiler.stacks:
+                    name = scope["path"].strip("/").replace("/", "_") or "root"
+                    path = os.path.join(PROFILE_DIR, f"{int(time.time() * 1000)}-{name}.folded")
+                    profiler.write_folded(path)
+                    log.info("profile_saved", path=path, duration_ms=round(elapsed_ms, 1), samples=sum(profiler.stacks.values()))
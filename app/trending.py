@@ -0,0 +1,160 @@
+import os
+import time
+import asyncio
+from .database import get_async_redis
+from .metrics import TRENDING_VIEWS, REDIS_LATENCY
+from .tracing import span
+from .log import get_logger
+
+# --- TRENDING: vizualizări reale, cu scor care scade exponențial în timp ---
+# Fiecare GET /movie/{id} găsit face doar views[id] += 1 în memoria procesului (fără await).
+# La TRENDING_FLUSH_MS, un task de fundal trimite tot ce s-a adunat într-un singur pipeline:
+# ZINCRBY în bucket-ul curent de 5 minute și în cel al orei curente (ZSET-uri cu TTL).
+#
+# La TRENDING_REFRESH_SECONDS, UN worker (lock SET NX) recalculează clasamentele:
+#   trending:movies:1h  = ZUNIONSTORE pe bucket-urile de 5 min din ultima oră
+#   trending:movies:24h = ZUNIONSTORE pe bucket-urile orare din ultimele 24h
+#   trending:movies     = ZUNIONSTORE 1h + 24h (WEIGHTS 1, TRENDING_DAILY_WEIGHT)
+# Fiecare bucket intră cu WEIGHT = 0.5 ^ (vârstă / half-life): o vizualizare veche de un
+# half-life contează pe jumătate. Decay-ul e aplicat la citire, deci nu rescriem scoruri.
+TRENDING = os.getenv("TRENDING", "1") == "1"
+TRENDING_FLUSH_MS = float(os.getenv("TRENDING_FLUSH_MS", 1000))
+TRENDING_MAX_PENDING = int(os.getenv("TRENDING_MAX_PENDING", 50_000))   # filme distincte între două flush-uri
+TRENDING_BUCKET_SECONDS = int(os.getenv("TRENDING_BUCKET_SECONDS", 300))
+TRENDING_HOURLY_HALF_LIFE = float(os.getenv("TRENDING_HOURLY_HALF_LIFE", 1800))    # secunde
+TRENDING_DAILY_HALF_LIFE = float(os.getenv("TRENDING_DAILY_HALF_LIFE", 6 * 3600))  # secunde
+# 1/24: fereastra zilnică devine "vizualizări pe oră", comparabilă cu cea orară
+TRENDING_DAILY_WEIGHT = float(os.getenv("TRENDING_DAILY_WEIGHT", 1 / 24))
+TRENDING_REFRESH_SECONDS = float(os.getenv("TRENDING_REFRESH_SECONDS", 60))
+TRENDING_SIZE = int(os.getenv("TRENDING_SIZE", 1000))                    # câte filme păstrează clasamentele
+
+TRENDING_KEY = "trending:movies"
+TRENDING_WINDOW_KEYS = {"hourly": "trending:movies:1h", "daily": "trending:movies:24h", "combined": TRENDING_KEY}
+TRENDING_LOCK_KEY = "trending:movies:refresh_lock"
+HOUR = 3600
+
+log = get_logger("trending")
+
+
+def minute_bucket_key(index: int):
+    return f"trending:movies:m:{index}"
+
+
+def hour_bucket_key(index: int):
+    return f"trending:movies:h:{index}"
+
+
+def decay_weights(now: float, size: int, count: int, half_life: float, key_fn):
+    """{cheie bucket: 0.5 ^ (vârsta mijlocului bucket-ului / half_life)} pentru ultimele count bucket-uri."""
+    current = int(now // size)
+    weights = {}
+    for index in range(current - count + 1, current + 1):
+        age = max(0.0, now - (index + 0.5) * size)
+        weights[key_fn(index)] = 0.5 ** (age / half_life)
+    return weights
+
+
+class ViewCounter:
+    """Contoare per proces, golite periodic în Redis cu un singur pipeline."""
+
+    def __init__(self, max_pending: int = TRENDING_MAX_PENDING):
+        self.max_pending = max_pending
+        self.views = {}
+        self.dropped = 0
+
+    def record(self, movie_id: str):
+        """Pe calea de citire: un dict lookup, fără I/O."""
+        views = self.views
+        if movie_id in views:
+            views[movie_id] += 1
+        elif len(views) < self.max_pending:
+            views[movie_id] = 1
+        else:
+            self.dropped += 1
+
+    async def flush(self):
+        """Trimite vizualizările adunate (ZINCRBY în bucket-ul de minute și în cel orar)."""
+        if self.dropped:
+            TRENDING_VIEWS.labels("dropped").inc(self.dropped)
+            self.dropped = 0
+        if not self.views:
+            return 0
+        views, self.views = self.views, {}
+
+        now = time.time()
+        minute_key = minute_bucket_key(int(now // TRENDING_BUCKET_SECONDS))
+        hour_key = hour_bucket_key(int(now // HOUR))
+        pipe = get_async_redis().pipeline(transaction=False)
+        for movie_id, count in views.items():
+            pipe.zincrby(minute_key, count, movie_id)
+            pipe.zincrby(hour_key, count, movie_id)
+        # Bucket-urile trăiesc cât fereastra lor (+ unul de rezervă)
+        pipe.expire(minute_key, HOUR + TRENDING_BUCKET_SECONDS)
+        pipe.expire(hour_key, 25 * HOUR)
+        total = sum(views.values())
+        try:
+            with span("redis", REDIS_LATENCY.labels("trending_flush")):
+                await pipe.execute()
+        except Exception:
+            # Vizualizările sunt aproximative: pierdem batch-ul, nu blocăm și nu creștem memoria
+            TRENDING_VIEWS.labels("dropped").inc(total)
+            raise
+        TRENDING_VIEWS.labels("flushed").inc(total)
+        return len(views)
+
+
+movie_views = ViewCounter()
+
+
+def record_view(movie_id: str):
+    if TRENDING:
+        movie_views.record(movie_id.lower())
+
+
+async def refresh_trending(now: float = None):
+    """Recalculează clasamentele orar, zilnic și combinat (trei ZUNIONSTORE într-un pipeline)."""
+    now = time.time() if now is None else now
+    hourly = decay_weights(now, TRENDING_BUCKET_SECONDS, -(-HOUR // TRENDING_BUCKET_SECONDS),
+                           TRENDING_HOURLY_HALF_LIFE, minute_bucket_key)
+    daily = decay_weights(now, HOUR, 24, TRENDING_DAILY_HALF_LIFE, hour_bucket_key)
+
+    hourly_key, daily_key = TRENDING_WINDOW_KEYS["hourly"], TRENDING_WINDOW_KEYS["daily"]
+    pipe = get_async_redis().pipeline(transaction=False)
+    pipe.zunionstore(hourly_key, hourly)
+    pipe.zunionstore(daily_key, daily)
+    pipe.zunionstore(TRENDING_KEY, {hourly_key: 1.0, daily_key: TRENDING_DAILY_WEIGHT})
+    for key in TRENDING_WINDOW_KEYS.values():
+        # Păstrăm doar primele TRENDING_SIZE (coada lungă nu e "trending")
+        pipe.zremrangebyrank(key, 0, -(TRENDING_SIZE + 1))
+        pipe.expire(key, 25 * HOUR)
+    with span("redis", REDIS_LATENCY.labels("trending_refresh")):
+        await pipe.execute()
+
+
+async def run_trending_worker():
+    """Task de fundal (pornit în lifespan): flush la TRENDING_FLUSH_MS, refresh la TRENDING_REFRESH_SECONDS."""
+    if not TRENDING:
+        return
+    redis_client = get_async_redis()
+    next_refresh = 0.0
+    try:
+        while True:
+            await asyncio.sleep(TRENDING_FLUSH_MS / 1000)
+            try:
+                await movie_views.flush()
+                if time.monotonic() >= next_refresh:
+                    next_refresh = time.monotonic() + TRENDING_REFRESH_SECONDS
+                    # Un singur worker per interval face ZUNIONSTORE-urile
+                    if await redis_client.set(TRENDING_LOCK_KEY, os.getpid(), nx=True,
+                                              px=int(TRENDING_REFRESH_SECONDS * 1000)):
+                        await refresh_trending()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.warning("trending_flush_failed", error=str(e))
+    finally:
+        # La oprire nu pierdem ultimele vizualizări
+        try:
+            await movie_views.flush()
+        except Exception as e:
+            log.warning("trending_flush_failed", error=str(e))
@@ -4,6 +4,7 @@ import pandas as pd
 import plotly.express as px
 import streamlit.components.v1 as components
 import json
+import os
 
 limit_top_movies = 100
 
@@ -298,7 +299,7 @@ with tabs[3]:
                 data = res.json()
                 st.info(f"Titlu primit: **{data['data']['title']}**")
                 st.caption(f"Sursa: {data['source']}")
-                if "Redis" in data['source']:
+                if "Redis" in data['source'] or "L1" in data['source']:
                     st.success("✅ Cache HIT")
                 else:
                     st.warning("⚠️ Cache MISS (Data loaded from Mongo)")
@@ -360,31 +361,39 @@ with col_info3:
     - 🚀 Scalabilitate superioară
     """)
 
-#4 <iframe src="http://localhost:3000/d-solo/ff123456/movie-api-cache-performance?orgId=1&from=1769092191931&to=1769092491931&timezone=browser&var-DS_PROMETHEUS=afay1uw6uhiwwe&refresh=5s&theme=dark&panelId=panel-3&__feature.dashboardSceneSolo=true" width="450" height="200" frameborder="0"></iframe>
-
-
 st.divider()
 st.subheader("📈 Real-Time Performance (Grafana Embed)")
 
+# Panourile vin din dashboard-ul provizionat (grafana/dashboards/movie-api-cache.json),
+# deci UID-ul și ID-urile panourilor sunt fixe, nu URL-uri copiate din Grafana.
+GRAFANA_URL = os.getenv("GRAFANA_URL", "http://localhost:3000")
+GRAFANA_DASHBOARD = "movie-api-cache/movie-api-cache-performance"
+
+
+def grafana_panel(panel_id: int, height: int = 300):
+    components.iframe(
+        src=f"{GRAFANA_URL}/d-solo/{GRAFANA_DASHBOARD}?orgId=1&timezone=browser&refresh=5s&theme=dark&panelId={panel_id}",
+        height=height,
+        scrolling=False
+    )
+
+
 # Creăm 2 coloane pentru grafice
 g_col1, g_col2 = st.columns(2)
 
 with g_col1:
     st.markdown("**Latency GET /movie/{id}**")
-    components.iframe(
-        src="http://localhost:3000/d-solo/endpoint_focused_v1/movie-api-focused-view?orgId=1&timezone=browser&var-DS_PROMETHEUS=afay1uw6uhiwwe&refresh=5s&panelId=panel-1&__feature.dashboardSceneSolo=true",
-        height=300,
-        scrolling=False
-    )
+    grafana_panel(1)
+    st.markdown("**Cache hit ratio (movie, movie:hash, leaderboard, geo)**")
+    grafana_panel(3)
 
 with g_col2:
     st.markdown("**Latency GET /top-movies**")
-    # ÎNLOCUIEȘTE URL-ul de mai jos cu cel copiat de tine pentru Panel-ul 2 (Latency)
-    components.iframe(
-        src="http://localhost:3000/d-solo/endpoint_focused_v1/movie-api-focused-view?orgId=1&timezone=browser&var-DS_PROMETHEUS=afay1uw6uhiwwe&refresh=5s&panelId=panel-3&__feature.dashboardSceneSolo=true",
-        height=300,
-        scrolling=False
-    )
+    grafana_panel(2)
+    st.markdown("**Redis vs MongoDB (p95 per operație)**")
+    grafana_panel(5)
+
+st.markdown(f"[📊 Dashboard complet în Grafana]({GRAFANA_URL}/d/{GRAFANA_DASHBOARD})")
 
 
 st.divider()
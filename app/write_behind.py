@@ -0,0 +1,308 @@
+import os
+import copy
+import json
+import time
+import random
+import socket
+import asyncio
+import weakref
+from bson import ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from redis.exceptions import LockError, ResponseError, WatchError
+from .database import get_async_db, get_async_redis, get_async_redis_raw, get_async_redis_blocking
+from .leaderboards import queue_leaderboard_update
+from .log import get_logger
+from .metrics import WRITE_BEHIND_FLUSH_SECONDS, WRITE_BEHIND_BACKLOG, WRITE_BEHIND_DEAD_LETTERS
+from .async_service import get_movie_with_cache, movie_may_exist, publish_invalidation
+from .codec import CodecError
+from .service import (
+    CACHE_TTL,
+    NEGATIVE_CACHE_MARKER,
+    decode_cache_entry,
+    encode_cache_entry,
+    movie_version,
+    queue_versioned_set,
+    unpack_cache_entry,
+    versioned_update
+)
+
+# --- WRITE-BEHIND (opt-in, WRITE_BEHIND=1) ---
+# Write-through plătește două round trip-uri la Atlas per PUT (update_one + find_one).
+# Pentru câmpuri "fierbinți" (rating, vizualizări) aplicăm update-ul ÎNTÂI în Redis
+# și îl punem într-un Redis Stream; un worker din consumer group îl duce în Mongo:
+#   - coalescing per document (mai multe $set pe același film -> un singur UpdateOne)
+#   - flush cu bulk_write la WRITE_BEHIND_BATCH intrări sau la WRITE_BEHIND_FLUSH_MS
+#   - ordinea per document: un singur consumer activ (lock în Redis), intrările în ordinea din stream
+#   - retry cu backoff, apoi dead-letter stream (WRITE_BEHIND_DLQ)
+# Compromis: până la flush, Mongo e în urmă față de Redis (vezi write_behind_backlog).
+
+WRITE_BEHIND = os.getenv("WRITE_BEHIND", "0") == "1"
+WRITE_BEHIND_STREAM = os.getenv("WRITE_BEHIND_STREAM", "write_behind:movies")
+WRITE_BEHIND_DLQ = os.getenv("WRITE_BEHIND_DLQ", "write_behind:movies:dlq")
+WRITE_BEHIND_GROUP = "mongo_flusher"
+WRITE_BEHIND_BATCH = int(os.getenv("WRITE_BEHIND_BATCH", 500))
+WRITE_BEHIND_FLUSH_MS = int(os.getenv("WRITE_BEHIND_FLUSH_MS", 1000))
+WRITE_BEHIND_MAX_RETRIES = int(os.getenv("WRITE_BEHIND_MAX_RETRIES", 5))
+WRITE_BEHIND_CAS_RETRIES = int(os.getenv("WRITE_BEHIND_CAS_RETRIES", 20))  # PUT-uri concurente pe același film
+
+LEADER_KEY = "write_behind:movies:leader"
+LEADER_TTL = 15  # secunde
+
+CONSUMER_NAME = f"{socket.gethostname()}-{os.getpid()}"
+
+# movie_id -> asyncio.Lock, cât timp îl ține cineva (intrările dispar singure)
+_update_locks = weakref.WeakValueDictionary()
+
+log = get_logger("write_behind")
+
+
+def apply_set(movie: dict, update_data: dict):
+    """Aplică un $set pe documentul din cache (acceptă și chei cu puncte: "imdb.rating")."""
+    for path, value in update_data.items():
+        target = movie
+        *parents, field = path.split(".")
+        for part in parents:
+            if not isinstance(target.get(part), dict):
+                target[part] = {}
+            target = target[part]
+        target[field] = value
+    return movie
+
+
+async def update_movie_write_behind(movie_id: str, update_data: dict):
+    """
+    WRITE-BEHIND UPDATE: Redis imediat (document + leaderboard-uri + intrare în stream,
+    într-o singură tranzacție), Mongo mai târziu prin worker-ul de flush.
+
+    Read-modify-write optimist: WATCH movie:{id}, citim documentul, aplicăm $set-ul și _v + 1,
+    apoi MULTI/EXEC. Dacă alt PUT a scris cheia între timp, EXEC eșuează și reluăm pe documentul
+    nou (WRITE_BEHIND_CAS_RETRIES), deci două update-uri concurente nu primesc același _v.
+    În același proces update-urile pe un film trec pe rând (lock local), ca retry-urile să
+    rămână pentru conflictele dintre workeri.
+    """
+    if not movie_may_exist(movie_id):
+        return None, "Invalid movie ID"
+
+    lock = _update_locks.setdefault(movie_id, asyncio.Lock())
+    async with lock:
+        return await _update_cached_movie(movie_id, update_data)
+
+
+async def _update_cached_movie(movie_id: str, update_data: dict):
+
+    # _v crește și în Mongo la flush ($inc)
+    update_data = {field: value for field, value in update_data.items() if field != "_v"}
+    cache_key = f"movie:{movie_id}"
+
+    for attempt in range(WRITE_BEHIND_CAS_RETRIES):
+        if attempt:
+            # Backoff cu jitter: conflictele repetate nu se mai sincronizează între ele
+            await asyncio.sleep(random.uniform(0, min(0.05, 0.001 * 2 ** attempt)))
+        try:
+            async with get_async_redis_raw().pipeline(transaction=True) as pipe:
+                await pipe.watch(cache_key)
+                current = await _watched_movie(pipe, cache_key)
+                if current is None:
+                    # MISS: o singură citire din Mongo (umple și cache-ul -> WATCH-ul ne trimite la retry)
+                    current, _ = await get_movie_with_cache(movie_id)
+                if not current:
+                    return None, "Movie not found"
+
+                # Copie: dict-ul poate fi partajat cu L1
+                movie = apply_set(copy.deepcopy(current), update_data)
+                movie["_v"] = movie_version(current) + 1
+
+                pipe.multi()
+                queue_versioned_set(pipe, cache_key, encode_cache_entry(movie), movie["_v"])
+                queue_leaderboard_update(pipe, movie_id, movie, CACHE_TTL)
+                pipe.xadd(WRITE_BEHIND_STREAM, {"movie_id": movie_id, "set": json.dumps(update_data), "ts": f"{time.time():.3f}"})
+                await pipe.execute()
+        except WatchError:
+            continue
+        except Exception as e:
+            return None, f"Redis error: {e}"
+
+        await publish_invalidation(cache_key, f"movie:hash:{movie_id}")
+        return movie, "Write-Behind: Updated in Redis, queued for MongoDB"
+
+    return None, "Redis error: too many concurrent updates"
+
+
+async def _watched_movie(pipe, cache_key: str):
+    """Documentul din movie:{id} citit pe conexiunea cu WATCH; False = marcaj negativ, None = MISS."""
+    raw = await pipe.get(cache_key)
+    if raw == NEGATIVE_CACHE_MARKER:
+        return False
+    if not raw:
+        return None
+    try:
+        return decode_cache_entry(unpack_cache_entry(raw))
+    except CodecError:
+        return None
+
+
+def coalesce(entries: list):
+    """
+    [(stream_id, fields)] -> {movie_id: ($set combinat, [stream_ids])}, în ordinea din stream.
+    _v crește în Mongo cu numărul de intrări (len(stream_ids)), ca în cache.
+    """
+    merged = {}
+    for stream_id, fields in entries:
+        movie_id = fields[b"movie_id"].decode()
+        update, ids = merged.setdefault(movie_id, ({}, []))
+        update.update(json.loads(fields[b"set"]))
+        ids.append(stream_id)
+    return merged
+
+
+async def _ack(redis_client, stream_ids: list):
+    # XACK + XDEL: stream-ul rămâne cât backlog-ul nescris în Mongo
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.xack(WRITE_BEHIND_STREAM, WRITE_BEHIND_GROUP, *stream_ids)
+    pipe.xdel(WRITE_BEHIND_STREAM, *stream_ids)
+    await pipe.execute()
+
+
+async def _renew(lock):
+    """Prelungește lock-ul de leader; LockNotOwnedError dacă l-a preluat alt worker."""
+    if lock is not None:
+        await lock.reacquire()
+
+
+async def flush(entries: list, lock=None):
+    """
+    Un bulk_write pentru tot batch-ul; documentele eșuate se reîncearcă, apoi merg în DLQ.
+    Lock-ul de leader se prelungește înainte de fiecare încercare: retry-urile cu backoff pot
+    depăși LEADER_TTL, iar un leader nou ar revendica (XAUTOCLAIM) și ar aplica din nou
+    aceleași intrări (inclusiv $inc pe _v). Dacă lock-ul s-a pierdut, ne oprim fără XACK.
+    """
+    redis_client = get_async_redis_raw()
+    pending = coalesce(entries)
+    start = time.perf_counter()
+
+    for attempt in range(1, WRITE_BEHIND_MAX_RETRIES + 1):
+        await _renew(lock)
+        movie_ids = list(pending)
+        operations = []
+        for mid in movie_ids:
+            update = versioned_update(pending[mid][0])
+            update["$inc"]["_v"] = len(pending[mid][1])
+            operations.append(UpdateOne({"_id": ObjectId(mid)}, update))
+        error = None
+        try:
+            await get_async_db().movies.bulk_write(operations, ordered=False)
+            failed = set()
+        except BulkWriteError as e:
+            failed = {movie_ids[err["index"]] for err in e.details.get("writeErrors", [])}
+            error = e.details.get("writeErrors", [{}])[0].get("errmsg", str(e))
+        except Exception as e:
+            failed = set(movie_ids)
+            error = str(e)
+
+        done = [sid for mid in movie_ids if mid not in failed for sid in pending[mid][1]]
+        if done:
+            await _ack(redis_client, done)
+        pending = {mid: pending[mid] for mid in movie_ids if mid in failed}
+        if not pending:
+            break
+        log.warning("write_behind_flush_failed", count=len(pending), attempt=attempt, error=str(error))
+        if attempt < WRITE_BEHIND_MAX_RETRIES:
+            await asyncio.sleep(min(0.1 * 2 ** attempt, 5))
+
+    if pending:
+        # Dead-letter: păstrăm update-ul și eroarea, apoi le scoatem din stream-ul principal
+        pipe = redis_client.pipeline(transaction=False)
+        for movie_id, (update, ids) in pending.items():
+            pipe.xadd(WRITE_BEHIND_DLQ, {"movie_id": movie_id, "set": json.dumps(update), "error": str(error), "ids": ",".join(i.decode() for i in ids)})
+        await pipe.execute()
+        await _ack(redis_client, [sid for _, ids in pending.values() for sid in ids])
+        WRITE_BEHIND_DEAD_LETTERS.inc(len(pending))
+
+    WRITE_BEHIND_FLUSH_SECONDS.observe(time.perf_counter() - start)
+
+
+async def _update_backlog(redis_client):
+    for group in await redis_client.xinfo_groups(WRITE_BEHIND_STREAM):
+        if group["name"] in (WRITE_BEHIND_GROUP, WRITE_BEHIND_GROUP.encode()):
+            WRITE_BEHIND_BACKLOG.set((group.get("pending") or 0) + (group.get("lag") or 0))
+
+
+async def _consume(lock):
+    """Citește din consumer group și face flush la prag de mărime sau de timp."""
+    # XREADGROUP BLOCK: client fără socket timeout
+    redis_client = get_async_redis_blocking()
+    try:
+        await redis_client.xgroup_create(WRITE_BEHIND_STREAM, WRITE_BEHIND_GROUP, id="0", mkstream=True)
+    except ResponseError as e:
+        if "BUSYGROUP" not in str(e):
+            raise
+
+    # Intrările rămase neconfirmate de un leader anterior sunt cele mai vechi -> primele
+    cursor = "0-0"
+    while True:
+        result = await redis_client.xautoclaim(
+            WRITE_BEHIND_STREAM, WRITE_BEHIND_GROUP, CONSUMER_NAME, 0, cursor, count=WRITE_BEHIND_BATCH
+        )
+        cursor, claimed = result[0], result[1]
+        if claimed:
+            await flush(claimed, lock)
+        if cursor in (b"0-0", "0-0"):
+            break
+
+    buffer = []
+    loop = asyncio.get_running_loop()
+    first_at = loop.time()
+    last_renew = loop.time()
+
+    while True:
+        wait_ms = max(1, int(WRITE_BEHIND_FLUSH_MS - (loop.time() - first_at) * 1000)) if buffer else WRITE_BEHIND_FLUSH_MS
+        response = await redis_client.xreadgroup(
+            WRITE_BEHIND_GROUP, CONSUMER_NAME, {WRITE_BEHIND_STREAM: ">"},
+            count=WRITE_BEHIND_BATCH - len(buffer), block=wait_ms
+        )
+        for _, entries in response or []:
+            if entries and not buffer:
+                first_at = loop.time()
+            buffer += entries
+
+        if buffer and (len(buffer) >= WRITE_BEHIND_BATCH or (loop.time() - first_at) * 1000 >= WRITE_BEHIND_FLUSH_MS):
+            await flush(buffer, lock)
+            buffer = []
+
+        await _update_backlog(redis_client)
+        if loop.time() - last_renew > LEADER_TTL / 3:
+            await _renew(lock)
+            last_renew = loop.time()
+
+
+async def run_write_behind_worker():
+    """
+    Task de fundal (lifespan, WRITE_BEHIND=1) sau proces separat (python -m app.write_behind).
+    Un singur consumer activ (lock) -> update-urile pe același film ajung în Mongo în ordine.
+    """
+    while True:
+        lock = get_async_redis().lock(LEADER_KEY, timeout=LEADER_TTL)
+        try:
+            if not await lock.acquire(blocking=False):
+                await asyncio.sleep(LEADER_TTL / 3)
+                continue
+            log.info("write_behind_leader", stream=WRITE_BEHIND_STREAM, consumer=CONSUMER_NAME)
+            try:
+                await _consume(lock)
+            finally:
+                try:
+                    await lock.release()
+                except LockError:
+                    pass
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            log.warning("write_behind_worker_error", error=str(e))
+            await asyncio.sleep(1)
+
+
+if __name__ == "__main__":
+    # Worker separat de API:
+    #   python -m app.write_behind
+    asyncio.run(run_write_behind_worker())
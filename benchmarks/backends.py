@@ -0,0 +1,176 @@
+"""
+Backend-urile pentru suita de benchmark (benchmarks/suite.py).
+
+  local: redis-server + mongod locale (BENCH_REDIS_HOST/PORT, BENCH_MONGO_URL),
+         prin clienții reali ai aplicației (pool-uri, breaker-e, timeout-uri)
+  fake : fakeredis + mongomock în proces (fără rețea; bun pentru regresii de CPU,
+         nu pentru latențe absolute)
+  auto : local dacă ambele porturi răspund, altfel fake
+
+configure() trebuie apelat ÎNAINTE de primul import din app: database.py citește
+REDIS_HOST / MONGO_URL la import, iar load_dotenv() nu suprascrie variabilele deja
+setate, deci .env-ul (Atlas) nu e folosit de benchmark.
+"""
+import os
+import socket
+from urllib.parse import urlparse
+
+BENCH_REDIS_HOST = os.getenv("BENCH_REDIS_HOST", "127.0.0.1")
+BENCH_REDIS_PORT = int(os.getenv("BENCH_REDIS_PORT", 6379))
+BENCH_MONGO_URL = os.getenv("BENCH_MONGO_URL", "mongodb://127.0.0.1:27017/?directConnection=true")
+
+LOCAL_HOSTS = ("127.0.0.1", "localhost", "::1", "redis", "mongo")
+
+
+def _reachable(host, port, timeout=0.3):
+    try:
+        with socket.create_connection((host, port), timeout=timeout):
+            return True
+    except OSError:
+        return False
+
+
+def local_available():
+    mongo = urlparse(BENCH_MONGO_URL)
+    return _reachable(BENCH_REDIS_HOST, BENCH_REDIS_PORT) and _reachable(mongo.hostname, mongo.port or 27017)
+
+
+def check_local_hosts():
+    """Suita golește Redis-ul și colecția movies: refuzăm orice nu pare o instanță locală."""
+    mongo_host = urlparse(BENCH_MONGO_URL).hostname
+    for host in (BENCH_REDIS_HOST, mongo_host):
+        if host not in LOCAL_HOSTS:
+            raise SystemExit(f"{host} nu e local: suita șterge datele (FLUSHDB, drop movies). Folosește --force.")
+
+
+def configure(mode: str, force: bool = False):
+    """Alege backend-ul și setează mediul pentru app. Returnează 'local' sau 'fake'."""
+    if mode == "auto":
+        mode = "local" if local_available() else "fake"
+    if mode == "local":
+        if not force:
+            check_local_hosts()
+        os.environ["REDIS_HOST"] = BENCH_REDIS_HOST
+        os.environ["REDIS_PORT"] = str(BENCH_REDIS_PORT)
+        os.environ["MONGO_URL"] = BENCH_MONGO_URL
+    else:
+        # URL valid ca MongoClient(connect=False) să se poată construi; nu se conectează niciodată
+        os.environ["MONGO_URL"] = "mongodb://127.0.0.1:1/?directConnection=true"
+    # Fără thread-uri de fundal și fără log pe calea măsurată
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    os.environ.setdefault("SERVER_TIMING", "0")
+    return mode
+
+
+# --- fake: fakeredis + mongomock cu interfața AsyncMongoClient ---
+
+class _AsyncCursor:
+    def __init__(self, cursor):
+        self.cursor = cursor
+
+    def sort(self, *args, **kwargs):
+        self.cursor = self.cursor.sort(*args, **kwargs)
+        return self
+
+    def limit(self, n):
+        self.cursor = self.cursor.limit(n)
+        return self
+
+    def skip(self, n):
+        self.cursor = self.cursor.skip(n)
+        return self
+
+    def batch_size(self, n):
+        return self
+
+    def __aiter__(self):
+        self._it = iter(self.cursor)
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._it)
+        except StopIteration:
+            raise StopAsyncIteration
+
+    async def to_list(self, length=None):
+        return list(self.cursor)
+
+
+class _AsyncCollection:
+    """Metodele mongomock devin corutine; find() rămâne sincron și aggregate() întoarce un cursor, ca în PyMongo async."""
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    def __getattr__(self, name):
+        method = getattr(self.collection, name)
+
+        async def call(*args, **kwargs):
+            return method(*args, **kwargs)
+        return call
+
+    def find(self, *args, **kwargs):
+        return _AsyncCursor(self.collection.find(*args, **kwargs))
+
+    async def aggregate(self, *args, **kwargs):
+        return _AsyncCursor(self.collection.aggregate(*args, **kwargs))
+
+    async def bulk_write(self, requests, ordered=True):
+        # mongomock nu înțelege operațiile din PyMongo 4.9+: le aplicăm pe rând
+        from pymongo import UpdateOne, InsertOne, DeleteOne
+        for op in requests:
+            if isinstance(op, UpdateOne):
+                self.collection.update_one(op._filter, op._doc, upsert=bool(op._upsert))
+            elif isinstance(op, InsertOne):
+                self.collection.insert_one(op._doc)
+            elif isinstance(op, DeleteOne):
+                self.collection.delete_one(op._filter)
+            else:
+                raise NotImplementedError(type(op).__name__)
+
+
+class _AsyncDatabase:
+    def __init__(self, database):
+        self.database = database
+
+    def __getattr__(self, name):
+        return _AsyncCollection(self.database[name])
+
+    def __getitem__(self, name):
+        return _AsyncCollection(self.database[name])
+
+    async def command(self, name, *args, **kwargs):
+        return {"ok": 1.0}
+
+
+class FakeAsyncMongoClient:
+    def __init__(self, client):
+        self.client = client
+
+    def __getitem__(self, name):
+        return _AsyncDatabase(self.client[name])
+
+    async def close(self):
+        pass
+
+
+def install_fake():
+    """Înlocuiește clienții din app.database cu fakeredis + mongomock (aceleași date pentru sync și async)."""
+    try:
+        import fakeredis
+        import mongomock
+    except ImportError:
+        raise SystemExit("Modul fake: pip install fakeredis[lua] mongomock (sau pornește redis-server + mongod și folosește --backend local)")
+
+    from app import database, service
+
+    server = fakeredis.FakeServer()
+    mongo = mongomock.MongoClient()
+    database._async_redis_client = fakeredis.FakeAsyncRedis(server=server, decode_responses=True)
+    database._async_redis_raw_client = fakeredis.FakeAsyncRedis(server=server)
+    database._async_redis_blocking_client = fakeredis.FakeAsyncRedis(server=server)
+    database._async_mongo_client = FakeAsyncMongoClient(mongo)
+    database.redis_client = service.redis_client = fakeredis.FakeRedis(server=server, decode_responses=True)
+    database.redis_raw_client = service.redis_raw_client = fakeredis.FakeRedis(server=server)
+    database.db = service.db = mongo["sample_mflix"]
@@ -0,0 +1,100 @@
+"""
+Benchmark: throughput pe calea de HIT (Redis) cu MISS-uri lente în zbor.
+
+Compară două moduri, în același event loop:
+  - sync : service.get_movie_with_cache (blochează loop-ul la fiecare apel)
+  - async: async_service.get_movie_with_cache (HIT-urile nu așteaptă MISS-urile)
+
+Rulare (Redis + Mongo din .env):
+    python -m benchmarks.bench_async_hit_path --duration 10 --hit-workers 50 --miss-workers 10
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+from app import service, async_service
+from app.database import db, redis_client, get_async_redis, close_async_clients
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    k = min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))
+    return values[k]
+
+
+async def call(mode, movie_id):
+    if mode == "sync":
+        return service.get_movie_with_cache(movie_id)
+    return await async_service.get_movie_with_cache(movie_id)
+
+
+async def hit_worker(mode, hot_id, deadline, latencies):
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        await call(mode, hot_id)
+        latencies.append((time.perf_counter() - start) * 1000)
+        # cedăm loop-ul ca și un request HTTP real
+        await asyncio.sleep(0)
+
+
+async def miss_worker(mode, cold_ids, deadline, counter):
+    while time.perf_counter() < deadline:
+        movie_id = random.choice(cold_ids)
+        # Forțăm MISS: ștergem cheia înainte de citire
+        await get_async_redis().delete(f"movie:{movie_id}")
+        await call(mode, movie_id)
+        counter[0] += 1
+        await asyncio.sleep(0)
+
+
+async def run_mode(mode, hot_id, cold_ids, args):
+    # Încălzim cache-ul pentru filmul "fierbinte"
+    await async_service.get_movie_with_cache(hot_id)
+
+    latencies = []
+    misses = [0]
+    deadline = time.perf_counter() + args.duration
+    tasks = [hit_worker(mode, hot_id, deadline, latencies) for _ in range(args.hit_workers)]
+    tasks += [miss_worker(mode, cold_ids, deadline, misses) for _ in range(args.miss_workers)]
+    await asyncio.gather(*tasks)
+
+    return {
+        "mode": mode,
+        "hits": len(latencies),
+        "hits_per_s": round(len(latencies) / args.duration, 1),
+        "misses": misses[0],
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "mean_ms": round(statistics.fmean(latencies), 2) if latencies else 0.0,
+    }
+
+
+async def main(args):
+    ids = [str(m["_id"]) for m in db.movies.find({}, {"_id": 1}).limit(args.sample + 1)]
+    if len(ids) < 2:
+        raise SystemExit("Nu am găsit filme în sample_mflix.movies")
+    hot_id, cold_ids = ids[0], ids[1:]
+
+    results = []
+    for mode in ("sync", "async"):
+        results.append(await run_mode(mode, hot_id, cold_ids, args))
+
+    print(f"{'mode':<6} {'hits/s':>10} {'p50 ms':>8} {'p99 ms':>8} {'misses':>8}")
+    for r in results:
+        print(f"{r['mode']:<6} {r['hits_per_s']:>10} {r['p50_ms']:>8} {r['p99_ms']:>8} {r['misses']:>8}")
+
+    await close_async_clients()
+    redis_client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=10.0, help="secunde per mod")
+    parser.add_argument("--hit-workers", type=int, default=50)
+    parser.add_argument("--miss-workers", type=int, default=10)
+    parser.add_argument("--sample", type=int, default=500, help="câte ID-uri reci folosim pentru MISS")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,171 @@
+"""
+Benchmark: calea geo (ingest theaters -> GEO set-uri per regiune, GEOSEARCH pe /geo/search).
+
+  - ingest: documente sintetice cu structura din sample_mflix.theaters inserate în Mongo,
+    apoi ingest_theaters() (scan cu proiecție + GEOADD pipelined) -> documente / secundă
+  - search: GEO set-uri de 1k / 100k / 1M puncte (încărcate direct cu queue_theaters(),
+    aceleași comenzi ca ingest-ul, fără Mongo) și find_nearby_theaters() pe mai multe raze,
+    pe regiunea "all" și pe o regiune (stat), cu COUNT = --limit
+
+Punctele sunt grupate în jurul a 50 de "orașe" (ca cinematografele reale), iar căutările
+pornesc din puncte existente, deci lovesc zone dense. Folosește backend-urile suitei:
+    python -m benchmarks.bench_geo --backend local --sizes 1000 100000 1000000
+Pe --backend fake (fakeredis) cifrele sunt doar pentru regresii de CPU, nu latențe reale.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from . import backends
+
+REGIONS = 50
+
+
+def make_theater(rng: random.Random, centers, i: int):
+    """Un document cu structura din sample_mflix.theaters."""
+    from bson import ObjectId
+    region = rng.randrange(len(centers))
+    lon, lat = centers[region]
+    return {
+        "_id": ObjectId(),
+        "theaterId": i,
+        "location": {
+            "address": {"street1": f"{i} Main St", "city": f"City {region}", "state": f"S{region:02d}",
+                        "zipcode": f"{10000 + i % 90000}"},
+            "geo": {"type": "Point", "coordinates": [round(rng.gauss(lon, 1.0), 6), round(rng.gauss(lat, 0.7), 6)]},
+        },
+    }
+
+
+def make_centers(rng: random.Random):
+    # Aproximativ teritoriul continental al SUA, ca sample_mflix.theaters
+    return [(rng.uniform(-122, -70), rng.uniform(27, 47)) for _ in range(REGIONS)]
+
+
+async def bench_ingest(size, args):
+    from app import geo
+    from app.database import get_async_db, get_async_redis
+
+    rng = random.Random(args.seed)
+    centers = make_centers(rng)
+    db = get_async_db()
+    await get_async_redis().flushdb()
+    await db.theaters.drop()
+    for start in range(0, size, 10_000):
+        await db.theaters.insert_many([make_theater(rng, centers, i) for i in range(start, min(size, start + 10_000))])
+    return await geo.ingest_theaters(args.batch)
+
+
+async def load_points(size, args):
+    """Încarcă direct în Redis (fără Mongo); întoarce punctele din care pornesc căutările."""
+    from app import geo
+    from app.database import get_async_redis
+
+    rng = random.Random(args.seed)
+    centers = make_centers(rng)
+    redis_client = get_async_redis()
+    await redis_client.flushdb()
+    origins = []
+    started = time.perf_counter()
+    for start in range(0, size, args.batch):
+        docs = [make_theater(rng, centers, i) for i in range(start, min(size, start + args.batch))]
+        pipe = redis_client.pipeline(transaction=False)
+        geo.queue_theaters(pipe, docs)
+        await pipe.execute()
+        if len(origins) < 1000:
+            origins += [(d["location"]["geo"]["coordinates"], d["location"]["address"]["state"]) for d in docs[:20]]
+    load_s = time.perf_counter() - started
+    try:
+        memory = await redis_client.memory_usage(geo.region_key(geo.ALL_REGION))
+    except Exception:
+        memory = None
+    return origins, load_s, memory
+
+
+async def search_loop(origins, radius, region_mode, deadline, latencies, found, args):
+    from app.async_service import find_nearby_theaters
+    while time.perf_counter() < deadline:
+        (lon, lat), state = random.choice(origins)
+        region = "all" if region_mode == "all" else state
+        start = time.perf_counter()
+        results = await find_nearby_theaters(lat, lon, radius, region, args.limit)
+        latencies.append((time.perf_counter() - start) * 1000)
+        found.append(len(results))
+        await asyncio.sleep(0)
+
+
+async def bench_search(size, args):
+    from .suite import percentile
+
+    origins, load_s, memory = await load_points(size, args)
+    rows = []
+    for region_mode in ("all", "region"):
+        for radius in args.radii:
+            latencies, found = [], []
+            start = time.perf_counter()
+            deadline = start + args.duration
+            await asyncio.gather(*[
+                search_loop(origins, radius, region_mode, deadline, latencies, found, args) for _ in range(args.workers)
+            ])
+            elapsed = time.perf_counter() - start
+            rows.append({
+                "points": size,
+                "region": region_mode,
+                "radius_km": radius,
+                "ops_per_s": round(len(latencies) / elapsed, 1),
+                "p50_ms": round(percentile(latencies, 50), 3),
+                "p99_ms": round(percentile(latencies, 99), 3),
+                "avg_found": round(sum(found) / len(found), 1) if found else 0,
+            })
+    return {"points": size, "load_s": round(load_s, 2), "load_points_per_s": round(size / load_s, 1),
+            "all_key_bytes": memory}, rows
+
+
+async def main(args):
+    from app.database import close_async_clients
+
+    if args.backend == "fake":
+        backends.install_fake()
+    random.seed(args.seed)
+    output = {"backend": args.backend, "ingest": [], "load": [], "search": []}
+
+    print(f"{'docs':>9} {'secunde':>9} {'docs/s':>10}")
+    for size in args.ingest_sizes:
+        stats = await bench_ingest(size, args)
+        output["ingest"].append(stats)
+        print(f"{size:>9} {stats['seconds']:>9} {stats['docs_per_s']:>10}")
+
+    print(f"\n{'puncte':>9} {'regiune':<7} {'km':>4} {'ops/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'găsite':>7}")
+    for size in args.sizes:
+        load, rows = await bench_search(size, args)
+        output["load"].append(load)
+        output["search"] += rows
+        for r in rows:
+            print(f"{r['points']:>9} {r['region']:<7} {r['radius_km']:>4} {r['ops_per_s']:>9} "
+                  f"{r['p50_ms']:>8} {r['p99_ms']:>8} {r['avg_found']:>7}")
+        print(f"{'':>9} încărcare: {load['load_points_per_s']} puncte/s, theaters:all = {load['all_key_bytes']} bytes")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(output, f, indent=2)
+    await close_async_clients()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", choices=("auto", "local", "fake"), default="auto")
+    parser.add_argument("--force", action="store_true", help="permite backend local pe host ne-local")
+    parser.add_argument("--ingest-sizes", type=int, nargs="*", default=[1_000, 100_000], help="documente în theaters")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000, 1_000_000], help="puncte în GEO set")
+    parser.add_argument("--batch", type=int, default=1_000, help="documente per pipeline (GEO_INGEST_BATCH)")
+    parser.add_argument("--radii", type=float, nargs="+", default=[1, 5, 25])
+    parser.add_argument("--limit", type=int, default=100, help="COUNT pentru GEOSEARCH")
+    parser.add_argument("--duration", type=float, default=3.0, help="secunde per combinație")
+    parser.add_argument("--workers", type=int, default=20, help="căutări concurente")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="", help="rezultatele și în JSON")
+    args = parser.parse_args()
+    args.backend = backends.configure(args.backend, args.force)
+    asyncio.run(main(args))
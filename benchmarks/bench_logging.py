@@ -0,0 +1,119 @@
+"""
+Benchmark: costul logging-ului pe calea de HIT din Redis (GET /movie/{id}).
+
+Același HIT (L1 și DataLoader oprite, ca fiecare apel să facă GET + log), cu:
+  - print  : print() sincron per request (comportamentul vechi)
+  - queue  : logger-ul structurat, fiecare eveniment pus în coadă (LOG_SAMPLE_RATE=1)
+  - sampled: logger-ul structurat cu eșantionare (--sample-rate, implicit 0.01)
+  - off    : fără log (plafonul)
+
+Log-urile merg în --sink (implicit /dev/null; pune un fișier sau /dev/stdout pentru
+costul real al terminalului).
+
+Rulare (Redis + Mongo din .env):
+    python -m benchmarks.bench_logging --duration 5 --workers 50
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+from app import async_service, log
+from app.database import db, redis_client, close_async_clients
+
+MODES = ("print", "queue", "sampled", "off")
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    k = min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))
+    return values[k]
+
+
+class PrintLogger:
+    """Ca înainte: un print() formatat, în thread-ul request-ului."""
+
+    def __init__(self, sink):
+        self.sink = sink
+
+    def sampled(self, event, rate=None, **fields):
+        print(f"⚡ CACHE HIT pentru {fields.get('movie_id')}", file=self.sink, flush=True)
+
+    def __getattr__(self, name):
+        return lambda event, **fields: print(f"{event} {fields}", file=self.sink, flush=True)
+
+
+def use_mode(mode, sink, sample_rate):
+    if mode == "print":
+        async_service.log = PrintLogger(sink)
+        return
+    async_service.log = log.get_logger("cache")
+    log.LOG_SAMPLE_RATE = {"queue": 1.0, "sampled": sample_rate, "off": 0.0}[mode]
+
+
+async def worker(movie_id, deadline, latencies):
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        await async_service.get_movie_raw_with_cache(movie_id)
+        latencies.append((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(0)
+
+
+async def run_mode(mode, movie_id, args, sink):
+    use_mode(mode, sink, args.sample_rate)
+    latencies = []
+    start = time.perf_counter()
+    deadline = start + args.duration
+    await asyncio.gather(*[worker(movie_id, deadline, latencies) for _ in range(args.workers)])
+    elapsed = time.perf_counter() - start
+    return {
+        "mode": mode,
+        "requests": len(latencies),
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+        "mean_ms": round(statistics.fmean(latencies), 3) if latencies else 0.0,
+    }
+
+
+async def main(args):
+    movie = db.movies.find_one({}, {"_id": 1})
+    if not movie:
+        raise SystemExit("Nu am găsit filme în sample_mflix.movies")
+    movie_id = str(movie["_id"])
+
+    # Fiecare apel trebuie să ajungă la GET-ul din Redis (acolo se loghează HIT-ul)
+    async_service.DATALOADER_ENABLED = False
+    async_service.l1.max_bytes = 0
+    async_service.l1.clear()
+
+    sink = open(args.sink, "a", buffering=1)
+    log.stop_logging()
+    log.setup_logging(stream=sink)
+
+    # Încălzim cache-ul
+    await async_service.get_movie_raw_with_cache(movie_id)
+
+    results = [await run_mode(mode, movie_id, args, sink) for mode in args.modes]
+
+    print(f"{'mode':<8} {'req/s':>10} {'p50 ms':>8} {'p99 ms':>8} {'mean ms':>8}")
+    for r in results:
+        print(f"{r['mode']:<8} {r['rps']:>10} {r['p50_ms']:>8} {r['p99_ms']:>8} {r['mean_ms']:>8}")
+
+    log.stop_logging()
+    sink.close()
+    await close_async_clients()
+    redis_client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=5.0, help="secunde per mod")
+    parser.add_argument("--workers", type=int, default=50, help="request-uri concurente")
+    parser.add_argument("--sample-rate", type=float, default=0.01)
+    parser.add_argument("--sink", default=os.devnull, help="unde se scriu log-urile")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    asyncio.run(main(parser.parse_args()))
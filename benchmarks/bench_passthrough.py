@@ -0,0 +1,121 @@
+"""
+Benchmark: calea curentă (json.loads + jsonable_encoder + JSONResponse) vs
+fast path-ul zero-copy (bytes din Redis lipiți direct în răspuns).
+
+Documentele sunt filme sintetice de mărimi diferite (plot/fullplot/cast mai lungi).
+
+    python -m benchmarks.bench_passthrough                 # doar CPU, fără Redis
+    python -m benchmarks.bench_passthrough --redis         # + GET real din Redis
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app import async_service
+from app.database import get_async_redis_raw, close_async_clients
+from app.main import json_envelope
+from app.service import pack_cache_entry
+
+SIZES = [1_000, 10_000, 100_000, 1_000_000]
+
+
+def make_movie(target_bytes: int):
+    """Film în formatul sample_mflix, umflat până la ~target_bytes."""
+    movie = {
+        "_id": "573a1390f29313caabcd4803",
+        "title": "Benchmark Movie",
+        "year": 1999,
+        "genres": ["Drama", "Comedy"],
+        "imdb": {"rating": 7.7, "votes": 1034, "id": 1737},
+        "directors": ["Winsor McCay"],
+        "plot": "",
+        "fullplot": "",
+        "cast": [],
+    }
+    sentence = "They move, and move they do, in a wildly exaggerated style. "
+    # fiecare "unitate" = o propoziție în fullplot + un actor (~80 bytes)
+    n = max(0, (target_bytes - len(json.dumps(movie))) // (len(sentence) + 20))
+    movie["cast"] = [f"Actor Number {i}" for i in range(n)]
+    movie["fullplot"] = sentence * n
+    movie["plot"] = movie["fullplot"][:200]
+    return movie
+
+
+def current_path(raw: bytes):
+    data = json.loads(raw)
+    content = jsonable_encoder({"latency_ms": 0.12, "source": "Redis", "data": data})
+    return JSONResponse(content).body
+
+
+def passthrough_path(raw: bytes):
+    return json_envelope(0.12, "Redis", raw)
+
+
+def bench(fn, arg, min_time=0.5):
+    n, elapsed = 0, 0.0
+    start = time.perf_counter()
+    while elapsed < min_time:
+        fn(arg)
+        n += 1
+        elapsed = time.perf_counter() - start
+    return elapsed / n * 1e6  # µs per apel
+
+
+async def bench_redis(sizes, iterations):
+    """GET real din Redis (L1 dezactivat) + construirea corpului răspunsului."""
+    async_service.l1.max_bytes = 0
+    redis_raw = get_async_redis_raw()
+    rows = []
+    for size in sizes:
+        movie_id = f"bench{size}"
+        await redis_raw.set(f"movie:{movie_id}", pack_cache_entry(json.dumps(make_movie(size))))
+
+        start = time.perf_counter()
+        for _ in range(iterations):
+            movie, source = await async_service.get_movie_with_cache(movie_id)
+            JSONResponse(jsonable_encoder({"latency_ms": 0.12, "source": source, "data": movie})).body
+        current = (time.perf_counter() - start) / iterations * 1e6
+
+        start = time.perf_counter()
+        for _ in range(iterations):
+            raw, source = await async_service.get_movie_raw_with_cache(movie_id)
+            json_envelope(0.12, source, raw)
+        fast = (time.perf_counter() - start) / iterations * 1e6
+
+        await redis_raw.delete(f"movie:{movie_id}")
+        rows.append((size, current, fast))
+    await close_async_clients()
+    return rows
+
+
+def print_rows(title, rows):
+    print(title)
+    print(f"{'doc bytes':>10} {'current µs':>12} {'passthrough µs':>15} {'speedup':>8}")
+    for size, current, fast in rows:
+        print(f"{size:>10} {current:>12.1f} {fast:>15.1f} {current / fast:>7.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--redis", action="store_true", help="include GET-ul din Redis")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    args = parser.parse_args()
+
+    rows = []
+    for size in args.sizes:
+        raw = json.dumps(make_movie(size)).encode()
+        rows.append((len(raw), bench(current_path, raw), bench(passthrough_path, raw)))
+    print_rows("CPU (fără rețea)", rows)
+
+    if args.redis:
+        print()
+        print_rows("Redis GET + răspuns", asyncio.run(bench_redis(args.sizes, args.iterations)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Benchmark: cât costă numărarea vizualizărilor pentru /trending pe calea de citire.
+
+  - record_view() izolat (ns per apel, fără I/O)
+  - calea de HIT (get_movie_raw_with_cache, ca GET /movie/{id}) fără / cu record_view,
+    cu worker-ul de flush pornit (ZINCRBY pipeline la TRENDING_FLUSH_MS) în același event loop
+  - durata unui flush în funcție de câte filme distincte s-au adunat
+
+Folosește backend-urile suitei (benchmarks/backends.py) și datele ei sintetice:
+    python -m benchmarks.bench_trending --backend local --duration 5 --workers 50
+"""
+import argparse
+import asyncio
+import random
+import time
+import timeit
+
+from . import backends
+
+
+async def hit_loop(ids, deadline, latencies, count_view, svc, trending):
+    while time.perf_counter() < deadline:
+        movie_id = random.choice(ids)
+        start = time.perf_counter()
+        raw, _ = await svc.get_movie_raw_with_cache(movie_id)
+        if count_view and raw:
+            trending.record_view(movie_id)
+        latencies.append((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(0)
+
+
+async def run_mode(mode, ids, args):
+    from app import async_service, trending
+    from .suite import percentile
+
+    worker = asyncio.create_task(trending.run_trending_worker()) if mode == "on" else None
+    latencies = []
+    start = time.perf_counter()
+    deadline = start + args.duration
+    await asyncio.gather(*[
+        hit_loop(ids, deadline, latencies, mode == "on", async_service, trending) for _ in range(args.workers)
+    ])
+    elapsed = time.perf_counter() - start
+    if worker is not None:
+        worker.cancel()
+        try:
+            await worker
+        except asyncio.CancelledError:
+            pass
+    return {
+        "mode": mode,
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+    }
+
+
+async def flush_cost(sizes):
+    from app import trending
+    rows = []
+    for size in sizes:
+        # ID-uri sintetice: ZINCRBY nu verifică dacă filmul există
+        for i in range(size):
+            trending.movie_views.record(f"{i:024x}")
+        start = time.perf_counter()
+        await trending.movie_views.flush()
+        rows.append((size, (time.perf_counter() - start) * 1000))
+    return rows
+
+
+async def main(args):
+    from app import async_service, trending
+    from app.database import close_async_clients
+    from .suite import seed
+
+    if args.backend == "fake":
+        backends.install_fake()
+    ids = (await seed(args))[:args.hot]
+    async_service.l1.max_bytes = async_service.L1_MAX_BYTES if args.l1 else 0
+    for movie_id in ids:
+        await async_service.get_movie_raw_with_cache(movie_id)
+
+    counter = trending.ViewCounter()
+    ns = min(timeit.repeat(lambda: counter.record(random.choice(ids)), number=100_000, repeat=5)) / 100_000 * 1e9
+    baseline = min(timeit.repeat(lambda: random.choice(ids), number=100_000, repeat=5)) / 100_000 * 1e9
+    print(f"record_view: {ns - baseline:.0f} ns per apel (fără random.choice)\n")
+
+    results = [await run_mode(mode, ids, args) for mode in ("off", "on")]
+    print(f"{'trending':<9} {'req/s':>10} {'p50 ms':>8} {'p99 ms':>8}")
+    for r in results:
+        print(f"{r['mode']:<9} {r['rps']:>10} {r['p50_ms']:>8} {r['p99_ms']:>8}")
+
+    print(f"\n{'filme':>7} {'flush ms':>9}")
+    for size, ms in await flush_cost(args.flush_sizes):
+        print(f"{size:>7} {ms:>9.2f}")
+
+    await close_async_clients()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", choices=("auto", "local", "fake"), default="auto")
+    parser.add_argument("--force", action="store_true", help="permite backend local pe host ne-local")
+    parser.add_argument("--movies", type=int, default=5_000)
+    parser.add_argument("--hot", type=int, default=1_000, help="filmele citite")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--l1", action="store_true", help="L1 pornit (implicit oprit: fiecare citire face GET)")
+    parser.add_argument("--duration", type=float, default=5.0, help="secunde per mod")
+    parser.add_argument("--workers", type=int, default=50, help="citiri concurente")
+    parser.add_argument("--flush-sizes", type=int, nargs="+", default=[10, 100, 1_000, 10_000])
+    args = parser.parse_args()
+    args.backend = backends.configure(args.backend, args.force)
+    asyncio.run(main(args))
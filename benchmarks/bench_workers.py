@@ -0,0 +1,169 @@
+"""
+Benchmark: throughput pe calea cache-uită (GET /movie/{id}, HIT) în funcție de
+numărul de workeri uvicorn și de mărimea pool-ului Redis per worker.
+
+Pentru fiecare combinație (workeri x pool) pornește `uvicorn app.main:app --workers N`
+cu REDIS_MAX_CONNECTIONS=P, așteaptă pornirea, încălzește cache-ul și trimite request-uri
+HTTP/1.1 keep-alive din --clients procese client (câte --connections conexiuni fiecare).
+Clientul e scris direct pe asyncio (fără dependențe), ca să nu devină el gâtul de sticlă.
+
+Pune clientul pe altă mașină / alte core-uri decât serverul dacă poți: pe aceeași mașină
+workerii și clientul își împart CPU-ul, iar peste numărul de core-uri throughput-ul scade.
+
+Rulare (Redis + Mongo din .env):
+    python -m benchmarks.bench_workers --workers 1 2 4 --pools 10 50 --duration 10
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+from app.database import db
+
+HOST = "127.0.0.1"
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    k = min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))
+    return values[k]
+
+
+async def connection_worker(port, request, deadline, latencies, errors):
+    reader, writer = await asyncio.open_connection(HOST, port)
+    try:
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            writer.write(request)
+            head = await reader.readuntil(b"\r\n\r\n")
+            length = 0
+            for line in head.split(b"\r\n"):
+                if line.lower().startswith(b"content-length:"):
+                    length = int(line.split(b":", 1)[1])
+            await reader.readexactly(length)
+            latencies.append((time.perf_counter() - start) * 1000)
+            if not head.startswith(b"HTTP/1.1 200"):
+                errors[0] += 1
+    finally:
+        writer.close()
+
+
+def client_process(port, path, connections, duration, results):
+    """Un proces client: `connections` conexiuni keep-alive, fiecare cu un request în zbor."""
+    request = f"GET {path} HTTP/1.1\r\nHost: {HOST}\r\nConnection: keep-alive\r\n\r\n".encode()
+    latencies, errors = [], [0]
+
+    async def run():
+        deadline = time.perf_counter() + duration
+        await asyncio.gather(*[
+            connection_worker(port, request, deadline, latencies, errors) for _ in range(connections)
+        ])
+
+    asyncio.run(run())
+    results.put((latencies, errors[0]))
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind((HOST, 0))
+        return s.getsockname()[1]
+
+
+def wait_ready(port, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(f"http://{HOST}:{port}/", timeout=1).read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise SystemExit(f"Serverul de pe portul {port} nu a pornit în {timeout}s")
+
+
+def start_server(port, workers, pool):
+    env = dict(
+        os.environ,
+        REDIS_MAX_CONNECTIONS=str(pool),
+        REDIS_PREWARM=str(pool),
+        LOG_LEVEL="WARNING",
+        SERVER_TIMING="0",
+    )
+    cmd = [sys.executable, "-m", "uvicorn", "app.main:app", "--host", HOST, "--port", str(port),
+           "--workers", str(workers), "--no-access-log", "--log-level", "warning"]
+    return subprocess.Popen(cmd, env=env)
+
+
+def run_combo(workers, pool, path, args):
+    port = free_port()
+    server = start_server(port, workers, pool)
+    try:
+        wait_ready(port)
+        # încălzim cache-ul (Redis) și L1-ul fiecărui worker
+        for _ in range(workers * 20):
+            urllib.request.urlopen(f"http://{HOST}:{port}{path}").read()
+
+        results = multiprocessing.Queue()
+        clients = [
+            multiprocessing.Process(target=client_process, args=(port, path, args.connections, args.duration, results))
+            for _ in range(args.clients)
+        ]
+        start = time.perf_counter()
+        for c in clients:
+            c.start()
+        latencies, errors = [], 0
+        for _ in clients:
+            part, part_errors = results.get()
+            latencies += part
+            errors += part_errors
+        for c in clients:
+            c.join()
+        elapsed = time.perf_counter() - start
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+    return {
+        "workers": workers,
+        "pool": pool,
+        "requests": len(latencies),
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "errors": errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4], help="workeri uvicorn")
+    parser.add_argument("--pools", type=int, nargs="+", default=[10, 50], help="REDIS_MAX_CONNECTIONS per worker")
+    parser.add_argument("--duration", type=float, default=10.0, help="secunde per combinație")
+    parser.add_argument("--clients", type=int, default=2, help="procese client")
+    parser.add_argument("--connections", type=int, default=50, help="conexiuni keep-alive per proces client")
+    parser.add_argument("--movie-id", help="implicit: primul film din sample_mflix.movies")
+    args = parser.parse_args()
+
+    movie_id = args.movie_id
+    if not movie_id:
+        movie = db.movies.find_one({}, {"_id": 1})
+        if not movie:
+            raise SystemExit("Nu am găsit filme în sample_mflix.movies")
+        movie_id = str(movie["_id"])
+    path = f"/movie/{movie_id}"
+
+    print(f"{'workers':>7} {'pool':>5} {'req/s':>10} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for workers in args.workers:
+        for pool in args.pools:
+            r = run_combo(workers, pool, path, args)
+            print(f"{r['workers']:>7} {r['pool']:>5} {r['rps']:>10} {r['p50_ms']:>8} {r['p99_ms']:>8} {r['errors']:>7}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
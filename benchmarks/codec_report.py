@@ -0,0 +1,108 @@
+"""
+Raport codec-uri pentru movie:{id}: bytes per cheie, timp encode/decode și
+hit ratio-ul rezultat la un maxmemory fix (docker-compose: 200mb, allkeys-lru).
+
+Hit ratio-ul e simulat: capacitatea = maxmemory / (bytes per cheie + overhead Redis),
+apoi rulăm un LRU peste cereri cu popularitate Zipf pe un catalog de --catalog filme.
+
+    python -m benchmarks.codec_report --samples 2000
+    python -m benchmarks.codec_report --synthetic --catalog 500000 --maxmemory 200
+"""
+import argparse
+import random
+import time
+from collections import OrderedDict
+
+from app import codec as codecs
+from app.service import mongo_json_encoder
+
+# Overhead aproximativ per cheie în Redis (dictEntry + robj + SDS + expire)
+REDIS_KEY_OVERHEAD = 90
+
+
+def load_samples(n: int, synthetic: bool):
+    if synthetic:
+        from benchmarks.bench_passthrough import make_movie
+        return [make_movie(random.randint(1_000, 6_000)) for _ in range(n)]
+    from app.database import db
+    return list(db.movies.aggregate([{"$sample": {"size": n}}]))
+
+
+def time_per_op(fn, items, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for item in items:
+            fn(item)
+        best = min(best, time.perf_counter() - start)
+    return best / len(items) * 1e6  # µs
+
+
+def zipf_stream(catalog: int, requests: int, skew: float):
+    """Cereri cu popularitate Zipf(skew) peste `catalog` ID-uri."""
+    weights = [1.0 / (rank ** skew) for rank in range(1, catalog + 1)]
+    return random.choices(range(catalog), weights=weights, k=requests)
+
+
+def simulate_hit_ratio(capacity: int, stream):
+    """LRU cu `capacity` chei peste același șir de cereri (comparabil între codec-uri)."""
+    lru, hits = OrderedDict(), 0
+    for key in stream:
+        if key in lru:
+            hits += 1
+            lru.move_to_end(key)
+        else:
+            lru[key] = True
+            if len(lru) > capacity:
+                lru.popitem(last=False)
+    return hits / len(stream)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--samples", type=int, default=2000, help="filme folosite pentru măsurători")
+    parser.add_argument("--synthetic", action="store_true", help="filme sintetice (fără Mongo)")
+    parser.add_argument("--maxmemory", type=float, default=200, help="MB, ca în docker-compose.yml")
+    parser.add_argument("--catalog", type=int, default=200_000, help="câte filme distincte sunt cerute")
+    parser.add_argument("--requests", type=int, default=500_000)
+    parser.add_argument("--skew", type=float, default=0.9, help="exponentul Zipf")
+    parser.add_argument("--dict-size", type=int, default=112640)
+    args = parser.parse_args()
+
+    samples = load_samples(args.samples, args.synthetic)
+    for m in samples:
+        m["_id"] = str(m["_id"])
+
+    candidates = [codecs.get_codec("j")]
+    for tag in ("o", "m", "z0"):
+        try:
+            candidates.append(codecs.get_codec(tag))
+        except codecs.CodecError:
+            print(f"(sar peste {tag}: pachetul nu e instalat)")
+
+    if codecs.zstandard is not None:
+        # Antrenăm dicționarul pe prima jumătate și măsurăm pe a doua (fără "trișat")
+        half = len(samples) // 2
+        dict_data = codecs.train_zstd_dictionary(samples[:half], args.dict_size)
+        candidates.append(codecs.ZstdCodec(dict_data))
+        samples = samples[half:]
+
+    maxmemory = args.maxmemory * 1024 * 1024
+    stream = zipf_stream(args.catalog, args.requests, args.skew)
+    print(f"{len(samples)} filme, maxmemory={args.maxmemory:.0f}MB, catalog={args.catalog}, zipf={args.skew}")
+    print(f"{'codec':<10} {'bytes/key':>10} {'encode µs':>10} {'decode µs':>10} {'to_json µs':>11} {'keys fit':>10} {'hit ratio':>10}")
+
+    for codec in candidates:
+        encoded = [codec.encode(m, default=mongo_json_encoder) for m in samples]
+        bytes_per_key = sum(len(e) for e in encoded) / len(encoded) + REDIS_KEY_OVERHEAD
+        enc = time_per_op(lambda m: codec.encode(m, default=mongo_json_encoder), samples)
+        dec = time_per_op(codec.decode, encoded)
+        to_json = time_per_op(codec.to_json, encoded)
+        capacity = int(maxmemory // bytes_per_key)
+        hit_ratio = simulate_hit_ratio(capacity, stream)
+        name = codec.name + (" +dict" if getattr(codec, "dict_id", 0) else "")
+        print(f"{name:<10} {bytes_per_key:>10.0f} {enc:>10.1f} {dec:>10.1f} {to_json:>11.1f} {capacity:>10} {hit_ratio:>10.1%}")
+
+
+if __name__ == "__main__":
+    main()
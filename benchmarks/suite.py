@@ -0,0 +1,372 @@
+"""
+Suita de benchmark reproductibilă: fără Atlas, cu date sintetice în formatul sample_mflix.
+
+Backend (vezi benchmarks/backends.py):
+  --backend local : redis-server + mongod locale (BENCH_REDIS_HOST/PORT, BENCH_MONGO_URL)
+  --backend fake  : fakeredis + mongomock, în proces
+  --backend auto  : local dacă răspund, altfel fake (implicit)
+ATENȚIE: suita face FLUSHDB pe Redis și recreează colecția sample_mflix.movies.
+
+Scenarii (throughput + p50/p95/p99 per operație, --concurrency operații în zbor):
+  movie_hit_l1, movie_hit_redis, movie_miss       get_movie_with_cache
+  top_movies_hit, top_movies_miss                 get_top_movies
+  top_optimized_hit, top_optimized_miss           get_top_movies_optimized
+  update_write_through, bulk_update_write_through, create_write_through, delete_write_through
+  geo_nearby                                      find_nearby_theaters
+La scenariile *_miss / delete, resetarea cheii (neinclusă în latență) intră în ops/s.
+
+Rezultatele merg în JSON; cu --baseline se compară ops/s și p95 și codul de ieșire e 1
+dacă vreun scenariu a regresat peste --threshold:
+    python -m benchmarks.suite --backend local --movies 20000 --output benchmarks/results/main.json
+    python -m benchmarks.suite --backend local --movies 20000 --baseline benchmarks/results/main.json
+Compară doar rezultate de pe aceeași mașină, cu același backend și aceeași scară.
+"""
+import argparse
+import asyncio
+import datetime
+import itertools
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+
+from . import backends
+
+SCENARIOS = (
+    "movie_hit_l1", "movie_hit_redis", "movie_miss",
+    "top_movies_hit", "top_movies_miss", "top_optimized_hit", "top_optimized_miss",
+    "update_write_through", "bulk_update_write_through", "create_write_through", "delete_write_through",
+    "geo_nearby",
+)
+
+# metrică -> True dacă mai mare = mai bine
+REGRESSION_METRICS = {"ops_per_s": True, "p95_ms": False}
+
+GENRES = ["Drama", "Comedy", "Action", "Romance", "Thriller", "Crime", "Documentary", "Adventure", "Horror", "Animation"]
+COUNTRIES = ["USA", "UK", "France", "Germany", "Romania", "Italy", "Japan", "India"]
+WORDS = "the a of in love war city night man woman last first return dark light story time world dream".split()
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    k = min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))
+    return values[k]
+
+
+def make_movie(rng: random.Random, i: int):
+    """Un document cu structura și mărimea (~1-2 KB) unui film din sample_mflix.movies."""
+    from bson import ObjectId
+    year = rng.randint(1915, 2016)
+    plot = " ".join(rng.choice(WORDS) for _ in range(rng.randint(15, 40))).capitalize() + "."
+    return {
+        "_id": ObjectId(),
+        "title": " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 4))).title() + f" {i}",
+        "year": year,
+        "runtime": rng.randint(60, 180),
+        "released": datetime.datetime(year, rng.randint(1, 12), rng.randint(1, 28)),
+        "genres": rng.sample(GENRES, rng.randint(1, 3)),
+        "cast": [f"Actor {rng.randint(1, 50_000)}" for _ in range(rng.randint(2, 8))],
+        "directors": [f"Director {rng.randint(1, 5_000)}"],
+        "countries": rng.sample(COUNTRIES, rng.randint(1, 2)),
+        "languages": ["English"],
+        "plot": plot,
+        "fullplot": " ".join([plot] * rng.randint(2, 6)),
+        "rated": rng.choice(["G", "PG", "PG-13", "R", "NOT RATED"]),
+        # ~1% fără rating, ca în sample_mflix (de aici filtrul imdb.rating != "")
+        "imdb": {
+            "rating": "" if rng.random() < 0.01 else round(rng.uniform(1.5, 9.6), 1),
+            "votes": rng.randint(5, 1_500_000),
+            "id": 10_000 + i,
+        },
+        "tomatoes": {"viewer": {"rating": round(rng.uniform(1, 5), 1), "numReviews": rng.randint(0, 100_000)}},
+        "num_mflix_comments": rng.randint(0, 200),
+        "type": "movie",
+        "lastupdated": f"{rng.randint(2012, 2015)}-0{rng.randint(1, 9)}-1{rng.randint(0, 9)} 00:00:00.000000000",
+    }
+
+
+async def seed(args):
+    """Date proaspete: Redis gol, movies recreată cu --movies documente, theaters în GeoIndex, Bloom filter."""
+    from app import database, async_service
+
+    rng = random.Random(args.seed)
+    database.redis_client.flushdb()
+    database.db.movies.drop()
+    docs = [make_movie(rng, i) for i in range(args.movies)]
+    for start in range(0, len(docs), 5_000):
+        database.db.movies.insert_many(docs[start:start + 5_000])
+    database.db.movies.create_index([("imdb.rating", -1)])
+    await async_service.seed_theaters()
+    await async_service.seed_movie_bloom()
+    return [str(doc["_id"]) for doc in docs]
+
+
+class Scenarios:
+    """Fiecare scenariu întoarce (op, before): before() pregătește argumentul, în afara latenței."""
+
+    def __init__(self, movie_ids, args):
+        from app import async_service, leaderboards
+        self.svc = async_service
+        self.keys = leaderboards
+        self.args = args
+        self.rng = random.Random(args.seed + 1)
+        self.movie_ids = movie_ids
+        self.hot_ids = movie_ids[:args.hot]
+        self.created = []
+
+    def use_l1(self, enabled: bool):
+        self.svc.l1.max_bytes = self.svc.L1_MAX_BYTES if enabled else 0
+        self.svc.l1.clear()
+
+    async def movie_hit_l1(self):
+        self.use_l1(True)
+        for movie_id in self.hot_ids:
+            await self.svc.get_movie_with_cache(movie_id)
+        return lambda _: self.svc.get_movie_with_cache(self.rng.choice(self.hot_ids)), None
+
+    async def movie_hit_redis(self):
+        self.use_l1(False)
+        for movie_id in self.hot_ids:
+            await self.svc.get_movie_with_cache(movie_id)
+        return lambda _: self.svc.get_movie_with_cache(self.rng.choice(self.hot_ids)), None
+
+    async def movie_miss(self):
+        self.use_l1(False)
+        redis_raw = self.svc.get_async_redis_raw()
+
+        async def before():
+            movie_id = self.rng.choice(self.movie_ids)
+            await redis_raw.delete(f"movie:{movie_id}")
+            return movie_id
+        return self.svc.get_movie_with_cache, before
+
+    async def top_movies_hit(self):
+        self.use_l1(True)
+        await self.svc.get_top_movies(self.args.limit)
+        return lambda _: self.svc.get_top_movies(self.args.limit), None
+
+    async def top_movies_miss(self):
+        self.use_l1(True)
+        redis = self.svc.get_async_redis()
+
+        async def before():
+            await redis.delete(self.keys.TOP_MOVIES_KEY, self.keys.TOP_MOVIES_COMPLETE_KEY)
+        return lambda _: self.svc.get_top_movies(self.args.limit), before
+
+    async def top_optimized_hit(self):
+        self.use_l1(True)
+        await self.svc.get_top_movies_optimized(self.args.limit)
+        return lambda _: self.svc.get_top_movies_optimized(self.args.limit), None
+
+    async def top_optimized_miss(self):
+        self.use_l1(False)
+        redis = self.svc.get_async_redis()
+
+        async def before():
+            await redis.delete(self.keys.OPTIMIZED_LEADERBOARD_KEY)
+        return lambda _: self.svc.get_top_movies_optimized(self.args.limit), before
+
+    def _rating_update(self):
+        return {"imdb.rating": round(self.rng.uniform(1.5, 9.6), 1), "imdb.votes": self.rng.randint(5, 1_500_000)}
+
+    async def update_write_through(self):
+        self.use_l1(True)
+        return lambda _: self.svc.update_movie_write_through(self.rng.choice(self.movie_ids), self._rating_update()), None
+
+    async def bulk_update_write_through(self):
+        self.use_l1(True)
+
+        async def before():
+            return {movie_id: self._rating_update() for movie_id in self.rng.sample(self.movie_ids, self.args.batch)}
+        return self.svc.update_movies_write_through, before
+
+    async def create_write_through(self):
+        self.use_l1(True)
+        rng = random.Random(self.args.seed + 2)
+
+        async def create(_):
+            movie = make_movie(rng, len(self.movie_ids) + len(self.created))
+            movie.pop("_id")
+            result, message = await self.svc.create_movie_write_through(movie)
+            if result is None:
+                raise RuntimeError(message)
+            self.created.append(result["_id"])
+        return create, None
+
+    async def delete_write_through(self):
+        self.use_l1(True)
+
+        async def before():
+            # Ștergem filmele create de create_write_through (sau unele seed-uite, dacă nu a rulat)
+            return self.created.pop() if self.created else self.movie_ids.pop()
+        return self.svc.delete_movie_write_through, before
+
+    async def geo_nearby(self):
+        async def before():
+            # Puncte în jurul centrului Bucureștiului
+            return 44.43 + self.rng.uniform(-0.05, 0.05), 26.10 + self.rng.uniform(-0.05, 0.05)
+        return lambda point: self.svc.find_nearby_theaters(point[0], point[1], self.args.radius_km), before
+
+
+async def measure(op, before, iterations: int, concurrency: int):
+    latencies = []
+    errors = 0
+    counter = itertools.count()
+
+    async def worker():
+        nonlocal errors
+        while next(counter) < iterations:
+            arg = await before() if before else None
+            start = time.perf_counter()
+            try:
+                await op(arg)
+            except Exception:
+                errors += 1
+                continue
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - start
+    return {
+        "ops": len(latencies),
+        "errors": errors,
+        "ops_per_s": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+        "mean_ms": round(sum(latencies) / len(latencies), 3) if latencies else 0.0,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def metadata(backend, args):
+    from app import async_service, codec
+    return {
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "backend": backend,
+        "movies": args.movies,
+        "iterations": args.iterations,
+        "repeat": args.repeat,
+        "concurrency": args.concurrency,
+        "seed": args.seed,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "config": {
+            "l1_max_bytes": async_service.L1_MAX_BYTES,
+            "dataloader": async_service.DATALOADER_ENABLED,
+            "bloom": async_service.MOVIE_BLOOM,
+            "codec": codec.CACHE_CODEC,
+        },
+    }
+
+
+def compare(current, baseline, threshold):
+    """Tabel cu diferențele față de baseline; întoarce lista scenariilor regresate."""
+    for key in ("backend", "movies", "concurrency"):
+        if current["meta"].get(key) != baseline["meta"].get(key):
+            print(f"⚠️  {key} diferit față de baseline: {baseline['meta'].get(key)} -> {current['meta'].get(key)}")
+
+    regressions = []
+    print(f"\n{'scenario':<26} {'ops/s':>10} {'Δ':>8} {'p95 ms':>9} {'Δ':>8}")
+    for name, result in current["results"].items():
+        base = baseline["results"].get(name)
+        if not base:
+            print(f"{name:<26} {result['ops_per_s']:>10} {'new':>8} {result['p95_ms']:>9} {'new':>8}")
+            continue
+        deltas = {}
+        regressed = False
+        for metric, higher_is_better in REGRESSION_METRICS.items():
+            delta = (result[metric] - base[metric]) / base[metric] if base[metric] else 0.0
+            deltas[metric] = delta
+            if (-delta if higher_is_better else delta) > threshold:
+                regressed = True
+        if regressed:
+            regressions.append(name)
+        mark = "  ❌" if regressed else ""
+        print(f"{name:<26} {result['ops_per_s']:>10} {deltas['ops_per_s']:>+8.1%} "
+              f"{result['p95_ms']:>9} {deltas['p95_ms']:>+8.1%}{mark}")
+    return regressions
+
+
+async def run(backend, args):
+    from app import database
+
+    if backend == "fake":
+        backends.install_fake()
+
+    print(f"backend={backend} movies={args.movies} iterations={args.iterations} concurrency={args.concurrency}")
+    movie_ids = await seed(args)
+    scenarios = Scenarios(movie_ids, args)
+
+    results = {}
+    print(f"{'scenario':<26} {'ops/s':>10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for name in args.scenarios:
+        op, before = await getattr(scenarios, name)()
+        # Încălzire: pool-uri, cod compilat de Redis (Lua), cache-ul de planuri Mongo
+        await measure(op, before, args.warmup, args.concurrency)
+        # Rularea mediană (după ops/s) din --repeat: o singură rulare e prea zgomotoasă pentru comparații
+        runs = sorted([await measure(op, before, args.iterations, args.concurrency) for _ in range(args.repeat)],
+                      key=lambda r: r["ops_per_s"])
+        result = dict(runs[len(runs) // 2], runs_ops_per_s=[r["ops_per_s"] for r in runs])
+        results[name] = result
+        print(f"{name:<26} {result['ops_per_s']:>10} {result['p50_ms']:>9} {result['p95_ms']:>9} "
+              f"{result['p99_ms']:>9} {result['errors']:>7}", flush=True)
+
+    await database.close_async_clients()
+    return {"meta": metadata(backend, args), "results": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", choices=("auto", "local", "fake"), default="auto")
+    parser.add_argument("--force", action="store_true", help="permite backend local pe host ne-local")
+    parser.add_argument("--movies", type=int, default=10_000, help="filme seed-uite")
+    parser.add_argument("--hot", type=int, default=100, help="filme din setul fierbinte (scenariile *_hit)")
+    parser.add_argument("--iterations", type=int, default=2_000, help="operații măsurate per scenariu")
+    parser.add_argument("--repeat", type=int, default=3, help="rulări per scenariu (se păstrează mediana)")
+    parser.add_argument("--warmup", type=int, default=200, help="operații de încălzire per scenariu")
+    parser.add_argument("--concurrency", type=int, default=10, help="operații în zbor")
+    parser.add_argument("--limit", type=int, default=100, help="top N pentru scenariile top_*")
+    parser.add_argument("--batch", type=int, default=20, help="filme per bulk_update_write_through")
+    parser.add_argument("--radius-km", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42, help="seed pentru date și alegerea ID-urilor")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--output", default="benchmarks/results/latest.json")
+    parser.add_argument("--baseline", help="JSON-ul unei rulări anterioare")
+    parser.add_argument("--threshold", type=float, default=0.15, help="regresie tolerată (0.15 = 15%%)")
+    args = parser.parse_args()
+
+    backend = backends.configure(args.backend, args.force)
+    report = asyncio.run(run(backend, args))
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nRezultate: {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print(f"\nRegresii peste {args.threshold:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+        print("\nFără regresii față de baseline.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+# Profil multi-worker: gunicorn (manager de procese) + workeri uvicorn (event loop).
+#   gunicorn app.main:app -c gunicorn.conf.py
+# Fiecare worker are propriile pool-uri Redis / Mongo, L1 și breaker-e:
+# conexiuni totale = WEB_CONCURRENCY x (REDIS_MAX_CONNECTIONS, MONGO_MAX_POOL_SIZE).
+# Metricile Prometheus sunt agregate pe toți workerii (mod multiprocess, vezi mai jos).
+import os
+import glob
+import multiprocessing
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "uvicorn.workers.UvicornWorker"
+# Keep-alive HTTP spre client / load balancer (mai mare decât idle timeout-ul LB-ului)
+keepalive = int(os.getenv("KEEPALIVE", 5))
+timeout = int(os.getenv("WORKER_TIMEOUT", 30))
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT", 30))
+# Reciclare periodică (fragmentare memorie), cu jitter ca workerii să nu repornească simultan
+max_requests = int(os.getenv("MAX_REQUESTS", 0))
+max_requests_jitter = int(os.getenv("MAX_REQUESTS_JITTER", 0))
+# preload: aplicația se importă o dată în master (import mai rapid, memorie partajată copy-on-write).
+# Sigur: clienții async se creează lazy per worker, MongoClient-ul sincron are connect=False,
+# iar database.py / log.py resetează clienții și thread-ul de log după fork.
+preload_app = os.getenv("PRELOAD_APP", "0") == "1"
+
+# Prometheus multiprocess: fiecare worker scrie valorile în fișiere mmap din acest director,
+# iar /metrics (Instrumentator.expose) le agregă cu MultiProcessCollector. Altfel fiecare
+# scrape ar vedea contoarele unui singur worker, ales de load balancing.
+# Trebuie setat ÎNAINTE ca app-ul (deci prometheus_client) să fie importat.
+if workers > 1:
+    os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/tmp/prometheus_multiproc")
+if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+    os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"], exist_ok=True)
+
+
+def on_starting(server):
+    """Fișierele rămase de la o rulare anterioară ar umfla contoarele."""
+    directory = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+    if directory:
+        for path in glob.glob(os.path.join(directory, "*.db")):
+            os.remove(path)
+
+
+def child_exit(server, worker):
+    """Gauge-urile "live*" ale unui worker oprit nu mai intră în agregare."""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
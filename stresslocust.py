@@ -1,21 +1,284 @@
-from locust import HttpUser, task, between
+"""
+Workload Locust realist: ID-urile reale din sample_mflix, popularitate Zipf, mix de citiri și scrieri.
+
+Popularitate: filmul de rang k e cerut proporțional cu 1 / k^s (--zipf-s). s=0 = uniform,
+s≈1 = tipic pentru conținut web (câteva filme fierbinți, coadă lungă rece), s>1.2 = foarte
+concentrat. Rangurile se dau după o permutare fixă (--zipf-seed), nu în ordinea _id-urilor.
+
+ID-urile vin din --id-file (un ID pe linie, sau JSON lines de la mongoexport) sau, implicit,
+din Mongo (MONGO_URL din .env). Pentru containerul locust (fără pymongo) face dump-ul înainte:
+    python stresslocust.py --dump-ids locust-ids/movie_ids.txt
+Fără fișier și fără pymongo, fiecare proces ia primele --api-ids ID-uri din /top-movies/
+(paginat) la pornirea primului user: merge, dar popularitatea e doar peste filmele de top.
+
+Mix-ul (ponderi relative): --read-weight, --update-weight, --create-weight, --delete-weight,
+--geo-weight, --top-weight. DELETE-urile șterg doar filme create de acest test.
+
+Headless, cu CSV-urile de latență ale Locust (<prefix>_stats.csv, _stats_history.csv, ...)
+plus <prefix>_hit_ratio.csv (sursa răspunsului: L1 / Redis / MongoDB, per endpoint):
+    locust -f stresslocust.py --headless -u 200 -r 20 -t 5m --host http://localhost:8000 \\
+        --csv locust-results/zipf11 --zipf-s 1.1 --id-file locust-ids/movie_ids.txt
+"""
+import csv
+import json
+import os
 import random
+import re
+import sys
+import time
+from collections import Counter
+
+from gevent.lock import Semaphore
+from locust import HttpUser, events, task
+from locust.runners import MasterRunner, WorkerRunner
+
+# Ponderile implicite: trafic dominat de citiri, ca un catalog real
+DEFAULT_MIX = {"read": 80, "update": 5, "create": 2, "delete": 1, "geo": 5, "top": 7}
+TOP_LIMITS = [10, 20, 50, 100]
+# Centrul Bucureștiului (cinematografele din /geo/init)
+GEO_CENTER = (44.43, 26.10)
+
+SOURCE_RE = re.compile(rb'"source"\s*:\s*"([^"]*)"')
+
+movie_ids = []          # permutarea fixă: movie_ids[k] = filmul de rang k + 1
+cum_weights = []        # ponderi Zipf cumulative, pentru random.choices (bisect, O(log n))
+created_ids = []        # filme create de test (singurele care se șterg)
+sources = Counter()     # (endpoint, clasă) -> răspunsuri, în procesul curent
+mix = dict(DEFAULT_MIX)
+ids_lock = Semaphore()  # un singur user încarcă ID-urile din API, ceilalți așteaptă
+
+
+@events.init_command_line_parser.add_listener
+def add_arguments(parser):
+    group = parser.add_argument_group("movie workload")
+    group.add_argument("--id-file", default="", help="fișier cu ID-uri (altfel: din Mongo, MONGO_URL)")
+    group.add_argument("--max-ids", type=int, default=0, help="folosește doar primele N ID-uri (0 = toate)")
+    group.add_argument("--api-ids", type=int, default=5000,
+                       help="câte ID-uri se iau din /top-movies/ când nu există nici fișier, nici pymongo")
+    group.add_argument("--zipf-s", type=float, default=1.0, help="exponentul Zipf (0 = uniform)")
+    group.add_argument("--zipf-seed", type=int, default=42, help="seed pentru permutarea rangurilor")
+    for name, weight in DEFAULT_MIX.items():
+        group.add_argument(f"--{name}-weight", type=float, default=weight)
+    group.add_argument("--think-min", type=float, default=0.0, help="pauza minimă între request-uri (secunde)")
+    group.add_argument("--think-max", type=float, default=0.0, help="pauza maximă între request-uri (secunde)")
+
+
+def load_ids_from_file(path):
+    ids = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith("{"):
+                # mongoexport: {"_id":{"$oid":"..."}}
+                value = json.loads(line)["_id"]
+                line = value["$oid"] if isinstance(value, dict) else str(value)
+            ids.append(line)
+    return ids
+
+
+def load_ids_from_mongo():
+    from dotenv import load_dotenv
+    from pymongo import MongoClient
+    load_dotenv()
+    client = MongoClient(os.getenv("MONGO_URL"))
+    try:
+        return [str(doc["_id"]) for doc in client["sample_mflix"].movies.find({}, {"_id": 1})]
+    finally:
+        client.close()
+
+
+def load_ids_from_api(host, count):
+    """ID-uri din /top-movies/ (paginat cu offset), când nu avem nici fișier, nici pymongo."""
+    import requests
+    ids = []
+    while len(ids) < count:
+        response = requests.get(f"{host.rstrip('/')}/top-movies/",
+                                params={"limit": min(100, count - len(ids)), "offset": len(ids)}, timeout=30)
+        response.raise_for_status()
+        page = [movie["_id"] for movie in response.json()["data"]]
+        if not page:
+            break
+        ids += page
+    return ids
+
+
+def use_ids(ids, options):
+    if options.max_ids:
+        ids = ids[:options.max_ids]
+    if not ids:
+        raise SystemExit("Nu am găsit ID-uri de filme (--id-file, MONGO_URL sau /top-movies/)")
+    build_distribution(ids, options.zipf_s, options.zipf_seed)
+    top_share = sum(1.0 / r ** options.zipf_s for r in range(1, min(100, len(ids)) + 1)) / cum_weights[-1]
+    print(f"workload: {len(ids)} filme, zipf s={options.zipf_s} (top 100 = {top_share:.0%} din citiri), mix={mix}")
+
+
+def build_distribution(ids, s, seed):
+    global movie_ids, cum_weights
+    ids = sorted(ids)
+    random.Random(seed).shuffle(ids)
+    total = 0.0
+    weights = []
+    for rank in range(1, len(ids) + 1):
+        total += 1.0 / rank ** s
+        weights.append(total)
+    movie_ids, cum_weights = ids, weights
+
+
+def zipf_movie_id():
+    return random.choices(movie_ids, cum_weights=cum_weights)[0]
+
+
+@events.init.add_listener
+def on_init(environment, **kwargs):
+    """Rulează în fiecare proces (master și workeri): încarcă ID-urile și mix-ul."""
+    options = environment.parsed_options
+    if options is None:
+        return
+    if isinstance(environment.runner, MasterRunner):
+        return  # master-ul nu trimite request-uri
+    for name in DEFAULT_MIX:
+        mix[name] = getattr(options, f"{name}_weight")
+    if options.id_file and os.path.isfile(options.id_file):
+        use_ids(load_ids_from_file(options.id_file), options)
+    elif options.id_file:
+        # Host-ul poate veni abia din UI: ID-urile se iau din API la pornirea primului user
+        print(f"{options.id_file} nu există, iau ID-urile din /top-movies/")
+    else:
+        try:
+            use_ids(load_ids_from_mongo(), options)
+        except ImportError:
+            print("pymongo lipsește, iau ID-urile din /top-movies/")
+
+
+def classify(source: str):
+    """Sursa răspunsului -> l1 / redis / bloom / miss."""
+    if source.startswith("L1"):
+        return "l1"
+    if source.startswith("Redis"):
+        return "redis"
+    if source.startswith("Bloom"):
+        return "bloom"
+    return "miss"
+
+
+def record_source(endpoint, response):
+    match = SOURCE_RE.search(response.content[:512]) if response.content else None
+    if match:
+        sources[endpoint, classify(match.group(1).decode())] += 1
+
+
+@events.report_to_master.add_listener
+def on_report_to_master(client_id, data):
+    data["movie_sources"] = [[endpoint, kind, count] for (endpoint, kind), count in sources.items()]
+    sources.clear()
+
+
+@events.worker_report.add_listener
+def on_worker_report(client_id, data):
+    for endpoint, kind, count in data.get("movie_sources", []):
+        sources[endpoint, kind] += count
+
+
+@events.test_start.add_listener
+def on_test_start(environment, **kwargs):
+    sources.clear()
+
+
+@events.test_stop.add_listener
+def on_test_stop(environment, **kwargs):
+    """Scrie <csv prefix>_hit_ratio.csv (pe master / în modul local)."""
+    if isinstance(environment.runner, WorkerRunner):
+        return
+    endpoints = sorted({endpoint for endpoint, _ in sources})
+    rows = []
+    for endpoint in endpoints:
+        counts = {kind: sources[endpoint, kind] for kind in ("l1", "redis", "bloom", "miss")}
+        total = sum(counts.values())
+        hits = counts["l1"] + counts["redis"] + counts["bloom"]
+        rows.append([endpoint, total, counts["l1"], counts["redis"], counts["bloom"], counts["miss"],
+                     f"{hits / total:.4f}" if total else ""])
+        print(f"{endpoint:<26} requests={total} hit_ratio={rows[-1][-1]} (l1={counts['l1']} redis={counts['redis']} bloom={counts['bloom']} miss={counts['miss']})")
+
+    prefix = environment.parsed_options.csv_prefix if environment.parsed_options else None
+    if prefix:
+        os.makedirs(os.path.dirname(prefix) or ".", exist_ok=True)
+        with open(f"{prefix}_hit_ratio.csv", "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["endpoint", "requests", "l1", "redis", "bloom", "miss", "hit_ratio"])
+            writer.writerows(rows)
+
+
+def new_movie():
+    return {
+        "title": f"Locust Movie {random.randint(0, 10**9)}",
+        "year": random.randint(1950, 2024),
+        "genres": random.sample(["Drama", "Comedy", "Action", "Thriller", "Romance"], 2),
+        "plot": "Created by the load test.",
+        "imdb": {"rating": round(random.uniform(1, 9.5), 1), "votes": random.randint(1, 10_000)},
+        "type": "movie",
+    }
+
+
+class MovieUser(HttpUser):
+    def on_start(self):
+        with ids_lock:
+            if not movie_ids:
+                options = self.environment.parsed_options
+                use_ids(load_ids_from_api(self.host, options.api_ids), options)
+
+    def wait_time(self):
+        options = self.environment.parsed_options
+        if options is None or options.think_max <= 0:
+            return 0
+        return random.uniform(options.think_min, options.think_max)
+
+    @task
+    def run_operation(self):
+        operation = random.choices(list(mix), weights=list(mix.values()))[0]
+        getattr(self, operation)()
+
+    def read(self):
+        with self.client.get(f"/movie/{zipf_movie_id()}", name="/movie/{id}", catch_response=True) as response:
+            if response.status_code == 404:
+                response.success()  # film șters între timp: tot un răspuns valid
+            record_source("/movie/{id}", response)
+
+    def update(self):
+        payload = {"num_mflix_comments": random.randint(0, 500), "lastupdated": time.strftime("%Y-%m-%d %H:%M:%S")}
+        self.client.put(f"/movie/{zipf_movie_id()}", json=payload, name="/movie/{id} [PUT]")
+
+    def create(self):
+        response = self.client.post("/movie/", json=new_movie(), name="/movie/ [POST]")
+        if response.ok:
+            created_ids.append(response.json()["data"]["_id"])
+
+    def delete(self):
+        if not created_ids:
+            return self.create()
+        movie_id = created_ids.pop(random.randrange(len(created_ids)))
+        self.client.delete(f"/movie/{movie_id}", name="/movie/{id} [DELETE]")
 
-MOVIE_IDS = [
-    "573a1390f29313caabcd42e8", # The Great Train Robbery
-    "573a1390f29313caabcd446f", # A Corner in Wheat
-    "573a1390f29313caabcd4803", # Winsor McCay
-]
+    def geo(self):
+        lat = GEO_CENTER[0] + random.uniform(-0.05, 0.05)
+        lon = GEO_CENTER[1] + random.uniform(-0.05, 0.05)
+        self.client.get("/geo/search", params={"lat": lat, "lon": lon, "radius": random.choice([1, 3, 5, 10])},
+                        name="/geo/search")
 
-class WebsiteUser(HttpUser):
-    # Timpul de așteptare între request-uri (simulăm un om real)
-    wait_time = between(1, 2)
+    def top(self):
+        with self.client.get("/top-movies-optimized/", params={"limit": random.choice(TOP_LIMITS)},
+                             name="/top-movies-optimized/", catch_response=True) as response:
+            record_source("/top-movies-optimized/", response)
 
-    @task(3) # Ponderea 3: De 3 ori mai probabil să ceară un film specific
-    def view_movie(self):
-        movie_id = random.choice(MOVIE_IDS)
-        self.client.get(f"/movie/{movie_id}", name="/movie/{id}")
 
-    @task(1) # Ponderea 1: Mai rar se uită la top
-    def view_top_movies(self):
-        self.client.get("/top-movies", name="/top-movies")
\ No newline at end of file
+if __name__ == "__main__":
+    # python stresslocust.py --dump-ids locust-ids/movie_ids.txt
+    if len(sys.argv) == 3 and sys.argv[1] == "--dump-ids":
+        ids = load_ids_from_mongo()
+        os.makedirs(os.path.dirname(sys.argv[2]) or ".", exist_ok=True)
+        with open(sys.argv[2], "w") as f:
+            f.write("\n".join(ids) + "\n")
+        print(f"{len(ids)} ID-uri scrise în {sys.argv[2]}")
+    else:
+        print(__doc__)
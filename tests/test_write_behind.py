@@ -0,0 +1,57 @@
+"""
+PUT-uri write-behind concurente pe același film: fiecare primește un _v distinct,
+cache-ul păstrează toate $set-urile și stream-ul are câte o intrare per update.
+
+Rulează pe backend-ul fake al suitei de benchmark (fakeredis[lua] + mongomock):
+    python -m pytest tests
+"""
+import asyncio
+
+import pytest
+
+pytest.importorskip("fakeredis")
+pytest.importorskip("lupa")
+pytest.importorskip("mongomock")
+
+from benchmarks import backends  # noqa: E402
+
+backends.configure("fake")
+backends.install_fake()
+
+from app import database, write_behind  # noqa: E402
+
+UPDATES = 20
+
+
+def insert_movie():
+    return str(database.db.movies.insert_one(
+        {"title": "Concurrent", "year": 1999, "imdb": {"rating": 7.0, "votes": 10}, "_v": 1}
+    ).inserted_id)
+
+
+def run_updates(update, movie_id):
+    async def run():
+        await database.get_async_redis_raw().delete(write_behind.WRITE_BEHIND_STREAM)
+        results = await asyncio.gather(*[update(movie_id, {f"field_{i}": i}) for i in range(UPDATES)])
+        cached, _ = await write_behind.get_movie_with_cache(movie_id)
+        stream_length = await database.get_async_redis_raw().xlen(write_behind.WRITE_BEHIND_STREAM)
+        return results, cached, stream_length
+
+    return asyncio.run(run())
+
+
+def check(results, cached, stream_length):
+    assert all(movie is not None for movie, _ in results), sorted(set(source for _, source in results))
+    assert sorted(movie["_v"] for movie, _ in results) == list(range(2, UPDATES + 2))
+    assert cached["_v"] == UPDATES + 1
+    assert all(cached[f"field_{i}"] == i for i in range(UPDATES))
+    assert stream_length == UPDATES
+
+
+def test_concurrent_updates_get_distinct_versions():
+    check(*run_updates(write_behind.update_movie_write_behind, insert_movie()))
+
+
+def test_concurrent_updates_across_workers():
+    # Fără lock-ul local (ca update-uri din procese diferite): doar WATCH / MULTI
+    check(*run_updates(write_behind._update_cached_movie, insert_movie()))